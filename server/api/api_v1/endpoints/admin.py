@@ -6,6 +6,7 @@ from server.schemas import schema
 from server.crud import crud_user
 from server.api.api_v1 import deps
 from server.core import security
+from server.utils import workshop_ranking
 
 router = APIRouter(prefix="/admin", tags=["后台管理"])
 
@@ -259,6 +260,7 @@ async def set_workshop_item_visibility(
         item.is_deleted = bool(payload["is_deleted"])
 
     await item.save()
+    workshop_ranking.ranking.upsert_item(item)
     return {"message": "已更新"}
 
 
@@ -274,4 +276,5 @@ async def delete_workshop_item_admin(
         raise HTTPException(status_code=404, detail="工坊内容不存在")
 
     await item.delete()
+    workshop_ranking.ranking.discard(item_id)
     return {"message": "已彻底删除"}
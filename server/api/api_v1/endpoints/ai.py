@@ -6,6 +6,7 @@ from tortoise.transactions import in_transaction
 from server.api.api_v1 import deps
 from server import models
 from server.schemas import schema
+from server.database import PRIMARY_CONNECTION
 from server.crud import crud_redemption, crud_world, crud_origins, crud_spirit_roots, crud_talents
 import logging
 
@@ -61,16 +62,9 @@ async def save_ai_content(
         raise HTTPException(status_code=400, detail="仙缘信物不可为空！")
         
     try:
-        async with in_transaction():
-            # 1. 验证兑换码
-            code_obj, message = await crud_redemption.get_code_by_string(code_str=request.code)
-            if not code_obj:
-                raise HTTPException(status_code=400, detail="仙缘信物不存在！")
-            
-            if code_obj.times_used >= code_obj.max_uses:
-                raise HTTPException(status_code=400, detail="仙缘信物已被使用！")
-
-            # 2. 保存AI生成的内容
+        async with in_transaction(PRIMARY_CONNECTION):
+            # 1. 保存AI生成的内容
+            #    兑换码的存在性与余量由第 2 步的原子扣减统一校验，失败时整个事务回滚
             content_type = request.type
             content_data = request.content
             
@@ -116,11 +110,10 @@ async def save_ai_content(
             # if not saved_item:
             #     raise Exception("保存内容失败，未能创建记录")
 
-            # 3. 在所有内容成功保存后，才消耗兑换码
+            # 2. 在所有内容成功保存后，才消耗兑换码（扣减失败会回滚已保存的内容）
             result, use_message = await crud_redemption.use_code(code_str=request.code, user_id=current_user.id)
             if not result:
-                # 理论上，由于事务的存在，这里不应该失败，但作为保险
-                raise Exception(use_message)
+                raise HTTPException(status_code=400, detail=use_message)
 
             logging.info(f"兑换码 {request.code} 已被使用，当前使用次数: {result.times_used}/{result.max_uses}")
 
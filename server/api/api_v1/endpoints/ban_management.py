@@ -1,10 +1,14 @@
 from fastapi import APIRouter, HTTPException, Depends, Query
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
+from tortoise.transactions import in_transaction
 
 from server.schemas import schema
+from server.crud import crud_user
 from server.api.api_v1 import deps
 from server.models import AdminAccount, PlayerAccount, PlayerBanRecord, CharacterBase
+from server.database import PRIMARY_CONNECTION
+from server.utils import ban_scheduler
 
 router = APIRouter()
 
@@ -44,6 +48,7 @@ async def ban_player(
     # 更新玩家封禁状态
     player.is_banned = True
     await player.save()
+    ban_scheduler.schedule(ban_record.id, ban_record.player_id, ban_record.ban_end_time)
     
     # 将该玩家的所有角色设为非激活状态
     await CharacterBase.filter(player_id=ban_data.player_id).update(is_active=False)
@@ -74,6 +79,142 @@ async def unban_player(
     
     return {"message": f"玩家 {player.user_name} 已解封"}
 
+# 单次批量操作的玩家数量上限，以及 IN (...) 列表的分块大小
+BULK_BAN_MAX_PLAYERS = 20000
+BULK_CHUNK_SIZE = 1000
+
+
+def _chunks(ids: List[int]):
+    for i in range(0, len(ids), BULK_CHUNK_SIZE):
+        yield ids[i:i + BULK_CHUNK_SIZE]
+
+
+async def _resolve_bulk_targets(
+    player_ids: Optional[List[int]],
+    ban_filter: Optional[schema.PlayerBanFilter],
+) -> Tuple[List[int], Dict[int, bool]]:
+    """
+    解析批量操作的目标玩家
+    返回: (请求的玩家ID列表, 存在的玩家ID -> 当前是否封禁)
+    """
+    if not player_ids and not ban_filter:
+        raise HTTPException(status_code=400, detail="请提供 player_ids 或筛选条件")
+
+    found: Dict[int, bool] = {}
+    if player_ids:
+        requested = list(dict.fromkeys(player_ids))
+        if len(requested) > BULK_BAN_MAX_PLAYERS:
+            raise HTTPException(status_code=400, detail=f"单次最多处理 {BULK_BAN_MAX_PLAYERS} 名玩家")
+        for chunk in _chunks(requested):
+            rows = await PlayerAccount.filter(id__in=chunk).values("id", "is_banned")
+            found.update({row["id"]: row["is_banned"] for row in rows})
+        return requested, found
+
+    keyword = (ban_filter.user_name_contains or "").strip() or None
+    if not (keyword or ban_filter.registered_after or ban_filter.registered_before):
+        raise HTTPException(status_code=400, detail="筛选条件不能为空")
+    qs = crud_user.filter_players(
+        keyword=keyword,
+        created_after=ban_filter.registered_after,
+        created_before=ban_filter.registered_before,
+    )
+    if await qs.count() > BULK_BAN_MAX_PLAYERS:
+        raise HTTPException(status_code=400, detail=f"筛选结果超过 {BULK_BAN_MAX_PLAYERS} 名玩家，请缩小范围")
+    rows = await qs.order_by("id").values("id", "is_banned")
+    found = {row["id"]: row["is_banned"] for row in rows}
+    return list(found), found
+
+
+@router.post("/bulk_ban", response_model=schema.BulkBanResponse, tags=["封号管理"])
+async def bulk_ban_players(
+    ban_data: schema.PlayerBulkBanCreate,
+    current_admin: AdminAccount = Depends(deps.get_super_admin_user)
+):
+    """
+    批量封禁玩家账号
+
+    按 ID 列表或筛选条件（道号关键词、注册时间段）圈定玩家，
+    在同一事务内以集合 UPDATE 修改封禁状态并批量写入封号记录。
+    """
+    requested, found = await _resolve_bulk_targets(ban_data.player_ids, ban_data.filter)
+    candidates = [pid for pid in requested if pid in found and not found[pid]]
+
+    banned: List[int] = []
+    scheduled: List[Tuple[int, int]] = []
+    async with in_transaction(PRIMARY_CONNECTION):
+        last_record_id = (await PlayerBanRecord.all().order_by("-id").limit(1).values_list("id", flat=True) or [0])[0]
+        for chunk in _chunks(candidates):
+            # 在事务内锁定仍未封禁的玩家，只处理真正由本次请求改变状态的玩家；
+            # 期间被并发封禁的玩家不再重复写入封号记录
+            locked = [
+                player.id
+                for player in await PlayerAccount.filter(id__in=chunk, is_banned=False).select_for_update().only("id")
+            ]
+            if locked:
+                await PlayerAccount.filter(id__in=locked, is_banned=False).update(is_banned=True)
+                banned.extend(locked)
+        await PlayerBanRecord.bulk_create(
+            [
+                PlayerBanRecord(
+                    player_id=pid,
+                    admin_id=current_admin.id,
+                    reason=ban_data.reason,
+                    ban_end_time=ban_data.ban_end_time,
+                )
+                for pid in banned
+            ],
+            batch_size=BULK_CHUNK_SIZE,
+        )
+        if ban_data.ban_end_time:
+            # bulk_create 在部分数据库上不回填主键：按本次写入的 ID 区间与玩家查出新记录
+            for chunk in _chunks(banned):
+                scheduled.extend(
+                    await PlayerBanRecord.filter(
+                        id__gt=last_record_id, player_id__in=chunk, admin_id=current_admin.id
+                    ).values_list("id", "player_id")
+                )
+
+    for record_id, player_id in scheduled:
+        ban_scheduler.schedule(record_id, player_id, ban_data.ban_end_time)
+
+    banned_set = set(banned)
+    results = []
+    for pid in requested:
+        if pid not in found:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="not_found", message="玩家不存在"))
+        elif pid not in banned_set:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="already_banned", message="玩家已被封禁"))
+        else:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="banned", message="已封禁"))
+    return schema.BulkBanResponse(affected=len(banned), results=results)
+
+
+@router.post("/bulk_unban", response_model=schema.BulkBanResponse, tags=["封号管理"])
+async def bulk_unban_players(
+    unban_data: schema.PlayerBulkUnban,
+    current_admin: AdminAccount = Depends(deps.get_super_admin_user)
+):
+    """
+    批量解封玩家账号
+    """
+    requested, found = await _resolve_bulk_targets(unban_data.player_ids, unban_data.filter)
+    to_unban = [pid for pid in requested if found.get(pid)]
+
+    async with in_transaction(PRIMARY_CONNECTION):
+        for chunk in _chunks(to_unban):
+            await PlayerBanRecord.filter(player_id__in=chunk, is_active=True).update(is_active=False)
+            await PlayerAccount.filter(id__in=chunk).update(is_banned=False)
+
+    results = []
+    for pid in requested:
+        if pid not in found:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="not_found", message="玩家不存在"))
+        elif not found[pid]:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="not_banned", message="玩家未被封禁"))
+        else:
+            results.append(schema.BulkBanItemResult(player_id=pid, status="unbanned", message="已解封"))
+    return schema.BulkBanResponse(affected=len(to_unban), results=results)
+
 @router.get("/ban_records", response_model=List[schema.PlayerBanRecord], tags=["封号管理"])
 async def get_ban_records(
     player_id: Optional[int] = Query(None, description="玩家ID，为空则获取所有记录"),
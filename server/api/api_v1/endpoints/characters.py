@@ -5,6 +5,8 @@ from server.schemas import schema
 # from server.crud import crud_character # 不再需要，逻辑已内联
 from server.api.api_v1 import deps
 from server.models import PlayerAccount, AdminAccount, CharacterBase, GameSave
+from server.utils.responses import FastJSONResponse
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
@@ -46,6 +48,33 @@ async def _get_character_base_by_char_id(char_id: str) -> Optional[CharacterBase
         await character.fetch_related('game_save')
     return character
 
+def _profile_content(character: CharacterBase) -> Dict[str, Any]:
+    """
+    组装角色档案响应（字段与顺序同 schema.CharacterProfileResponse）
+    存档写入时已经校验过，这里不再逐层校验数 MB 的 save_data / world_map，
+    只有体积很小的 base_info 仍按模型过滤
+    """
+    save = character.game_save
+    return {
+        "id": character.id,
+        "char_id": character.char_id,
+        "player_id": character.player_id,
+        "base_info": schema.CharacterBaseInfo.model_validate(character.base_info).model_dump(),
+        "game_save": {
+            "id": save.id,
+            "save_name": save.save_name,
+            "saved_at": save.saved_at,
+            "game_time": save.game_time,
+            "world_map": save.world_map,
+            "save_data": save.save_data,
+            "last_sync": save.last_sync,
+            "version": save.version,
+            "is_dirty": save.is_dirty,
+        },
+        "created_at": character.created_at,
+        "is_deleted": character.is_deleted,
+    }
+
 # --- API Endpoints ---
 
 @router.post("/create", response_model=schema.CharacterBase, tags=["V3 - 角色"])
@@ -86,7 +115,7 @@ async def create_character_by_admin(
         raise HTTPException(status_code=400, detail=error_msg)
     return new_char
 
-@router.get("/my", response_model=List[schema.CharacterProfileResponse], tags=["V3 - 角色"])
+@router.get("/my", response_model=List[schema.CharacterProfileResponse], tags=["V3 - 角色"], dependencies=[Depends(prefer_replica)])
 async def get_my_characters(
     current_user: PlayerAccount = Depends(deps.get_current_active_user)
 ):
@@ -96,24 +125,9 @@ async def get_my_characters(
     
     characters = await _get_character_bases_by_player(current_user.id)
     
-    response = []
-    for char in characters:
-        if not char.game_save: continue
-        
-        profile = schema.CharacterProfileResponse(
-            id=char.id,
-            char_id=char.char_id,
-            player_id=char.player_id,
-            base_info=char.base_info,
-            game_save=char.game_save,
-            created_at=char.created_at,
-            is_deleted=char.is_deleted
-        )
-        response.append(profile)
-        
-    return response
+    return FastJSONResponse([_profile_content(char) for char in characters if char.game_save])
 
-@router.get("/{char_id}", response_model=schema.CharacterProfileResponse, tags=["V3 - 角色"])
+@router.get("/{char_id}", response_model=schema.CharacterProfileResponse, tags=["V3 - 角色"], dependencies=[Depends(prefer_replica)])
 async def get_character(
     char_id: str,
     current_user: PlayerAccount = Depends(deps.get_current_active_user)
@@ -132,15 +146,7 @@ async def get_character(
     if not character.game_save:
         raise HTTPException(status_code=404, detail="角色存档数据丢失")
 
-    return schema.CharacterProfileResponse(
-        id=character.id,
-        char_id=character.char_id,
-        player_id=character.player_id,
-        base_info=character.base_info,
-        game_save=character.game_save,
-        created_at=character.created_at,
-        is_deleted=character.is_deleted
-    )
+    return FastJSONResponse(_profile_content(character))
 
 @router.delete("/{char_id}", tags=["V3 - 角色"])
 async def delete_character(
@@ -0,0 +1,120 @@
+"""
+后台数据导出端点
+
+以 NDJSON / CSV 流式导出玩家、角色、存档与封号记录，
+按主键分批读取数据库，导出百万行数据也不会占满进程内存。
+"""
+from datetime import datetime
+from typing import Optional, Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from tortoise.queryset import QuerySet
+
+from server.api.api_v1 import deps
+from server.models import AdminAccount, PlayerAccount, CharacterBase, GameSave, PlayerBanRecord
+from server.utils.export import DEFAULT_CHUNK_SIZE, EXPORT_FORMATS, MEDIA_TYPES, stream_export
+
+router = APIRouter()
+
+PLAYER_FIELDS = ("id", "user_name", "created_at", "is_banned")
+CHARACTER_FIELDS = ("id", "char_id", "player_id", "game_save_id", "base_info", "is_deleted", "created_at")
+SAVE_FIELDS = ("id", "save_name", "saved_at", "game_time", "last_sync", "version", "is_dirty", "world_map", "save_data")
+SAVE_SUMMARY_FIELDS = ("id", "save_name", "saved_at", "game_time", "last_sync", "version", "is_dirty")
+BAN_RECORD_FIELDS = ("id", "player_id", "admin_id", "reason", "ban_start_time", "ban_end_time", "is_active")
+
+
+def _check_format(fmt: str) -> str:
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"不支持的导出格式: {fmt}")
+    return fmt
+
+
+def _date_range(qs: QuerySet, field: str, start: Optional[datetime], end: Optional[datetime]) -> QuerySet:
+    if start:
+        qs = qs.filter(**{f"{field}__gte": start})
+    if end:
+        qs = qs.filter(**{f"{field}__lt": end})
+    return qs
+
+
+def _respond(
+    qs: QuerySet,
+    fields: Sequence[str],
+    fmt: str,
+    name: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> StreamingResponse:
+    ext = "csv" if fmt == "csv" else "ndjson"
+    filename = f"{name}_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.{ext}"
+    return StreamingResponse(
+        stream_export(qs, fields, fmt, chunk_size=chunk_size),
+        media_type=MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/players", tags=["数据导出"])
+async def export_players(
+    fmt: str = Query("ndjson", alias="format", description="ndjson 或 csv"),
+    created_after: Optional[datetime] = Query(None, description="注册时间下限"),
+    created_before: Optional[datetime] = Query(None, description="注册时间上限"),
+    is_banned: Optional[bool] = Query(None, description="按封禁状态筛选"),
+    current_admin: AdminAccount = Depends(deps.get_admin_or_super_admin),
+):
+    """流式导出玩家账号（不含密码哈希）"""
+    qs = _date_range(PlayerAccount.all(), "created_at", created_after, created_before)
+    if is_banned is not None:
+        qs = qs.filter(is_banned=is_banned)
+    return _respond(qs, PLAYER_FIELDS, _check_format(fmt), "players")
+
+
+@router.get("/characters", tags=["数据导出"])
+async def export_characters(
+    fmt: str = Query("ndjson", alias="format", description="ndjson 或 csv"),
+    created_after: Optional[datetime] = Query(None, description="创建时间下限"),
+    created_before: Optional[datetime] = Query(None, description="创建时间上限"),
+    is_deleted: Optional[bool] = Query(None, description="按删除状态筛选"),
+    player_id: Optional[int] = Query(None, description="只导出指定玩家的角色"),
+    current_admin: AdminAccount = Depends(deps.get_admin_or_super_admin),
+):
+    """流式导出角色基础信息"""
+    qs = _date_range(CharacterBase.all(), "created_at", created_after, created_before)
+    if is_deleted is not None:
+        qs = qs.filter(is_deleted=is_deleted)
+    if player_id is not None:
+        qs = qs.filter(player_id=player_id)
+    return _respond(qs, CHARACTER_FIELDS, _check_format(fmt), "characters")
+
+
+@router.get("/saves", tags=["数据导出"])
+async def export_saves(
+    fmt: str = Query("ndjson", alias="format", description="ndjson 或 csv"),
+    saved_after: Optional[datetime] = Query(None, description="保存时间下限"),
+    saved_before: Optional[datetime] = Query(None, description="保存时间上限"),
+    include_data: bool = Query(True, description="是否包含 save_data / world_map 原始数据"),
+    chunk_size: int = Query(100, ge=1, le=1000, description="每批读取的存档数"),
+    current_admin: AdminAccount = Depends(deps.get_super_admin_user),
+):
+    """流式导出云端存档（仅超级管理员，存档体积大，默认小批量读取）"""
+    qs = _date_range(GameSave.all(), "saved_at", saved_after, saved_before)
+    fields = SAVE_FIELDS if include_data else SAVE_SUMMARY_FIELDS
+    return _respond(qs, fields, _check_format(fmt), "saves", chunk_size=chunk_size)
+
+
+@router.get("/ban_records", tags=["数据导出"])
+async def export_ban_records(
+    fmt: str = Query("ndjson", alias="format", description="ndjson 或 csv"),
+    start_after: Optional[datetime] = Query(None, description="封号开始时间下限"),
+    start_before: Optional[datetime] = Query(None, description="封号开始时间上限"),
+    is_active: Optional[bool] = Query(None, description="按是否生效筛选"),
+    player_id: Optional[int] = Query(None, description="只导出指定玩家的记录"),
+    current_admin: AdminAccount = Depends(deps.get_admin_or_super_admin),
+):
+    """流式导出封号记录"""
+    qs = _date_range(PlayerBanRecord.all(), "ban_start_time", start_after, start_before)
+    if is_active is not None:
+        qs = qs.filter(is_active=is_active)
+    if player_id is not None:
+        qs = qs.filter(player_id=player_id)
+    return _respond(qs, BAN_RECORD_FIELDS, _check_format(fmt), "ban_records")
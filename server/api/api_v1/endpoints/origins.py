@@ -1,14 +1,15 @@
 """出身相关的API端点 (已重构为异步)"""
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from server.schemas.schema import Origin, OriginCreate, OriginUpdate
 from server.crud import crud_origins
 from server.utils.db_retry import db_retry
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
 @router.post("/", response_model=Origin, tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@db_retry(idempotent=False)
 async def create_origin_endpoint(origin: OriginCreate):
     """创建新出身"""
     new_origin, message = await crud_origins.create_origin(origin)
@@ -16,8 +17,8 @@ async def create_origin_endpoint(origin: OriginCreate):
         raise HTTPException(status_code=409, detail=message)
     return new_origin
 
-@router.get("/", response_model=List[Origin], tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@router.get("/", response_model=List[Origin], tags=["核心规则"], dependencies=[Depends(prefer_replica)])
+@db_retry()
 async def get_origins_endpoint():
     """获取所有出身"""
     return await crud_origins.get_origins()
@@ -2,13 +2,18 @@
 兑换码（仙缘信物） API 端点
 用于联机模式中世界背景和灵根出身的兑换码验证
 """
+import csv
+import io
+from datetime import datetime
 from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Any, Dict
 
 from server.api.api_v1 import deps
 from server.crud import crud_redemption
 from server.models import PlayerAccount, AdminAccount
 from server.schemas import schema
+from server.utils import code_filter
 
 router = APIRouter()
 
@@ -44,7 +49,7 @@ async def redeem_code_for_creation_data(
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=message)
 
     # 成功消耗后，提取数据
-    creation_data = await crud_redemption.get_creation_data_by_code(code)
+    creation_data = await crud_redemption.get_creation_data_for_code(code_obj)
     if not creation_data:
         # This case should be rare if the payload was validated on creation
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="未找到兑换码对应的有效创建数据")
@@ -89,6 +94,59 @@ async def create_redemption_code(
     
     return new_code
 
+@router.post("/admin/codes/batch", tags=["兑换码管理"])
+async def create_redemption_codes_batch(
+    request: schema.RedemptionCodeBatchCreate,
+    current_admin: AdminAccount = Depends(deps.get_current_active_admin_user)
+):
+    """
+    管理员批量创建兑换码，以 CSV 形式返回生成的兑换码
+    """
+    alphabet = request.alphabet or crud_redemption.CODE_ALPHABET
+    if any(not (ch.isascii() and (ch.isalnum() or ch in "-_")) for ch in alphabet + request.prefix):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="兑换码只能包含字母、数字、- 和 _")
+    if len(request.prefix) + request.length > 50:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="兑换码总长度不能超过 50")
+
+    codes, message = await crud_redemption.create_codes_bulk(
+        code_type=request.type,
+        count=request.count,
+        payload=request.payload,
+        max_uses=request.max_uses,
+        length=request.length,
+        alphabet=alphabet,
+        prefix=request.prefix,
+        admin_id=current_admin.id,
+    )
+    if not codes:
+        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=message)
+
+    # 同批兑换码除 code 外各列相同，预先拼好行尾
+    buf = io.StringIO()
+    csv.writer(buf).writerow(["", request.type, request.max_uses])
+    suffix = buf.getvalue()
+
+    def _rows():
+        yield "\ufeffcode,type,max_uses\r\n"
+        for i in range(0, len(codes), 5000):
+            yield "".join(code + suffix for code in codes[i:i + 5000])
+
+    filename = f"redemption_codes_{datetime.utcnow().strftime('%Y%m%d%H%M%S')}.csv"
+    return StreamingResponse(
+        _rows(),
+        media_type="text/csv; charset=utf-8",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+@router.get("/admin/filter-stats", tags=["兑换码管理"])
+async def get_redemption_filter_stats(
+    current_admin: AdminAccount = Depends(deps.get_current_active_admin_user)
+):
+    """
+    查看兑换码过滤器的命中统计（rejected 即为节省的数据库查询次数）
+    """
+    return code_filter.stats()
+
 @router.get("/admin/codes/{code_id}", response_model=schema.RedemptionCode, tags=["兑换码管理"])
 async def get_redemption_code(
     code_id: int,
@@ -102,6 +160,18 @@ async def get_redemption_code(
         raise HTTPException(status_code=404, detail="兑换码不存在")
     return code_obj
 
+@router.get("/admin/codes/{code_id}/uses", response_model=List[schema.RedemptionCodeUse], tags=["兑换码管理"])
+async def list_redemption_code_uses(
+    code_id: int,
+    skip: int = 0,
+    limit: int = 50,
+    current_admin: AdminAccount = Depends(deps.get_current_active_admin_user)
+):
+    """
+    查看兑换码的使用流水
+    """
+    return await crud_redemption.get_code_uses(code_id, skip=skip, limit=limit)
+
 @router.put("/admin/codes/{code_id}", response_model=schema.RedemptionCode, tags=["兑换码管理"])
 async def update_redemption_code(
     code_id: int,
@@ -118,12 +188,15 @@ async def update_redemption_code(
     # 更新允许的字段
     if "code" in updates:
         code_obj.code = updates["code"]
+        code_filter.add(code_obj.code)
     if "type" in updates:
         code_obj.type = updates["type"]
     if "max_uses" in updates:
         code_obj.max_uses = updates["max_uses"]
     
     await code_obj.save()
+    if "code" in updates:
+        await code_filter.publish()
     return code_obj
 
 @router.delete("/admin/codes/{code_id}", tags=["兑换码管理"])
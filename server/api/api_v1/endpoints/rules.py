@@ -1,11 +1,19 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+import hashlib
+
+from fastapi import APIRouter, HTTPException, Request, Response
+from typing import List, Dict, Any, Optional, Tuple
 
 from server.crud import crud_rule
 from server.schemas import schema
+from server.core.character_calculation import get_attribute_table
+from server.utils.compression import precompressed_response
+from server.utils.responses import dumps
 
 router = APIRouter()
 
+# 属性总表的序列化结果缓存：(总表对象, 响应体, ETag)
+_attribute_payload: Optional[Tuple[Dict[str, Any], bytes, str]] = None
+
 # 注意：origins 和 talents 的CRUD操作已移至独立的端点文件
 # /origins/ 和 /talents/ 提供完整的CRUD功能
 # 这里只保留 spirit-roots 和 settings 端点以避免重复
@@ -16,4 +24,25 @@ async def get_settings_api():
     """
     获取所有核心设定
     """
-    return await crud_rule.get_core_settings()
\ No newline at end of file
+    return await crud_rule.get_core_settings()
+
+
+@router.get("/attributes", tags=["核心规则"])
+async def get_attributes_api(request: Request):
+    """
+    获取先天六司属性总表（每个取值的描述与衍生属性）
+    总表很小且很少变化，带 ETag 供客户端整表缓存
+    """
+    global _attribute_payload
+    table = get_attribute_table()
+    if _attribute_payload is None or _attribute_payload[0] is not table:
+        body = dumps(table)
+        etag = '"' + hashlib.blake2b(body, digest_size=8).hexdigest() + '"'
+        _attribute_payload = (table, body, etag)
+    _, body, etag = _attribute_payload
+
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=300"}
+    # 压缩后的响应带的是弱 ETag，客户端回传时可能带 W/ 前缀
+    if request.headers.get("if-none-match", "").removeprefix("W/") == etag:
+        return Response(status_code=304, headers=headers)
+    return await precompressed_response(request, "rules:attributes:" + etag, body, headers=headers)
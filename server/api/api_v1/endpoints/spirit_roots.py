@@ -1,10 +1,11 @@
 """灵根相关的API端点"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 
 from server.schemas import schema
 from server.utils.db_retry import db_retry
 from server.crud import crud_spirit_roots
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
@@ -16,14 +17,14 @@ async def create_spirit_root_endpoint(spirit_root: schema.SpiritRootCreate):
         raise HTTPException(status_code=409, detail=message)
     return new_spirit_root
 
-@router.get("/", response_model=List[schema.SpiritRoot], tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@router.get("/", response_model=List[schema.SpiritRoot], tags=["核心规则"], dependencies=[Depends(prefer_replica)])
+@db_retry()
 async def get_spirit_roots_endpoint():
     """获取所有核心灵根"""
     return await crud_spirit_roots.get_spirit_roots()
 
 @router.get("/{spirit_root_id}", response_model=schema.SpiritRoot, tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@db_retry()
 async def get_spirit_root_endpoint(spirit_root_id: int):
     """根据ID获取核心灵根"""
     spirit_root = await crud_spirit_roots.get_spirit_root(spirit_root_id)
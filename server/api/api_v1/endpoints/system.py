@@ -1,5 +1,8 @@
-from fastapi import APIRouter, Depends, HTTPException
-from typing import Any
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+from starlette.concurrency import run_in_threadpool
+from typing import Any, Literal
+import time
 from server.schemas.schema import (
     SystemConfigUpdate,
     SystemConfig,
@@ -7,9 +10,13 @@ from server.schemas.schema import (
     EmailConfigUpdate,
     RateLimitConfigUpdate,
     AllSecurityConfigResponse,
+    AttributeFormula,
+    AttributeFormulasResponse,
 )
 from server.crud import crud_system_config
 from server.api.api_v1 import deps
+from server.core import attribute_formulas
+from server.utils import profiler
 from server.utils.system_config import (
     get_all_configs,
     get_turnstile_config,
@@ -279,3 +286,87 @@ async def test_smtp_connection():
         results["error"] = f"SMTP连接失败: {type(e).__name__}"
 
     return results
+
+
+# ========== 衍生属性公式 ==========
+
+
+@router.get(
+    "/admin/attribute-formulas",
+    summary="获取衍生属性公式",
+    dependencies=[Depends(deps.get_super_admin_user)],
+    response_model=AttributeFormulasResponse
+)
+async def get_attribute_formulas():
+    """
+    获取当前生效的衍生属性公式（已合并默认值）以及数据库中保存的覆盖项。
+    需要超级管理员权限。
+    """
+    overrides = await crud_system_config.get_config(attribute_formulas.CONFIG_KEY)
+    return {
+        "formulas": attribute_formulas.active().definitions,
+        "overrides": overrides if isinstance(overrides, dict) else {},
+    }
+
+
+@router.put(
+    "/admin/attribute-formulas",
+    summary="更新衍生属性公式",
+    dependencies=[Depends(deps.get_super_admin_user)],
+    response_model=AttributeFormulasResponse
+)
+async def update_attribute_formulas(formulas_in: dict[str, AttributeFormula]):
+    """
+    覆盖衍生属性公式并立即热更新，未给出的字段和参数沿用默认值。
+    传入空对象即恢复默认公式。
+    需要超级管理员权限。
+    """
+    overrides = {
+        field: formula.model_dump(exclude_none=True)
+        for field, formula in formulas_in.items()
+    }
+    try:
+        compiled = await attribute_formulas.save(overrides)
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc))
+    return {"formulas": compiled.definitions, "overrides": overrides}
+
+
+# ========== 性能剖析 ==========
+
+
+@router.get(
+    "/admin/profile",
+    summary="采样剖析当前进程",
+    dependencies=[Depends(deps.get_super_admin_user)],
+)
+async def profile_worker(
+    request: Request,
+    seconds: float = Query(10, gt=0, le=profiler.MAX_SECONDS, description="采样时长（秒）"),
+    interval_ms: float = Query(5, ge=1, le=1000, description="采样间隔（毫秒）"),
+    include_idle: bool = Query(False, description="是否保留空闲线程的样本"),
+    format: Literal["collapsed", "json"] = Query("collapsed", description="collapsed 为火焰图文件，json 附带按路由汇总"),
+):
+    """
+    在当前 worker 进程内采样 seconds 秒，返回 collapsed stack 格式的火焰图数据，
+    可直接交给 flamegraph.pl 或 speedscope。路由处理函数的样本以 "route:<路由>" 为根帧。
+    多 worker 部署时只剖析处理本请求的那个进程。
+    需要超级管理员权限。
+    """
+    try:
+        stacks, summary = await run_in_threadpool(
+            profiler.profile, request.app, seconds, interval_ms / 1000, include_idle
+        )
+    except profiler.ProfilerBusyError as exc:
+        raise HTTPException(status_code=409, detail=str(exc))
+
+    if format == "json":
+        return {"summary": summary, "collapsed": stacks}
+    filename = f"profile-{int(time.time())}.collapsed"
+    return PlainTextResponse(
+        stacks,
+        headers={
+            "Content-Disposition": f'attachment; filename="{filename}"',
+            "X-Profile-Samples": str(summary["samples"]),
+        },
+    )
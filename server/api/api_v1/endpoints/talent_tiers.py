@@ -5,11 +5,12 @@ from server.models import TalentTier, AdminAccount
 from server.schemas import schema
 from server.api.api_v1 import deps
 from server.utils.db_retry import db_retry
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schema.TalentTier])
-@db_retry(max_retries=3, delay=1.0)
+@router.get("/", response_model=List[schema.TalentTier], dependencies=[Depends(prefer_replica)])
+@db_retry()
 async def get_talent_tiers():
     """
     获取所有天资等级
@@ -18,7 +19,7 @@ async def get_talent_tiers():
     return talent_tiers
 
 @router.get("/{tier_id}", response_model=schema.TalentTier)
-@db_retry(max_retries=3, delay=1.0)
+@db_retry()
 async def get_talent_tier(tier_id: int):
     """
     根据ID获取天资等级
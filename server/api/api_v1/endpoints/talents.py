@@ -7,6 +7,7 @@ from server.utils.db_retry import db_retry
 from server.crud import crud_talents
 from server.api.api_v1 import deps
 from server.models import AdminAccount
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
@@ -21,14 +22,14 @@ async def create_talent_endpoint(
         raise HTTPException(status_code=409, detail=message)
     return new_talent
 
-@router.get("/", response_model=List[schema.Talent], tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@router.get("/", response_model=List[schema.Talent], tags=["核心规则"], dependencies=[Depends(prefer_replica)])
+@db_retry()
 async def get_talents_endpoint():
     """获取所有核心天赋"""
     return await crud_talents.get_talents()
 
 @router.get("/{talent_id}", response_model=schema.Talent, tags=["核心规则"])
-@db_retry(max_retries=3, delay=1.0)
+@db_retry()
 async def get_talent_endpoint(talent_id: int):
     """根据ID获取核心天赋"""
     talent = await crud_talents.get_talent(talent_id)
@@ -1,34 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from typing import List, Optional
 from server.schemas import schema
 from server.crud import crud_user
 from server.api.api_v1 import deps
-from server.models import AdminAccount, CharacterBase
+from server.models import AdminAccount
 
 router = APIRouter()
 
 
 @router.get('/', response_model=List[dict], tags=["用户管理"])
-async def get_all_users(current_admin: AdminAccount = Depends(deps.get_admin_or_super_admin)):
+async def get_all_users(
+    response: Response,
+    skip: int = Query(0, ge=0, description="偏移量"),
+    limit: int = Query(100, ge=1, le=500, description="返回数量上限"),
+    q: Optional[str] = Query(None, description="按道号模糊搜索"),
+    is_banned: Optional[bool] = Query(None, description="按封禁状态筛选"),
+    created_after: Optional[datetime] = Query(None, description="注册时间下限"),
+    created_before: Optional[datetime] = Query(None, description="注册时间上限"),
+    current_admin: AdminAccount = Depends(deps.get_admin_or_super_admin)
+):
     """
-    获取所有用户列表（管理员权限）
+    获取用户列表（管理员权限）
+
+    分页返回，总数通过 `X-Total-Count` 响应头给出。
     """
-    players = await crud_user.get_all_players()
-    result = []
-    for player in players:
-        # 计算角色数量
-        character_count = await CharacterBase.filter(player_id=player.id, is_deleted=False).count()
-        
-        player_data = {
+    keyword = q.strip() if q else None
+    players, total = await crud_user.get_players_page(
+        skip=skip,
+        limit=limit,
+        keyword=keyword,
+        is_banned=is_banned,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    # 一次分组聚合统计当前页的角色数量
+    character_counts = await crud_user.count_characters_by_player([p.id for p in players])
+
+    response.headers["X-Total-Count"] = str(total)
+    return [
+        {
             "id": player.id,
             "user_name": player.user_name,
             "created_at": player.created_at,
             "is_banned": player.is_banned,
-            "character_count": character_count
+            "character_count": character_counts.get(player.id, 0)
         }
-        result.append(player_data)
-    
-    return result
+        for player in players
+    ]
 
 @router.get("/me", response_model=schema.PlayerAccount, tags=["用户"])
 async def read_users_me(current_user: schema.PlayerAccount = Depends(deps.get_current_active_user)):
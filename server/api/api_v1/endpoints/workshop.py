@@ -1,4 +1,6 @@
 import json
+from datetime import datetime, timedelta
+from itertools import islice
 from typing import Optional, List
 
 from fastapi import APIRouter, Depends, HTTPException, Query
@@ -7,10 +9,17 @@ from tortoise.expressions import Q
 from server.api.api_v1 import deps
 from server.models import WorkshopItem, PlayerAccount
 from server.schemas import schema
+from server.utils.responses import FastJSONResponse
+from server.utils import workshop_ranking
+from server.utils.workshop_ranking import ranking
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
 ALLOWED_ITEM_TYPES = {"settings", "prompts", "saves", "start_config"}
+ALLOWED_SORTS = {"latest", "hot", "week"}
+# 关键词热门列表每次向数据库核对的排行条目数
+KEYWORD_SCAN_CHUNK = 500
 
 
 def _normalize_tags(tags: List[str]) -> List[str]:
@@ -52,38 +61,80 @@ def _to_out(item: WorkshopItem, author_name: str) -> schema.WorkshopItemOut:
     )
 
 
-@router.get("/items", response_model=schema.WorkshopItemsResponse, tags=["创意工坊"])
+async def _ranked_matches(qs, item_type: Optional[str], week_only: bool, offset: int, limit: int) -> List[int]:
+    """按排行顺序分块遍历条目ID，取命中 qs 条件的第 offset 起 limit 个"""
+    ids: List[int] = []
+    ranked = ranking.iter_ids(item_type, week_only=week_only)
+    while len(ids) < limit:
+        chunk = list(islice(ranked, KEYWORD_SCAN_CHUNK))
+        if not chunk:
+            break
+        matched = set(await qs.filter(id__in=chunk).values_list("id", flat=True))
+        for item_id in chunk:
+            if item_id not in matched:
+                continue
+            if offset:
+                offset -= 1
+                continue
+            ids.append(item_id)
+            if len(ids) >= limit:
+                break
+    return ids
+
+
+@router.get("/items", response_model=schema.WorkshopItemsResponse, tags=["创意工坊"], dependencies=[Depends(prefer_replica)])
 async def list_workshop_items(
     item_type: Optional[str] = Query(default=None, alias="type"),
     q: Optional[str] = Query(default=None, description="搜索标题/作者/说明"),
     page: int = Query(default=1, ge=1),
     page_size: int = Query(default=20, ge=1, le=50),
+    sort: str = Query(default="latest", description="排序：latest 最新 / hot 热门 / week 本周热门"),
 ):
-    qs = WorkshopItem.filter(is_deleted=False, is_public=True).prefetch_related("author")
+    if sort not in ALLOWED_SORTS:
+        raise HTTPException(status_code=400, detail=f"不支持的排序方式: {sort}")
+
+    qs = WorkshopItem.filter(is_deleted=False, is_public=True)
 
     if item_type:
         if item_type not in ALLOWED_ITEM_TYPES:
             raise HTTPException(status_code=400, detail=f"不支持的内容类型: {item_type}")
         qs = qs.filter(type=item_type)
 
-    if q:
-        keyword = q.strip()
-        if keyword:
-            qs = qs.filter(
-                Q(title__icontains=keyword)
-                | Q(description__icontains=keyword)
-                | Q(author__user_name__icontains=keyword)
-            )
-
-    total = await qs.count()
+    keyword = q.strip() if q else ""
     offset = (page - 1) * page_size
-    rows = await qs.order_by("-created_at").offset(offset).limit(page_size)
+
+    if keyword:
+        qs = qs.filter(
+            Q(title__icontains=keyword)
+            | Q(description__icontains=keyword)
+            | Q(author__user_name__icontains=keyword)
+        )
+
+    if sort == "latest":
+        total = await qs.count()
+        rows = await qs.order_by("-created_at").offset(offset).limit(page_size).prefetch_related("author")
+    else:
+        # 热门排序从内存排行取顺序，避免整表 ORDER BY
+        await workshop_ranking.ensure_ready()
+        if keyword:
+            if sort == "week":
+                qs = qs.filter(created_at__gte=datetime.utcnow() - timedelta(days=7))
+            total = await qs.count()
+            ids = await _ranked_matches(qs, item_type, sort == "week", offset, page_size)
+        else:
+            ids, total = ranking.page(item_type, offset, page_size, week_only=sort == "week")
+        found = {row.id: row for row in await qs.filter(id__in=ids).prefetch_related("author")} if ids else {}
+        # 已被删除或下架（可能发生在其他 worker 上）的条目立即移出排行
+        if not keyword:
+            for missing in set(ids) - found.keys():
+                ranking.discard(missing)
+        rows = [found[i] for i in ids if i in found]
 
     items = [_to_out(row, row.author.user_name if row.author else "未知") for row in rows]
     return schema.WorkshopItemsResponse(items=items, total=total, page=page, page_size=page_size)
 
 
-@router.get("/my-items", response_model=schema.WorkshopItemsResponse, tags=["创意工坊"])
+@router.get("/my-items", response_model=schema.WorkshopItemsResponse, tags=["创意工坊"], dependencies=[Depends(prefer_replica)])
 async def list_my_workshop_items(
     item_type: Optional[str] = Query(default=None, alias="type"),
     q: Optional[str] = Query(default=None, description="搜索标题/作者/说明"),
@@ -115,7 +166,7 @@ async def list_my_workshop_items(
     return schema.WorkshopItemsResponse(items=items, total=total, page=page, page_size=page_size)
 
 
-@router.get("/items/{item_id}", response_model=schema.WorkshopItemOut, tags=["创意工坊"])
+@router.get("/items/{item_id}", response_model=schema.WorkshopItemOut, tags=["创意工坊"], dependencies=[Depends(prefer_replica)])
 async def get_workshop_item(item_id: int):
     item = await WorkshopItem.get_or_none(id=item_id, is_deleted=False, is_public=True).prefetch_related("author")
     if not item:
@@ -187,6 +238,7 @@ async def create_workshop_item(
         is_deleted=False,
     )
     await item.fetch_related("author")
+    ranking.upsert_item(item)
     return _to_out(item, current_user.user_name)
 
 
@@ -198,11 +250,13 @@ async def download_workshop_item(item_id: int):
 
     item.downloads += 1
     await item.save()
+    ranking.upsert_item(item)
 
-    return schema.WorkshopItemDownloadResponse(
-        item=_to_out(item, item.author.user_name if item.author else "未知"),
-        payload=item.payload,
-    )
+    # payload 可达数 MB，上传时已校验，直接序列化不再经过 response_model
+    return FastJSONResponse({
+        "item": _to_out(item, item.author.user_name if item.author else "未知").model_dump(),
+        "payload": item.payload,
+    })
 
 
 @router.delete("/items/{item_id}", tags=["创意工坊"])
@@ -217,4 +271,5 @@ async def delete_workshop_item(
         raise HTTPException(status_code=403, detail="无权删除此内容")
 
     await item.delete()
+    ranking.discard(item_id)
     return {"message": "已删除（彻底移除）"}
@@ -1,14 +1,15 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 from typing import List
 
 from server.schemas import schema
 from server.crud import crud_world
 from server.utils.db_retry import db_retry
+from server.utils.db_routing import prefer_replica
 
 router = APIRouter()
 
-@router.get("/", response_model=List[schema.World], tags=["世界体系"])
-@db_retry(max_retries=3, delay=1.0)
+@router.get("/", response_model=List[schema.World], tags=["世界体系"], dependencies=[Depends(prefer_replica)])
+@db_retry()
 async def list_worlds():
     """
     获取所有已创建的世界列表。
@@ -0,0 +1,205 @@
+"""
+热点函数微基准
+
+覆盖占用 CPU 最多的辅助函数：密码校验与令牌签发/解析、工坊标签归一化与输出模型构造、
+系统配置值的编码/解码、核心属性计算，以及不同数据量下的 Pydantic 校验
+（CharacterProfileResponse、WorkshopItemCreate）。
+
+测量方式参照 pyperf：先自动标定每轮循环次数（单轮耗时不少于 --min-time），
+预热若干轮后重复 --runs 轮，输出每次调用耗时的均值 ± 标准差、中位数、最小值与变异系数。
+--output 保存 JSON 结果，--compare 与之前保存的结果对比，差异超过两倍合并标准差才视为显著。
+
+用法：
+    python -m server.benchmarks.micro
+    python -m server.benchmarks.micro --filter token --runs 20 --output before.json
+    python -m server.benchmarks.micro --compare before.json
+"""
+
+import argparse
+import json
+import math
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from server.api.api_v1.endpoints.characters import _profile_content
+from server.api.api_v1.endpoints.workshop import _normalize_tags, _to_out
+from server.benchmarks.serialization import make_character, make_save_data
+from server.core import security
+from server.core.character_calculation import calculate_core_attributes
+from server.schemas import schema
+from server.utils.responses import dumps
+from server.utils.system_config import _decode_config_value, _encode_config_value
+
+Benchmark = Tuple[str, Callable[[], Any]]
+
+
+def _time_loops(fn: Callable[[], Any], loops: int) -> float:
+    started = time.perf_counter()
+    for _ in range(loops):
+        fn()
+    return time.perf_counter() - started
+
+
+def measure(fn: Callable[[], Any], runs: int, warmups: int, min_time: float) -> Dict[str, Any]:
+    """返回每次调用耗时（秒）的统计"""
+    loops = 1
+    while True:
+        elapsed = _time_loops(fn, loops)
+        if elapsed >= min_time or loops >= 1 << 24:
+            break
+        # 按已测耗时估算，最多放大 10 倍，避免一次跑得过久
+        loops *= max(2, min(10, int(min_time / max(elapsed, 1e-9)) + 1))
+    for _ in range(warmups):
+        _time_loops(fn, loops)
+    values = [_time_loops(fn, loops) / loops for _ in range(runs)]
+    mean = statistics.fmean(values)
+    stdev = statistics.stdev(values) if len(values) > 1 else 0.0
+    return {
+        "loops": loops,
+        "runs": runs,
+        "mean": mean,
+        "stdev": stdev,
+        "median": statistics.median(values),
+        "min": min(values),
+        "max": max(values),
+        "cv": stdev / mean if mean else 0.0,
+    }
+
+
+def format_seconds(value: float) -> str:
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if value >= scale:
+            return f"{value / scale:.2f} {unit}"
+    return f"{value / 1e-9:.0f} ns"
+
+
+def _workshop_item() -> SimpleNamespace:
+    now = datetime.now(timezone.utc)
+    return SimpleNamespace(
+        id=1, type="saves", title="筑基期速通存档", description="从炼气到筑基的完整流程" * 10,
+        tags=["速通", "剑修", "新手向", "筑基"], game_version="3.0.0", data_version="1",
+        author_id=1, downloads=1234, likes=56, is_public=True, created_at=now, updated_at=now,
+    )
+
+
+def _workshop_create_payload(size_mb: float) -> Dict[str, Any]:
+    return {
+        "type": "saves",
+        "title": "筑基期速通存档",
+        "description": "从炼气到筑基的完整流程",
+        "tags": ["速通", "剑修", "新手向"],
+        "game_version": "3.0.0",
+        "payload": {"type": "saves", "saves": [make_save_data(size_mb)]},
+    }
+
+
+def build_benchmarks(sizes: Sequence[float]) -> List[Benchmark]:
+    password_hash = security.get_password_hash("correct horse battery staple")
+    token = security.create_access_token({"sub": "测试道友"})
+    tags_small = ["  剑修 ", "速通", "剑修", "", "新手向" * 10, "丹修", 42, "体修", "速通"]
+    tags_large = [f"标签{i % 40}" for i in range(200)]
+    item = _workshop_item()
+    scalar, nested = 3600, {"enabled": True, "window": 3600, "hosts": ["a", "b"]}
+    encoded_scalar, encoded_nested = _encode_config_value(scalar), _encode_config_value(nested)
+
+    benchmarks: List[Benchmark] = [
+        ("security.verify_password", lambda: security.verify_password("correct horse battery staple", password_hash)),
+        ("security.create_access_token", lambda: security.create_access_token({"sub": "测试道友"})),
+        ("security.decode_access_token", lambda: security.decode_access_token(token)),
+        ("workshop._normalize_tags[9]", lambda: _normalize_tags(tags_small)),
+        ("workshop._normalize_tags[200]", lambda: _normalize_tags(tags_large)),
+        ("workshop._to_out", lambda: _to_out(item, "测试道友")),
+        ("system_config._encode_config_value[scalar]", lambda: _encode_config_value(scalar)),
+        ("system_config._encode_config_value[dict]", lambda: _encode_config_value(nested)),
+        ("system_config._decode_config_value[scalar]", lambda: _decode_config_value(encoded_scalar)),
+        ("system_config._decode_config_value[dict]", lambda: _decode_config_value(encoded_nested)),
+        ("calculate_core_attributes", lambda: calculate_core_attributes(5, 6, 7, 3, 4, 5)),
+    ]
+
+    # 字典校验对应服务端构造模型，JSON 校验对应请求体解析（含 JSON 解码）
+    for size in sizes:
+        profile = _profile_content(make_character(make_save_data(size)))
+        profile_json = dumps(profile)
+        create = _workshop_create_payload(size)
+        create_json = dumps(create)
+        benchmarks.extend([
+            (
+                f"CharacterProfileResponse.model_validate[{size}MB]",
+                lambda profile=profile: schema.CharacterProfileResponse.model_validate(profile),
+            ),
+            (
+                f"CharacterProfileResponse.model_validate_json[{size}MB]",
+                lambda raw=profile_json: schema.CharacterProfileResponse.model_validate_json(raw),
+            ),
+            (
+                f"WorkshopItemCreate.model_validate[{size}MB]",
+                lambda create=create: schema.WorkshopItemCreate.model_validate(create),
+            ),
+            (
+                f"WorkshopItemCreate.model_validate_json[{size}MB]",
+                lambda raw=create_json: schema.WorkshopItemCreate.model_validate_json(raw),
+            ),
+        ])
+    return benchmarks
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """与基线对比：ratio < 1 表示变快"""
+    table: Dict[str, Dict[str, Any]] = {}
+    for name, current in results.items():
+        old = baseline.get(name)
+        if not old:
+            continue
+        ratio = current["mean"] / old["mean"] if old["mean"] else math.inf
+        noise = 2 * math.sqrt(current["stdev"] ** 2 + old["stdev"] ** 2)
+        table[name] = {
+            "baseline_mean": old["mean"],
+            "mean": current["mean"],
+            "ratio": round(ratio, 3),
+            "significant": abs(current["mean"] - old["mean"]) > noise,
+        }
+    return table
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="热点函数微基准")
+    parser.add_argument("--runs", type=int, default=10, help="重复轮数")
+    parser.add_argument("--warmups", type=int, default=1, help="预热轮数")
+    parser.add_argument("--min-time", type=float, default=0.1, help="单轮最短耗时（秒）")
+    parser.add_argument("--sizes", default="0.01,0.1,1", help="Pydantic 校验的数据量（MB），逗号分隔")
+    parser.add_argument("--filter", default=None, help="只运行名称包含该子串的基准")
+    parser.add_argument("--output", default=None, help="保存 JSON 结果")
+    parser.add_argument("--compare", default=None, help="与之前保存的 JSON 结果对比")
+    args = parser.parse_args(argv)
+
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    results: Dict[str, Dict[str, Any]] = {}
+    for name, fn in build_benchmarks(sizes):
+        if args.filter and args.filter not in name:
+            continue
+        stats = measure(fn, args.runs, args.warmups, args.min_time)
+        results[name] = stats
+        print(
+            f"{name}: {format_seconds(stats['mean'])} +- {format_seconds(stats['stdev'])}"
+            f" (median {format_seconds(stats['median'])}, min {format_seconds(stats['min'])},"
+            f" cv {stats['cv']:.1%}, {stats['runs']} x {stats['loops']} loops)"
+        )
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+        print("\n--- 与基线对比 ---")
+        for name, row in compare(results, baseline).items():
+            mark = "" if row["significant"] else "（不显著）"
+            print(f"{name}: {format_seconds(row['baseline_mean'])} -> {format_seconds(row['mean'])}, x{row['ratio']}{mark}")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"benchmarks": results}, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+存档响应序列化基准
+
+构造 1-10 MB 的仿真存档，对比角色档案响应的三种序列化方式：
+- model：构造 CharacterProfileResponse（整棵校验）后由 Pydantic 输出 JSON（原先 /characters 接口的路径）
+- stdlib：jsonable_encoder + json.dumps（未声明 response_model 的路由的默认路径）
+- fast：直接拼字典 + orjson（现在的 FastJSONResponse 路径）
+
+用法：
+    python -m server.benchmarks.serialization --sizes 1,2,5,10 --repeat 5
+"""
+
+import argparse
+import json
+import random
+import statistics
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from server.api.api_v1.endpoints.characters import _profile_content
+from server.schemas import schema
+from server.utils.responses import dumps
+
+_profile_adapter = TypeAdapter(schema.CharacterProfileResponse)
+
+
+def make_save_data(target_mb: float, seed: int = 0) -> Dict[str, Any]:
+    """生成接近 target_mb 大小的存档（背包、人物关系、事件日志等嵌套结构）"""
+    rng = random.Random(seed)
+    target = int(target_mb * 1024 * 1024)
+    data: Dict[str, Any] = {
+        "角色基础信息": {"名字": "测试道友", "境界": "筑基期", "年龄": 18},
+        "背包": {"灵石": 1000, "物品": {}},
+        "人物关系": {},
+        "记忆": {"短期记忆": [], "长期记忆": []},
+    }
+    size = 0
+    i = 0
+    while size < target:
+        item = {
+            "名称": f"灵草{i}",
+            "类型": rng.choice(["丹药", "法宝", "功法", "材料"]),
+            "品质": {"quality": rng.choice(["凡", "黄", "玄", "地", "天"]), "grade": rng.randint(1, 10)},
+            "数量": rng.randint(1, 99),
+            "描述": "采自深山灵脉之中，蕴含精纯灵气，可用于炼制丹药。" * rng.randint(1, 4),
+            "属性加成": {"气血": rng.randint(0, 50), "灵气": round(rng.random() * 10, 2)},
+        }
+        data["背包"]["物品"][f"item_{i}"] = item
+        data["记忆"]["短期记忆"].append(f"第{i}天，于坊市中偶遇一位神秘老者，得其指点。")
+        if i % 10 == 0:
+            data["人物关系"][f"npc_{i}"] = {"名字": f"路人{i}", "好感度": rng.randint(-100, 100), "记忆": ["初次相遇"]}
+        size += len(json.dumps(item, ensure_ascii=False).encode("utf-8")) + 60
+        i += 1
+    return data
+
+
+def make_character(save_data: Dict[str, Any]) -> SimpleNamespace:
+    now = datetime.now(timezone.utc)
+    game_save = SimpleNamespace(
+        id=1, save_name="自动存档", saved_at=now, game_time="仙历元年", world_map={"大陆": ["东胜神洲"]},
+        save_data=save_data, last_sync=now, version=3, is_dirty=False,
+    )
+    base_info = {
+        "名字": "测试道友", "世界": "朝天大陆", "天资": "天才", "出生": "寒门散修", "灵根": "真灵根",
+        "天赋": ["过目不忘"], "先天六司": {"根骨": 5, "灵性": 6, "悟性": 7, "气运": 3, "魅力": 4, "心性": 5},
+    }
+    return SimpleNamespace(
+        id=1, char_id="char_1", player_id=1, base_info=base_info, game_save=game_save,
+        created_at=now, is_deleted=False,
+    )
+
+
+def via_model(character: SimpleNamespace) -> bytes:
+    profile = schema.CharacterProfileResponse(
+        id=character.id, char_id=character.char_id, player_id=character.player_id,
+        base_info=character.base_info, game_save=schema.GameSave.model_validate(character.game_save),
+        created_at=character.created_at, is_deleted=character.is_deleted,
+    )
+    return _profile_adapter.dump_json(profile)
+
+
+def via_stdlib(character: SimpleNamespace) -> bytes:
+    return json.dumps(jsonable_encoder(_profile_content(character)), ensure_ascii=False).encode("utf-8")
+
+
+def via_fast(character: SimpleNamespace) -> bytes:
+    return dumps(_profile_content(character))
+
+
+def _time(fn: Callable[[SimpleNamespace], bytes], character: SimpleNamespace, repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(character)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def run(sizes: List[float], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    for size in sizes:
+        character = make_character(make_save_data(size))
+        # 新旧路径输出的 JSON 语义必须一致
+        assert json.loads(via_model(character)) == json.loads(via_fast(character))
+        row: Dict[str, Any] = {"target_mb": size, "body_bytes": len(via_fast(character))}
+        for name, fn in (("model", via_model), ("stdlib", via_stdlib), ("fast", via_fast)):
+            samples = _time(fn, character, repeat)
+            row[f"{name}_ms_median"] = round(statistics.median(samples), 2)
+            row[f"{name}_ms_min"] = round(min(samples), 2)
+        row["speedup_vs_model"] = round(row["model_ms_median"] / row["fast_ms_median"], 1)
+        results.append(row)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="存档响应序列化基准")
+    parser.add_argument("--sizes", default="1,2,5,10", help="存档大小（MB），逗号分隔")
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复次数")
+    args = parser.parse_args()
+    sizes = [float(s) for s in args.sizes.split(",") if s.strip()]
+    print(json.dumps(run(sizes, args.repeat), ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
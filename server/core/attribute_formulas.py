@@ -0,0 +1,235 @@
+"""
+衍生属性公式引擎
+
+先天六司到气血、灵气、神识、寿元等衍生属性的换算系数存放在 SystemConfig
+（键 attribute_formulas）中，后台修改后无需重新部署即可生效。
+
+每条公式都是单一来源属性的线性式：value = base + source * per_point，
+可选 round 指定保留的小数位数。公式在加载时编译：
+- 对 0-10 的整数取值预先算好每个属性值对应的全部衍生值（查表）
+- 取值域之外的值以及非整数（如浮点）值用编译好的闭包现算，结果与查表前的公式一致
+编译结果是不可变对象，通过替换模块级引用原子地热切换，
+正在进行的计算继续使用切换前的那一份。
+
+后台修改公式只会立即切换处理该请求的 worker；多进程部署下其他 worker
+由 start() 启动的后台任务每 RELOAD_INTERVAL 秒从系统配置重新加载一次。
+"""
+
+import asyncio
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+
+from server.utils.system_config import get_config, set_config
+
+logger = logging.getLogger(__name__)
+
+CONFIG_KEY = "attribute_formulas"
+# 多进程部署时各 worker 重新加载公式的间隔（秒）
+RELOAD_INTERVAL = 30
+
+INNATE_ATTRIBUTES = ("root_bone", "spirituality", "comprehension", "fortune", "charm", "temperament")
+# 先天六司取值范围，范围内的计算走查表
+ATTRIBUTE_MIN = 0
+ATTRIBUTE_MAX = 10
+
+# 默认公式，与原先写死在 calculate_core_attributes 中的系数一致
+DEFAULT_FORMULAS: Dict[str, Dict[str, Any]] = {
+    # 气血系统（基于根骨）：基础气血 80，每点根骨 +15，每点根骨增加10%恢复速度
+    "max_qi_blood": {"source": "root_bone", "base": 80, "per_point": 15},
+    "qi_blood_recovery_rate": {"source": "root_bone", "base": 1.0, "per_point": 0.1, "round": 2},
+    # 灵气系统（基于灵性）：基础灵气 60，每点灵性 +12，每点灵性增加12%恢复速度
+    "max_spiritual_power": {"source": "spirituality", "base": 60, "per_point": 12},
+    "spiritual_recovery_rate": {"source": "spirituality", "base": 1.0, "per_point": 0.12, "round": 2},
+    # 神识系统（基于悟性）：基础神识 50，每点悟性 +10，每点悟性增加8%恢复速度
+    "max_spirit_sense": {"source": "comprehension", "base": 50, "per_point": 10},
+    "spirit_recovery_rate": {"source": "comprehension", "base": 1.0, "per_point": 0.08, "round": 2},
+    # 寿元系统（基于根骨）：凡人基础寿命 60，每点根骨 +10 年
+    "max_lifespan": {"source": "root_bone", "base": 60, "per_point": 10},
+    # 其他衍生属性：气运影响奇遇概率，魅力影响社交，心性影响心魔抗性
+    "luck_factor": {"source": "fortune", "base": 0, "per_point": 1},
+    "social_bonus": {"source": "charm", "base": 0, "per_point": 1},
+    "mental_resistance": {"source": "temperament", "base": 0, "per_point": 1},
+}
+
+# 初始化时当前值等于上限：当前值字段 -> 上限字段
+CURRENT_VALUE_FIELDS = {
+    "qi_blood": "max_qi_blood",
+    "spiritual_power": "max_spiritual_power",
+    "spirit_sense": "max_spirit_sense",
+}
+
+
+def _in_table(value: Any) -> bool:
+    """是否可以查表：只有取值域内的整数才查表，其余回退到公式"""
+    return isinstance(value, int) and ATTRIBUTE_MIN <= value <= ATTRIBUTE_MAX
+
+
+def _compile_one(field: str, spec: Mapping[str, Any]) -> Tuple[str, Callable[[int], Any]]:
+    if not isinstance(spec, Mapping):
+        raise ValueError(f"公式 {field} 必须是对象")
+    source = spec.get("source")
+    if source not in INNATE_ATTRIBUTES:
+        raise ValueError(f"公式 {field} 的来源属性无效: {source}")
+    base = spec.get("base", 0)
+    per_point = spec.get("per_point", 0)
+    for name, value in (("base", base), ("per_point", per_point)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f"公式 {field} 的 {name} 必须是数字")
+    digits = spec.get("round")
+    if digits is not None and (isinstance(digits, bool) or not isinstance(digits, int) or not 0 <= digits <= 6):
+        raise ValueError(f"公式 {field} 的 round 必须是 0-6 的整数")
+
+    # 与原先手写表达式保持相同的运算顺序，确保浮点结果逐位一致
+    if digits is None:
+        def evaluate(value: int) -> Any:
+            return base + (value * per_point)
+    else:
+        def evaluate(value: int) -> Any:
+            return round(base + (value * per_point), digits)
+    return source, evaluate
+
+
+class CompiledFormulas:
+    """编译后的公式集（不可变，可在多个协程间安全共享）"""
+
+    __slots__ = ("definitions", "sources", "evaluators", "field_tables", "_by_value")
+
+    def __init__(self, definitions: Mapping[str, Mapping[str, Any]]) -> None:
+        unknown = set(definitions) - set(DEFAULT_FORMULAS)
+        if unknown:
+            raise ValueError(f"未知的衍生属性: {', '.join(sorted(unknown))}")
+        merged = {field: dict(spec) for field, spec in DEFAULT_FORMULAS.items()}
+        for field, spec in definitions.items():
+            if not isinstance(spec, Mapping):
+                raise ValueError(f"公式 {field} 必须是对象")
+            merged[field].update(spec)
+
+        sources: Dict[str, str] = {}
+        evaluators: Dict[str, Callable[[int], Any]] = {}
+        for field, spec in merged.items():
+            sources[field], evaluators[field] = _compile_one(field, spec)
+
+        domain = range(ATTRIBUTE_MIN, ATTRIBUTE_MAX + 1)
+        field_tables = {field: [evaluate(v) for v in domain] for field, evaluate in evaluators.items()}
+
+        # 按来源属性分组：_by_value[属性序号][属性值] -> 该属性值决定的全部衍生值
+        by_value: List[List[Dict[str, Any]]] = []
+        for attribute in INNATE_ATTRIBUTES:
+            fields = [f for f in merged if sources[f] == attribute]
+            by_value.append([
+                {f: field_tables[f][i] for f in fields}
+                for i in range(len(domain))
+            ])
+
+        self.definitions = merged
+        self.sources = sources
+        self.evaluators = evaluators
+        self.field_tables = field_tables
+        self._by_value = by_value
+
+    def evaluate(self, field: str, value: int) -> Any:
+        """计算单个衍生属性"""
+        if _in_table(value):
+            return self.field_tables[field][value - ATTRIBUTE_MIN]
+        return self.evaluators[field](value)
+
+    def derived_for(self, attribute: str, value: int) -> Dict[str, Any]:
+        """某项先天属性取 value 时决定的全部衍生属性"""
+        if _in_table(value):
+            return dict(self._by_value[INNATE_ATTRIBUTES.index(attribute)][value - ATTRIBUTE_MIN])
+        return {
+            field: self.evaluators[field](value)
+            for field, source in self.sources.items()
+            if source == attribute
+        }
+
+    def derive(self, *innate: int) -> Dict[str, Any]:
+        """按先天六司（INNATE_ATTRIBUTES 顺序）计算全部衍生属性"""
+        result: Dict[str, Any] = {}
+        for index, value in enumerate(innate):
+            if _in_table(value):
+                result.update(self._by_value[index][value - ATTRIBUTE_MIN])
+            else:
+                attribute = INNATE_ATTRIBUTES[index]
+                for field, source in self.sources.items():
+                    if source == attribute:
+                        result[field] = self.evaluators[field](value)
+        return result
+
+
+_active = CompiledFormulas({})
+
+
+def active() -> CompiledFormulas:
+    """当前生效的公式集"""
+    return _active
+
+
+def activate(definitions: Optional[Mapping[str, Mapping[str, Any]]]) -> CompiledFormulas:
+    """
+    编译并切换到新的公式集
+    定义不合法时抛出 ValueError，当前公式保持不变
+    """
+    global _active
+    compiled = CompiledFormulas(definitions or {})
+    _active = compiled
+    return compiled
+
+
+async def reload() -> CompiledFormulas:
+    """从系统配置重新加载公式；配置损坏时保留当前公式，公式未变化时不切换"""
+    global _active
+    definitions = await get_config(CONFIG_KEY)
+    try:
+        compiled = CompiledFormulas(definitions if isinstance(definitions, Mapping) else {})
+    except ValueError as e:
+        logger.warning("属性公式配置无效，继续使用当前公式: %s", e)
+        return _active
+    # 保持同一对象，依赖公式集身份的缓存（如属性总表）不必重建
+    if compiled.definitions != _active.definitions:
+        _active = compiled
+    return _active
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        try:
+            await reload()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("属性公式重新加载失败: %s", e)
+
+
+def start() -> None:
+    """启动定期重新加载任务（在应用生命周期内调用），让其他 worker 的修改在本进程生效"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+async def save(definitions: Mapping[str, Mapping[str, Any]]) -> CompiledFormulas:
+    """
+    校验、持久化并热切换公式
+    definitions 是对默认公式的覆盖，未给出的字段和参数沿用默认值
+    """
+    global _active
+    compiled = CompiledFormulas(definitions)
+    await set_config(CONFIG_KEY, {field: dict(spec) for field, spec in definitions.items()})
+    _active = compiled
+    return compiled
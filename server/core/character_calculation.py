@@ -3,6 +3,16 @@
 基于先天六司计算核心属性
 """
 
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from server.core import attribute_formulas
+from server.core.attribute_formulas import ATTRIBUTE_MAX, ATTRIBUTE_MIN, INNATE_ATTRIBUTES
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时批量计算退回纯 Python 实现
+    np = None
+
 def calculate_core_attributes(
     root_bone: int,
     spirituality: int,
@@ -28,34 +38,13 @@ def calculate_core_attributes(
         dict: 包含所有核心属性的字典
     """
     
-    # 基础计算公式
-    # 每点先天六司提供不同的属性加成
-    
-    # 气血系统（基于根骨）
-    base_qi_blood = 80  # 基础气血
-    qi_blood_per_bone = 15  # 每点根骨增加的气血
-    max_qi_blood = base_qi_blood + (root_bone * qi_blood_per_bone)
-    qi_blood_recovery_rate = 1.0 + (root_bone * 0.1)  # 每点根骨增加10%恢复速度
-    
-    # 灵气系统（基于灵性）
-    base_spiritual = 60  # 基础灵气
-    spiritual_per_point = 12  # 每点灵性增加的灵气
-    max_spiritual = base_spiritual + (spirituality * spiritual_per_point)
-    spiritual_recovery_rate = 1.0 + (spirituality * 0.12)  # 每点灵性增加12%恢复速度
-    
-    # 神识系统（基于悟性）
-    base_spirit = 50  # 基础神识
-    spirit_per_point = 10  # 每点悟性增加的神识
-    max_spirit = base_spirit + (comprehension * spirit_per_point)
-    spirit_recovery_rate = 1.0 + (comprehension * 0.08)  # 每点悟性增加8%恢复速度
-    
-    # 寿元系统（基于根骨）
-    base_lifespan = 60  # 凡人基础寿命
-    lifespan_per_bone = 10 # 每点根骨增加10年寿命
-    max_lifespan = base_lifespan + (root_bone * lifespan_per_bone)
-    
-    # 使用传入的当前年龄
-    current_age_val = current_age
+    # 衍生属性由公式引擎计算，系数可在后台热更新（见 attribute_formulas）
+    derived = attribute_formulas.active().derive(
+        root_bone, spirituality, comprehension, fortune, charm, temperament
+    )
+    max_qi_blood = derived["max_qi_blood"]
+    max_spiritual = derived["max_spiritual_power"]
+    max_spirit = derived["max_spirit_sense"]
 
     # 获取凡人境界ID
     mortal_realm_id = 1  # 默认为1，凡人境界
@@ -65,23 +54,23 @@ def calculate_core_attributes(
         "max_qi_blood": max_qi_blood,
         "max_spiritual_power": max_spiritual,
         "max_spirit_sense": max_spirit,
-        "max_lifespan": max_lifespan,
+        "max_lifespan": derived["max_lifespan"],
         
         # 当前属性值（初始化时等于上限）
         "qi_blood": max_qi_blood,
         "spiritual_power": max_spiritual,
         "spirit_sense": max_spirit,
-        "current_age": current_age_val, # 使用传入的 current_age
+        "current_age": current_age,
         
         # 恢复速度基础值（将与时间挂钩）
-        "qi_blood_recovery_rate": round(qi_blood_recovery_rate, 2),
-        "spiritual_recovery_rate": round(spiritual_recovery_rate, 2),
-        "spirit_recovery_rate": round(spirit_recovery_rate, 2),
+        "qi_blood_recovery_rate": derived["qi_blood_recovery_rate"],
+        "spiritual_recovery_rate": derived["spiritual_recovery_rate"],
+        "spirit_recovery_rate": derived["spirit_recovery_rate"],
         
         # 其他衍生属性（用于后续系统）
-        "luck_factor": fortune,  # 气运影响奇遇概率
-        "social_bonus": charm,   # 魅力影响社交
-        "mental_resistance": temperament,  # 心性影响心魔抗性
+        "luck_factor": derived["luck_factor"],  # 气运影响奇遇概率
+        "social_bonus": derived["social_bonus"],   # 魅力影响社交
+        "mental_resistance": derived["mental_resistance"],  # 心性影响心魔抗性
         
         # 初始境界
         "current_realm_id": mortal_realm_id,  # 凡人境界
@@ -118,6 +107,41 @@ def calculate_core_attributes(
     }
 
 
+# 先天六司各取值的描述
+ATTRIBUTE_DESCRIPTIONS = {
+    "root_bone": {
+        0: "羸弱不堪", 1: "体弱多病", 2: "身体孱弱", 3: "体质一般",
+        4: "身体健康", 5: "体质不错", 6: "身强体壮", 7: "筋骨强健",
+        8: "体魄过人", 9: "天生神力", 10: "金刚不坏"
+    },
+    "spirituality": {
+        0: "灵气不显", 1: "灵性微弱", 2: "灵性较低", 3: "灵性一般",
+        4: "灵性尚可", 5: "灵性不错", 6: "灵性敏锐", 7: "灵性超群",
+        8: "灵性过人", 9: "灵性绝佳", 10: "天人感应"
+    },
+    "comprehension": {
+        0: "愚钝如牛", 1: "悟性极差", 2: "悟性较差", 3: "悟性一般",
+        4: "悟性尚可", 5: "悟性不错", 6: "悟性敏锐", 7: "悟性超群",
+        8: "悟性过人", 9: "悟性绝佳", 10: "一点即通"
+    },
+    "fortune": {
+        0: "厄运缠身", 1: "运气极差", 2: "运气较差", 3: "运气一般",
+        4: "运气尚可", 5: "运气不错", 6: "运气颇佳", 7: "运气极好",
+        8: "福星高照", 9: "洪福齐天", 10: "天命之子"
+    },
+    "charm": {
+        0: "面目可憎", 1: "其貌不扬", 2: "容貌平平", 3: "容貌一般",
+        4: "容貌尚可", 5: "容貌不错", 6: "容貌出众", 7: "美貌动人",
+        8: "倾国倾城", 9: "绝世容颜", 10: "天人之姿"
+    },
+    "temperament": {
+        0: "心性不稳", 1: "意志薄弱", 2: "心性较差", 3: "心性一般",
+        4: "心性尚可", 5: "心性不错", 6: "道心稳固", 7: "道心坚韧",
+        8: "道心如铁", 9: "道心不移", 10: "道心圆满"
+    }
+}
+
+
 def get_attribute_description(attribute_name: str, value: int) -> str:
     """
     获取属性数值的描述
@@ -129,40 +153,125 @@ def get_attribute_description(attribute_name: str, value: int) -> str:
     Returns:
         str: 属性描述
     """
-    descriptions = {
-        "root_bone": {
-            0: "羸弱不堪", 1: "体弱多病", 2: "身体孱弱", 3: "体质一般",
-            4: "身体健康", 5: "体质不错", 6: "身强体壮", 7: "筋骨强健",
-            8: "体魄过人", 9: "天生神力", 10: "金刚不坏"
-        },
-        "spirituality": {
-            0: "灵气不显", 1: "灵性微弱", 2: "灵性较低", 3: "灵性一般",
-            4: "灵性尚可", 5: "灵性不错", 6: "灵性敏锐", 7: "灵性超群",
-            8: "灵性过人", 9: "灵性绝佳", 10: "天人感应"
-        },
-        "comprehension": {
-            0: "愚钝如牛", 1: "悟性极差", 2: "悟性较差", 3: "悟性一般",
-            4: "悟性尚可", 5: "悟性不错", 6: "悟性敏锐", 7: "悟性超群",
-            8: "悟性过人", 9: "悟性绝佳", 10: "一点即通"
-        },
-        "fortune": {
-            0: "厄运缠身", 1: "运气极差", 2: "运气较差", 3: "运气一般",
-            4: "运气尚可", 5: "运气不错", 6: "运气颇佳", 7: "运气极好",
-            8: "福星高照", 9: "洪福齐天", 10: "天命之子"
-        },
-        "charm": {
-            0: "面目可憎", 1: "其貌不扬", 2: "容貌平平", 3: "容貌一般",
-            4: "容貌尚可", 5: "容貌不错", 6: "容貌出众", 7: "美貌动人",
-            8: "倾国倾城", 9: "绝世容颜", 10: "天人之姿"
-        },
-        "temperament": {
-            0: "心性不稳", 1: "意志薄弱", 2: "心性较差", 3: "心性一般",
-            4: "心性尚可", 5: "心性不错", 6: "道心稳固", 7: "道心坚韧",
-            8: "道心如铁", 9: "道心不移", 10: "道心圆满"
-        }
-    }
-    
-    if attribute_name in descriptions and value in descriptions[attribute_name]:
-        return descriptions[attribute_name][value]
+    description = ATTRIBUTE_DESCRIPTIONS.get(attribute_name, {}).get(value)
+    if description is not None:
+        return description
     
-    return f"未知境界({value})"
\ No newline at end of file
+    return f"未知境界({value})"
+
+
+# 属性总表缓存：(生成总表时的公式集, 总表)，公式热切换后自动重建
+_attribute_table: Optional[Tuple[attribute_formulas.CompiledFormulas, Dict[str, List[Dict[str, Any]]]]] = None
+
+
+def get_attribute_table() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    先天六司属性总表
+
+    取值域只有 6 项属性 × 11 个取值，直接预先算好每个取值的描述与它决定的全部衍生属性：
+    {属性名: [{"value": 0, "description": "...", "derived": {...}}, ...]}
+    总表按当前公式集缓存，调用方不要修改返回值。
+    """
+    global _attribute_table
+    formulas = attribute_formulas.active()
+    if _attribute_table is not None and _attribute_table[0] is formulas:
+        return _attribute_table[1]
+
+    table = {
+        attribute: [
+            {
+                "value": value,
+                "description": get_attribute_description(attribute, value),
+                "derived": formulas.derived_for(attribute, value),
+            }
+            for value in range(ATTRIBUTE_MIN, ATTRIBUTE_MAX + 1)
+        ]
+        for attribute in INNATE_ATTRIBUTES
+    }
+    _attribute_table = (formulas, table)
+    return table
+
+
+# ---------------------------------------------------------------------------
+# 批量计算
+# ---------------------------------------------------------------------------
+
+# 与先天属性无关的标量字段；背包、技能等容器字段不做列化（每行都是新的空容器）
+CONSTANT_FIELDS = (
+    "current_realm_id", "cultivation_progress", "cultivation_experience",
+    "current_location", "current_scene", "spiritual_stones", "version", "is_dirty",
+)
+
+Column = Union[Sequence[int], Any]
+
+_CONSTANTS = {
+    field: value
+    for field, value in calculate_core_attributes(0, 0, 0, 0, 0, 0).items()
+    if field in CONSTANT_FIELDS
+}
+
+
+def _lookup(formulas: attribute_formulas.CompiledFormulas, field: str, column: Column) -> Any:
+    table = formulas.field_tables[field]
+    evaluate = formulas.evaluators[field]
+    # 只有取值域内的整数列走查表；含浮点或越界值时逐个回退到公式，与逐个计算的结果一致
+    if np is not None and isinstance(column, np.ndarray):
+        if column.dtype.kind in "iu" and not (
+            column.size and (column.min() < ATTRIBUTE_MIN or column.max() > ATTRIBUTE_MAX)
+        ):
+            return np.asarray(table)[column - ATTRIBUTE_MIN]
+        return np.array([evaluate(v) for v in column.tolist()])
+    if not all(isinstance(v, int) for v in column) or (
+        column and (min(column) < ATTRIBUTE_MIN or max(column) > ATTRIBUTE_MAX)
+    ):
+        return [formulas.evaluate(field, v) for v in column]
+    if ATTRIBUTE_MIN:
+        return [table[v - ATTRIBUTE_MIN] for v in column]
+    return list(map(table.__getitem__, column))
+
+
+def calculate_core_attributes_batch(
+    root_bone: Column,
+    spirituality: Column,
+    comprehension: Column,
+    fortune: Column,
+    charm: Column,
+    temperament: Column,
+    current_age: Union[int, Column] = 16,
+) -> Dict[str, Any]:
+    """
+    批量计算核心属性（列式输入、列式输出）
+
+    先天六司的取值域只有 0-10，公式引擎已为每个衍生属性预先算好查表，批量计算只是逐列索引，
+    结果与逐个调用 calculate_core_attributes 完全一致。超出取值域的值与非整数值逐个回退到公式闭包。
+
+    Args:
+        root_bone ... temperament: 等长的整数序列（list / array.array / numpy 数组）
+        current_age: 统一年龄，或与其他列等长的年龄序列
+
+    Returns:
+        dict: 字段名 -> 列。传入 numpy 数组时衍生属性列为 numpy 数组，否则为 list。
+              不包含背包、技能等容器字段。
+    """
+    columns = dict(zip(INNATE_ATTRIBUTES, (root_bone, spirituality, comprehension, fortune, charm, temperament)))
+    sizes = {len(col) for col in columns.values()}
+    if len(sizes) > 1:
+        raise ValueError("先天六司各列长度不一致")
+    count = sizes.pop()
+
+    # 整批使用同一份公式，计算期间热切换公式不会造成前后不一致
+    formulas = attribute_formulas.active()
+    result: Dict[str, Any] = {
+        field: _lookup(formulas, field, columns[source]) for field, source in formulas.sources.items()
+    }
+    for field, max_field in attribute_formulas.CURRENT_VALUE_FIELDS.items():
+        result[field] = result[max_field].copy()
+    if isinstance(current_age, int):
+        result["current_age"] = [current_age] * count
+    else:
+        if len(current_age) != count:
+            raise ValueError("current_age 列长度与先天六司不一致")
+        result["current_age"] = current_age
+    for field, value in _CONSTANTS.items():
+        result[field] = [value] * count
+    return result
@@ -36,5 +36,58 @@ class Settings(BaseSettings):
 
     # Database (required)
     DDCT_DB_URL: str | None = None
+    # 只读副本连接串（可选），设置后规则列表、工坊浏览、角色读取等只读接口走副本
+    DDCT_DB_READ_URL: str | None = None
+    # 连接池大小（MySQL），连接串中的 minsize / maxsize 参数优先
+    DB_POOL_MIN_SIZE: int = 1
+    DB_POOL_MAX_SIZE: int = 10
+    # 从连接池获取连接的最长等待（秒），0 表示不限制
+    DB_POOL_ACQUIRE_TIMEOUT: float = 10.0
+    # 连接空闲超过该时长（秒）后重建，应小于 MySQL wait_timeout
+    DB_POOL_RECYCLE: int = 3600
+    # 单条查询超时（毫秒，MySQL max_execution_time，仅作用于 SELECT），0 表示不限制
+    DB_QUERY_TIMEOUT_MS: int = 0
+    # 写请求之后该时长（秒）内，同一客户端的读取仍走主库，避免读到副本的旧数据
+    DB_REPLICA_PIN_SECONDS: float = 5.0
+
+    # 数据库瞬时故障重试（只重试只读或整体可重放的操作）
+    DB_RETRY_MAX_RETRIES: int = 3
+    # 退避（decorrelated jitter）的最小/最大间隔（秒）
+    DB_RETRY_BASE_DELAY: float = 0.05
+    DB_RETRY_MAX_DELAY: float = 1.0
+    # 每个请求用于重试的总时长（秒），超出后不再重试
+    DB_RETRY_BUDGET_SECONDS: float = 2.0
+    # 连续瞬时故障达到该次数后熔断，熔断期间数据库调用直接失败（503）
+    DB_BREAKER_FAILURE_THRESHOLD: int = 5
+    # 熔断后经过该时长（秒）放行一个探测请求，成功则恢复
+    DB_BREAKER_RESET_SECONDS: float = 10.0
+
+    # SQLite（连接串中显式给出的 pragma 优先）
+    # WAL 模式下 NORMAL 只在检查点时刷盘，掉电可能丢最近的事务但不会损坏数据库；要求更严格时设为 FULL
+    SQLITE_SYNCHRONOUS: Literal["OFF", "NORMAL", "FULL", "EXTRA"] = "NORMAL"
+    # 每个连接的页缓存（KB）
+    SQLITE_CACHE_SIZE_KB: int = 65536
+    # 内存映射读取的上限（MB），0 表示关闭
+    SQLITE_MMAP_SIZE_MB: int = 256
+    # 数据库被其他进程锁住时的等待时长（毫秒），多个 worker 共用一个文件时避免 "database is locked"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    # 并行执行 SELECT 的只读连接数，0 表示读写共用一个连接
+    SQLITE_READ_CONNECTIONS: int = 4
+    # 单写者队列一次合并提交的最多写语句数，不大于 1 表示不合并
+    SQLITE_WRITE_BATCH_SIZE: int = 64
+
+    # /metrics 访问令牌（Authorization: Bearer <token>），未设置时不校验
+    METRICS_TOKEN: str | None = None
+    # 单条查询超过该耗时（毫秒）记为慢查询
+    SLOW_QUERY_MS: float = 200.0
+    # 单个请求查询数超过该值时记录日志（疑似 N+1）
+    SLOW_REQUEST_QUERY_COUNT: int = 30
+
+    # 事件循环延迟监控
+    LOOP_MONITOR_ENABLED: bool = True
+    # 事件循环阻塞超过该时长（毫秒）时记录调用栈
+    LOOP_LAG_THRESHOLD_MS: float = 200.0
+    # 调试模式：设置后开启 asyncio 调试，同步执行超过该时长（毫秒）的回调都会被记录
+    LOOP_DEBUG_SLOW_CALLBACK_MS: float | None = None
 
 settings = Settings()
@@ -0,0 +1,469 @@
+"""
+角色创建蒙特卡洛模拟器
+
+离线按种子规则（天资等级、出身、灵根、天赋）随机生成大量合法的开局配置，
+批量送入核心属性计算，统计天道点花费与衍生属性的分布，供策划评估平衡性；
+同时也可以当作属性计算路径的 CPU 基准。
+
+抽样模型（与前端创建流程一致）：
+1. 选一个天资等级，总天道点 = total_points
+2. 在剩余天道点买得起的出身、灵根中各选一个
+3. 选 0-MAX_TALENTS 个买得起的天赋
+4. 剩余天道点随机分配到先天六司（每项 0-10）
+5. 出身 attribute_modifiers 与天赋 ATTRIBUTE_MODIFIER 效果叠加到先天六司，结果限制在 0-10
+
+选取方式由 --weighting 决定：
+- rarity（默认）：天资等级、出身、天赋按稀有度值加权（与 TalentTier 模型一致，数值越小越稀有，
+  稀有度 1 的选项被选中的概率是稀有度 5 的五分之一；前端文案写的是数值越高越稀有，以后端模型为准）；
+  灵根没有稀有度，等概率
+- uniform：所有买得起的选项等概率
+
+报告同时按名称与按稀有度分组给出选取率、平均花费的天道点，
+按稀有度分组的样本另给出先天六司与衍生属性的分布。
+
+用法：
+    python -m server.core.creation_simulator --samples 10000000 --workers 8 --seed 42 --output report.json
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from itertools import accumulate
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # numpy 为可选依赖，缺失时分组直方图退回 Counter 计数
+    np = None
+
+from server.core import attribute_formulas
+from server.core.attribute_formulas import ATTRIBUTE_MAX, ATTRIBUTE_MIN, INNATE_ATTRIBUTES
+from server.core.character_calculation import calculate_core_attributes_batch
+from server.core.seed_rules import CORE_ORIGINS_DATA, CORE_SPIRIT_ROOTS_DATA, CORE_TALENTS_DATA
+from server.core.seed_talent_tiers import talent_tier_data
+
+CHUNK_SIZE = 100_000
+MAX_TALENTS = 3
+WEIGHTINGS = ("rarity", "uniform")
+
+# 属性修正键 -> 先天六司序号（与前端 attributeCalculation.ts 的映射一致）
+MODIFIER_TARGETS = {
+    "STR": 0,  # 力量 -> 根骨
+    "CON": 0,  # 体质 -> 根骨
+    "DEX": 1,  # 敏捷 -> 灵性
+    "INT": 2,  # 智力 -> 悟性
+    "SPI": 2,  # 神魂 -> 悟性
+    "LUK": 3,  # 运气 -> 气运
+}
+
+# (名称, 天道点花费, 先天六司修正, 稀有度)
+Option = Tuple[str, int, Tuple[int, ...], Optional[int]]
+# 参与选取的选项种类（报告中的分组键）
+KINDS = ("tier", "origin", "spirit_root", "talent")
+
+
+def _modifiers(pairs: Sequence[Tuple[str, Any]]) -> Tuple[int, ...]:
+    result = [0] * len(INNATE_ATTRIBUTES)
+    for target, value in pairs:
+        index = MODIFIER_TARGETS.get(target)
+        if index is not None:
+            result[index] += int(value)
+    return tuple(result)
+
+
+def _load_rules() -> Dict[str, List[Any]]:
+    # 天资等级也按 Option 表示：花费一栏为总天道点
+    tiers: List[Option] = [
+        (t["name"], t["total_points"], _modifiers([]), t.get("rarity")) for t in talent_tier_data
+    ]
+    origins: List[Option] = [
+        (o["name"], o["talent_cost"], _modifiers(list((o.get("attribute_modifiers") or {}).items())), o.get("rarity"))
+        for o in CORE_ORIGINS_DATA
+    ]
+    spirit_roots: List[Option] = [
+        (s["name"], s["talent_cost"], _modifiers([]), s.get("rarity")) for s in CORE_SPIRIT_ROOTS_DATA
+    ]
+    talents: List[Option] = [
+        (
+            t["name"],
+            t["talent_cost"],
+            _modifiers([
+                (e.get("target"), e.get("value", 0))
+                for e in t.get("effects") or []
+                if e.get("type") == "ATTRIBUTE_MODIFIER"
+            ]),
+            t.get("rarity"),
+        )
+        for t in CORE_TALENTS_DATA
+    ]
+    return {"tiers": tiers, "origins": origins, "spirit_roots": spirit_roots, "talents": talents}
+
+
+def _weight(option: Option, weighting: str) -> float:
+    rarity = option[3]
+    if weighting == "uniform" or not rarity or rarity < 0:
+        return 1.0
+    return float(rarity)
+
+
+def _rarity_key(kind: str, rarity: Optional[int]) -> str:
+    return f"{kind}:{rarity}"
+
+
+def _picker(
+    kind: str, options: List[Option], weighting: str, rarity_rows: Dict[str, List[int]]
+) -> Tuple[List[Tuple[Any, ...]], List[float], float]:
+    """预先算好一组选项的累积权重，抽取时对 rand() * total 二分查找
+
+    每个选项展开为 (名称, 花费, 修正, 计数键, 所属稀有度分组的样本下标列表)，省去循环内的字符串拼接与查表。
+    """
+    entries = [
+        (name, cost, mods, f"{kind}:{name}", rarity_rows.setdefault(_rarity_key(kind, rarity), []))
+        for name, cost, mods, rarity in options
+    ]
+    cumulative = list(accumulate(_weight(o, weighting) for o in options))
+    total = cumulative[-1] if cumulative else 0.0
+    if cumulative:
+        # rand() * total 经浮点舍入可能恰好等于 total，末项放宽到无穷避免越界
+        cumulative[-1] = float("inf")
+    return entries, cumulative, total
+
+
+def _sample_chunk(
+    rules: Dict[str, List[Any]], rng: random.Random, count: int, weighting: str = "rarity"
+) -> Dict[str, Any]:
+    """生成 count 个开局配置，返回先天六司列、各项统计计数与按稀有度分组的样本下标"""
+    # 稀有度分组（"种类:稀有度"）-> 样本下标，用于统计各组的属性分布
+    rarity_rows: Dict[str, List[int]] = {}
+    tiers = rules["tiers"]
+    # 天道点总数很小，预先按剩余点数算好买得起的选项
+    max_points = max(t[1] for t in tiers)
+    tier_entries, tier_cumulative, tier_total = _picker("tier", tiers, weighting, rarity_rows)
+    origin_pickers = [
+        _picker("origin", [o for o in rules["origins"] if o[1] <= p], weighting, rarity_rows)
+        for p in range(max_points + 1)
+    ]
+    root_pickers = [
+        _picker("spirit_root", [s for s in rules["spirit_roots"] if s[1] <= p], weighting, rarity_rows)
+        for p in range(max_points + 1)
+    ]
+    talent_pickers = [
+        _picker("talent", [t for t in rules["talents"] if t[1] <= p], weighting, rarity_rows)
+        for p in range(max_points + 1)
+    ]
+
+    columns: List[List[int]] = [[] for _ in INNATE_ATTRIBUTES]
+    picks: Counter = Counter()
+    # 按名称累计的天道点花费（天资等级记为实际花掉的点数）
+    spent: Counter = Counter()
+    tier_stats: Dict[str, List[int]] = {t[0]: [0, 0, 0] for t in tiers}  # 样本数、天赋数、剩余点数
+    unspent_hist: Counter = Counter()
+    # int(random() * n) 比 randrange(n) 快数倍，对模拟而言精度足够
+    rand = rng.random
+    rand_attr = ATTRIBUTE_MAX - ATTRIBUTE_MIN + 1
+
+    for row in range(count):
+        tier_name, points, _, tier_key, rows = tier_entries[bisect_right(tier_cumulative, rand() * tier_total)]
+        total_points = points
+        rows.append(row)
+        innate = [0] * len(INNATE_ATTRIBUTES)
+        entries, cumulative, total = origin_pickers[points]
+        if entries:
+            _, cost, mods, key, rows = entries[bisect_right(cumulative, rand() * total)]
+            points -= cost
+            picks[key] += 1
+            spent[key] += cost
+            rows.append(row)
+            innate = list(mods)
+
+        entries, cumulative, total = root_pickers[points]
+        if entries:
+            _, cost, _, key, rows = entries[bisect_right(cumulative, rand() * total)]
+            points -= cost
+            picks[key] += 1
+            spent[key] += cost
+            rows.append(row)
+
+        taken: List[str] = []
+        for _ in range(int(rand() * (MAX_TALENTS + 1))):
+            entries, cumulative, total = talent_pickers[points]
+            # 已选天赋都买得起时剩余可选项为 len - 已选数；重抽直到不重复，分布等价于在未选项中加权抽取
+            if len(entries) <= sum(1 for e in entries if e[3] in taken):
+                break
+            while True:
+                _, cost, mods, key, rows = entries[bisect_right(cumulative, rand() * total)]
+                if key not in taken:
+                    break
+            points -= cost
+            taken.append(key)
+            picks[key] += 1
+            spent[key] += cost
+            # 同一样本选了多个同稀有度天赋时只计一次
+            if not rows or rows[-1] != row:
+                rows.append(row)
+            innate = [a + m for a, m in zip(innate, mods)]
+
+        # 剩余天道点分配到先天六司：先各自随机取值，超出预算时按比例缩减
+        alloc = [int(rand() * rand_attr) + ATTRIBUTE_MIN for _ in INNATE_ATTRIBUTES]
+        total = sum(alloc)
+        if total > points:
+            scale = points / total if total else 0
+            alloc = [int(a * scale) for a in alloc]
+            total = sum(alloc)
+        points -= total
+
+        for index, value in enumerate(alloc):
+            value += innate[index]
+            if value < ATTRIBUTE_MIN:
+                value = ATTRIBUTE_MIN
+            elif value > ATTRIBUTE_MAX:
+                value = ATTRIBUTE_MAX
+            columns[index].append(value)
+
+        stats = tier_stats[tier_name]
+        stats[0] += 1
+        stats[1] += len(taken)
+        stats[2] += points
+        unspent_hist[points] += 1
+        picks[tier_key] += 1
+        spent[tier_key] += total_points - points
+
+    return {
+        "columns": columns,
+        "picks": picks,
+        "spent": spent,
+        "tier_stats": tier_stats,
+        "unspent": unspent_hist,
+        "rarity_rows": rarity_rows,
+    }
+
+
+def _group_hist(column: Any, rows: Any) -> Counter:
+    """统计 column 在 rows 这些样本上的取值分布"""
+    if np is None:
+        return Counter(map(column.__getitem__, rows))
+    values, counts = np.unique(column[rows], return_counts=True)
+    return Counter(dict(zip(values.tolist(), counts.tolist())))
+
+
+def _merge_hists(target: Dict[str, Dict[str, Counter]], source: Dict[str, Dict[str, Counter]]) -> None:
+    for group, hists in source.items():
+        merged = target.setdefault(group, {})
+        for field, hist in hists.items():
+            merged.setdefault(field, Counter()).update(hist)
+
+
+def _run_worker(args: Tuple[int, int, str]) -> Dict[str, Any]:
+    """子进程：生成 count 个样本并汇总为直方图（只回传计数，不回传原始样本）"""
+    count, seed, weighting = args
+    rules = _load_rules()
+    rng = random.Random(seed)
+    derived_hist: Dict[str, Counter] = {}
+    innate_hist: Dict[str, Counter] = {name: Counter() for name in INNATE_ATTRIBUTES}
+    # 稀有度分组 -> 属性名 -> 直方图
+    rarity_hist: Dict[str, Dict[str, Counter]] = {}
+    picks: Counter = Counter()
+    spent: Counter = Counter()
+    unspent: Counter = Counter()
+    tier_stats: Dict[str, List[int]] = {}
+    calc_seconds = 0.0
+    fields = list(attribute_formulas.active().sources)
+
+    remaining = count
+    while remaining > 0:
+        size = min(CHUNK_SIZE, remaining)
+        remaining -= size
+        chunk = _sample_chunk(rules, rng, size, weighting)
+        columns = chunk["columns"]
+
+        started = time.perf_counter()
+        result = calculate_core_attributes_batch(*columns)
+        calc_seconds += time.perf_counter() - started
+
+        for field in fields:
+            derived_hist.setdefault(field, Counter()).update(result[field])
+        for name, values in zip(INNATE_ATTRIBUTES, columns):
+            innate_hist[name].update(values)
+        named_columns = list(zip(INNATE_ATTRIBUTES, columns)) + [(field, result[field]) for field in fields]
+        if np is not None:
+            named_columns = [(field, np.asarray(column)) for field, column in named_columns]
+        for group, rows in chunk["rarity_rows"].items():
+            if not rows:
+                continue
+            if np is not None:
+                rows = np.asarray(rows)
+            hists = rarity_hist.setdefault(group, {})
+            for field, column in named_columns:
+                hists.setdefault(field, Counter()).update(_group_hist(column, rows))
+        picks.update(chunk["picks"])
+        spent.update(chunk["spent"])
+        unspent.update(chunk["unspent"])
+        for name, stats in chunk["tier_stats"].items():
+            merged = tier_stats.setdefault(name, [0, 0, 0])
+            for i, v in enumerate(stats):
+                merged[i] += v
+
+    return {
+        "derived": derived_hist,
+        "innate": innate_hist,
+        "rarity": rarity_hist,
+        "picks": picks,
+        "spent": spent,
+        "unspent": unspent,
+        "tier_stats": tier_stats,
+        "calc_seconds": calc_seconds,
+    }
+
+
+def _summarize(hist: Counter) -> Dict[str, Any]:
+    """从直方图计算均值与分位数"""
+    total = sum(hist.values())
+    if not total:
+        return {"count": 0}
+    items = sorted(hist.items())
+    mean = sum(v * c for v, c in items) / total
+    quantiles = {"p5": 0.05, "p25": 0.25, "p50": 0.5, "p75": 0.75, "p95": 0.95}
+    result: Dict[str, Any] = {"count": total, "mean": round(mean, 4), "min": items[0][0], "max": items[-1][0]}
+    cumulative = 0
+    pending = sorted(quantiles.items(), key=lambda kv: kv[1])
+    for value, c in items:
+        cumulative += c
+        while pending and cumulative >= pending[0][1] * total:
+            result[pending.pop(0)[0]] = value
+    return result
+
+
+def _by_rarity(rules: Dict[str, List[Any]]) -> Dict[str, Dict[str, Tuple[Optional[int], str]]]:
+    """种类 -> 名称 -> (稀有度, 稀有度分组键)"""
+    sources = zip(KINDS, (rules["tiers"], rules["origins"], rules["spirit_roots"], rules["talents"]))
+    return {
+        kind: {option[0]: (option[3], _rarity_key(kind, option[3])) for option in options}
+        for kind, options in sources
+    }
+
+
+def simulate(
+    samples: int, workers: Optional[int] = None, seed: int = 0, weighting: str = "rarity"
+) -> Dict[str, Any]:
+    """运行模拟并返回报告"""
+    if weighting not in WEIGHTINGS:
+        raise ValueError(f"未知的选取方式: {weighting}")
+    workers = max(1, workers or os.cpu_count() or 1)
+    shares = [samples // workers + (1 if i < samples % workers else 0) for i in range(workers)]
+    jobs = [(share, seed * 1_000_003 + i, weighting) for i, share in enumerate(shares) if share]
+
+    started = time.perf_counter()
+    if len(jobs) == 1:
+        parts = [_run_worker(jobs[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=len(jobs)) as pool:
+            parts = list(pool.map(_run_worker, jobs))
+    elapsed = time.perf_counter() - started
+
+    derived: Dict[str, Counter] = {}
+    innate: Dict[str, Counter] = {}
+    rarity_hist: Dict[str, Dict[str, Counter]] = {}
+    picks: Counter = Counter()
+    spent: Counter = Counter()
+    unspent: Counter = Counter()
+    tier_stats: Dict[str, List[int]] = {}
+    calc_seconds = 0.0
+    for part in parts:
+        for field, hist in part["derived"].items():
+            derived.setdefault(field, Counter()).update(hist)
+        for field, hist in part["innate"].items():
+            innate.setdefault(field, Counter()).update(hist)
+        _merge_hists(rarity_hist, part["rarity"])
+        picks.update(part["picks"])
+        spent.update(part["spent"])
+        unspent.update(part["unspent"])
+        for name, stats in part["tier_stats"].items():
+            merged = tier_stats.setdefault(name, [0, 0, 0])
+            for i, v in enumerate(stats):
+                merged[i] += v
+        calc_seconds += part["calc_seconds"]
+
+    # 按名称：选取率与被选中时平均花费的天道点
+    options: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    # 按稀有度：同一稀有度的选项合并统计
+    rarity: Dict[str, Dict[str, Dict[str, Any]]] = {}
+    for kind, names in _by_rarity(_load_rules()).items():
+        groups: Dict[str, Dict[str, Any]] = {}
+        for name, (value, group_key) in names.items():
+            key = f"{kind}:{name}"
+            c = picks[key]
+            options.setdefault(kind, {})[name] = {
+                "rarity": value,
+                "pick_rate": round(c / samples, 6),
+                "avg_points_spent": round(spent[key] / c, 4) if c else 0,
+            }
+            group = groups.setdefault(str(value), {"picks": 0, "spent": 0, "options": [], "key": group_key})
+            group["picks"] += c
+            group["spent"] += spent[key]
+            group["options"].append(name)
+        for value, group in groups.items():
+            hists = rarity_hist.get(group["key"], {})
+            c = group["picks"]
+            rarity.setdefault(kind, {})[value] = {
+                "options": group["options"],
+                # 天赋一个样本可选多个：选取率按次数计，属性分布按样本计
+                "pick_rate": round(c / samples, 6),
+                "avg_points_spent": round(group["spent"] / c, 4) if c else 0,
+                "innate_attributes": {field: _summarize(hists.get(field, Counter())) for field in INNATE_ATTRIBUTES},
+                "derived_attributes": {field: _summarize(hists.get(field, Counter())) for field in sorted(derived)},
+            }
+
+    return {
+        "samples": samples,
+        "workers": len(jobs),
+        "seed": seed,
+        "weighting": weighting,
+        "elapsed_seconds": round(elapsed, 3),
+        "samples_per_second": round(samples / elapsed) if elapsed else None,
+        # 属性计算部分累计的 CPU 时间（各进程之和）
+        "calculation_seconds": round(calc_seconds, 3),
+        "tiers": {
+            name: {
+                "share": round(n / samples, 6),
+                "avg_talents": round(t / n, 4) if n else 0,
+                "avg_unspent_points": round(u / n, 4) if n else 0,
+            }
+            for name, (n, t, u) in tier_stats.items()
+        },
+        "options": options,
+        "rarity": rarity,
+        "unspent_points": _summarize(unspent),
+        "innate_attributes": {field: _summarize(hist) for field, hist in innate.items()},
+        "derived_attributes": {field: _summarize(hist) for field, hist in sorted(derived.items())},
+    }
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="角色创建蒙特卡洛模拟")
+    parser.add_argument("--samples", type=int, default=1_000_000, help="样本数")
+    parser.add_argument("--workers", type=int, default=None, help="进程数，默认 CPU 核数")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子，相同种子与进程数结果可复现")
+    parser.add_argument("--output", default=None, help="报告输出路径，默认打印到标准输出")
+    parser.add_argument(
+        "--weighting", choices=WEIGHTINGS, default="rarity",
+        help="选取方式：rarity 按稀有度加权（默认），uniform 等概率",
+    )
+    args = parser.parse_args(argv)
+
+    report = simulate(args.samples, args.workers, args.seed, args.weighting)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+        print(f"--- 模拟完成：{args.samples} 个样本，用时 {report['elapsed_seconds']} 秒，报告已写入 {args.output} ---")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
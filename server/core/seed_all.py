@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 from . import seed_worlds, seed_rules, seed_talent_tiers
+from server.utils import rules_snapshot
 
 async def initialize_database():
     """
@@ -11,6 +12,8 @@ async def initialize_database():
     await seed_talent_tiers.seed_talent_tiers()
     await seed_worlds.seed()
     await seed_rules.seed()
+    # bulk_create 不触发模型信号，播种后手动让规则快照失效
+    await rules_snapshot.invalidate()
 
     print("---==[ 天道演化完毕 (ORM) ]==---")
 
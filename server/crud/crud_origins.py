@@ -3,6 +3,8 @@ from typing import List, Optional, Tuple
 from tortoise.exceptions import IntegrityError
 from server.models import Origin
 from server.schemas.schema import OriginCreate, OriginUpdate
+from server.utils import rules_snapshot
+from server.utils.db_retry import is_transient, protect_module
 
 async def get_origin_by_name(name: str) -> Optional[Origin]:
     """按名称查找出身"""
@@ -18,6 +20,8 @@ async def create_origin(origin: OriginCreate) -> Tuple[Optional[Origin], str]:
     except IntegrityError:
         return None, "数据冲突，可能存在同名出身。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def get_origin(origin_id: int) -> Optional[Origin]:
@@ -50,9 +54,17 @@ async def update_origin(origin_id: int, origin_data: OriginUpdate) -> Tuple[Opti
     except IntegrityError:
         return None, "数据冲突，更新失败。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def delete_origin(origin_id: int) -> bool:
     """删除出身"""
     deleted_count = await Origin.filter(id=origin_id).delete()
-    return deleted_count > 0
\ No newline at end of file
+    if deleted_count:
+        # 批量删除不会触发模型信号，需手动让规则快照失效
+        await rules_snapshot.invalidate()
+    return deleted_count > 0
+
+
+protect_module(__name__)
@@ -1,14 +1,26 @@
+import string
 import uuid
-from datetime import datetime
+from random import SystemRandom
 from typing import Optional, Dict, Any, List, Tuple
 
-from tortoise.transactions import atomic
+from tortoise.expressions import F, Q
+from tortoise.transactions import atomic, in_transaction
 from tortoise.exceptions import DoesNotExist, IntegrityError
 
-from server.models import RedemptionCode, PlayerAccount, AdminAccount
+from server.database import PRIMARY_CONNECTION
+from server.models import RedemptionCode, RedemptionCodeUse, PlayerAccount, AdminAccount
 from server.schemas.schema import RedemptionCodeCreate
+from server.utils import code_filter, rules_snapshot
+from server.utils.db_retry import is_transient, protect_module
 
-@atomic()
+# 批量生成兑换码默认字符集（去掉易混淆的 0/O、1/I/L）
+CODE_ALPHABET = "".join(c for c in string.ascii_uppercase + string.digits if c not in "0O1IL")
+CODE_CREATE_MAX_ATTEMPTS = 5
+BULK_CODE_CHUNK_SIZE = 1000
+
+_sysrand = SystemRandom()
+
+@atomic(PRIMARY_CONNECTION)
 async def create_code(code_data: RedemptionCodeCreate) -> Tuple[Optional[RedemptionCode], str]:
     """
     创生一枚新的仙缘信物，可设定其使用次数。
@@ -25,12 +37,17 @@ async def create_code(code_data: RedemptionCodeCreate) -> Tuple[Optional[Redempt
             max_uses=code_data.max_uses,
             used_by_user_id=code_data.used_by_user_id
         )
+        code_filter.add(new_code.code)
+        await code_filter.publish()
         return new_code, "仙缘信物创生成功"
     except IntegrityError:
         return None, f"此信物 ({code_data.code}) 已存在，无法重复创生。"
     except DoesNotExist:
         return None, "指定的用户不存在"
     except Exception as e:
+        # 瞬时故障需要抛给 protect_module 重试并计入熔断器，不能当作业务失败返回
+        if is_transient(e):
+            raise
         return None, f"创生仙缘信物失败: {e}"
 
 
@@ -39,11 +56,16 @@ async def get_code_by_string(code_str: str) -> Tuple[Optional[RedemptionCode], s
     根据信物字符串查验其法理。
     """
     try:
+        if not await code_filter.might_exist(code_str):
+            return None, "未找到此仙缘信物"
         code = await RedemptionCode.get_or_none(code=code_str)
         if not code:
+            code_filter.record_false_positive()
             return None, "未找到此仙缘信物"
         return code, "仙缘信物查验完毕"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"查验仙缘信物失败: {e}"
 
 
@@ -53,39 +75,51 @@ async def get_code_by_id(code_id: int) -> Optional[RedemptionCode]:
     """
     try:
         return await RedemptionCode.get_or_none(id=code_id)
-    except Exception:
+    except Exception as e:
+        if is_transient(e):
+            raise
         return None
 
 
-@atomic()
 async def use_code(code_str: str, user_id: int) -> Tuple[Optional[RedemptionCode], str]:
     """
     消耗一次仙缘信物，并记录使用者。
-    此法门将以原子操作确保次数准确无误，并返回更新后的信物状态。
+    以单条带条件的 UPDATE（按信物字符串匹配）完成"检查余量 + 扣减次数"，由数据库保证并发下不会超用；
+    扣减成功后在同一事务内读回信物（取得ID与扣减后的次数）并写入使用流水，
+    只有扣减失败时才多查一次以区分"不存在"与"已用尽"。
     """
     try:
-        user = await PlayerAccount.get_or_none(id=user_id)
-        if not user:
-            return None, "天命无此人，无法使用信物"
-
-        code_obj = await RedemptionCode.get_or_none(code=code_str)
-        if not code_obj:
+        if not await code_filter.might_exist(code_str):
             return None, "信物不存在"
+        async with in_transaction(PRIMARY_CONNECTION):
+            consumed = await RedemptionCode.filter(
+                Q(code=code_str) & (Q(max_uses=-1) | Q(times_used__lt=F("max_uses")))
+            ).update(times_used=F("times_used") + 1)
+            if consumed:
+                code_obj = await RedemptionCode.get(code=code_str)
+                await RedemptionCodeUse.create(code_id=code_obj.id, player_id=user_id)
+                return code_obj, "仙缘信物使用成功"
 
-        if code_obj.max_uses != -1 and code_obj.times_used >= code_obj.max_uses:
-            return None, "仙缘已尽，此信物已无法使用"
-
-        code_obj.times_used += 1
-        code_obj.used_at = datetime.utcnow()
-        code_obj.used_by = user
-        await code_obj.save()
-
-        return code_obj, "仙缘信物使用成功"
+        if not await RedemptionCode.exists(code=code_str):
+            code_filter.record_false_positive()
+            return None, "信物不存在"
+        return None, "仙缘已尽，此信物已无法使用"
+    except IntegrityError:
+        return None, "天命无此人，无法使用信物"
     except DoesNotExist:
         return None, "信物或用户不存在"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"消耗仙缘信物失败: {e}"
 
+
+async def get_code_uses(code_id: int, skip: int = 0, limit: int = 50) -> List[RedemptionCodeUse]:
+    """
+    获取兑换码的使用流水（管理员用）
+    """
+    return await RedemptionCodeUse.filter(code_id=code_id).order_by('-used_at').offset(skip).limit(limit)
+
 async def get_creation_data_by_code(code: str) -> Optional[Dict[str, Any]]:
     """
     通过兑换码获取角色创建数据
@@ -96,85 +130,15 @@ async def get_creation_data_by_code(code: str) -> Optional[Dict[str, Any]]:
     if not code_obj:
         return None
 
-    code_type = code_obj.type
-    creation_data = {}
-    
-    # 根据兑换码类型，从数据库获取对应的内容
-    if code_type == 'world':
-        # 获取随机或指定的世界
-        from server.models import World
-        worlds = await World.all().limit(1)
-        if worlds:
-            world = worlds[0]
-            creation_data['world_backgrounds'] = [{
-                'id': world.id,
-                'name': world.name,
-                'description': world.description,
-                'era': world.era
-            }]
-            
-    elif code_type == 'talent_tier':
-        # 获取高级天资
-        from server.models import TalentTier
-        talent_tiers = await TalentTier.filter(rarity__gte=4).limit(3)
-        creation_data['talent_tiers'] = [
-            {
-                'id': t.id,
-                'name': t.name,
-                'description': t.description,
-                'total_points': t.total_points,
-                'rarity': t.rarity,
-                'color': t.color
-            } for t in talent_tiers
-        ]
-        
-    elif code_type == 'origin':
-        # 获取稀有出身
-        from server.models import Origin
-        origins = await Origin.filter(rarity__gte=3).limit(5)
-        creation_data['origins'] = [
-            {
-                'id': o.id,
-                'name': o.name,
-                'description': o.description,
-                'rarity': o.rarity,
-                'talent_cost': o.talent_cost
-            } for o in origins
-        ]
-        
-    elif code_type == 'spirit_root':
-        # 获取高级灵根
-        from server.models import SpiritRoot
-        spirit_roots = await SpiritRoot.filter(base_multiplier__gte=1.5).limit(3)
-        creation_data['spirit_roots'] = [
-            {
-                'id': s.id,
-                'name': s.name,
-                'description': s.description,
-                'base_multiplier': s.base_multiplier,
-                'talent_cost': s.talent_cost
-            } for s in spirit_roots
-        ]
-        
-    elif code_type == 'talent':
-        # 获取稀有天赋
-        from server.models import Talent
-        talents = await Talent.filter(rarity__gte=4).limit(10)
-        creation_data['talents'] = [
-            {
-                'id': t.id,
-                'name': t.name,
-                'description': t.description,
-                'effects': t.effects,
-                'rarity': t.rarity,
-                'talent_cost': t.talent_cost
-            } for t in talents
-        ]
-    
-    # 如果有自定义payload，则合并
-    if code_obj.payload and isinstance(code_obj.payload, dict):
-        creation_data.update(code_obj.payload)
-    
+    return await get_creation_data_for_code(code_obj)
+
+
+async def get_creation_data_for_code(code_obj: RedemptionCode) -> Optional[Dict[str, Any]]:
+    """
+    根据已查出的兑换码对象获取角色创建数据
+    规则数据取自内存中的规则快照，不再每次查询规则表
+    """
+    creation_data = await rules_snapshot.get_creation_data(code_obj.type, code_obj.payload)
     return creation_data if creation_data else None
 
 
@@ -184,10 +148,11 @@ async def get_all_codes(skip: int = 0, limit: int = 50) -> List[RedemptionCode]:
     """
     try:
         return await RedemptionCode.all().order_by('-created_at').offset(skip).limit(limit)
-    except Exception:
+    except Exception as e:
+        if is_transient(e):
+            raise
         return []
 
-@atomic()
 async def create_admin_redemption_code(
     code_type: str,
     payload: Optional[Dict[str, Any]] = None,
@@ -204,23 +169,117 @@ async def create_admin_redemption_code(
             admin_obj = await AdminAccount.get_or_none(id=admin_id)
             if not admin_obj:
                 return None, "指定的管理员不存在"
+    except Exception as e:
+        if is_transient(e):
+            raise
+        return None, f"创建兑换码失败: {e}"
 
-        # 生成随机码
-        code = str(uuid.uuid4()).replace('-', '').upper()[:12]
-        
-        # 创建兑换码记录
-        new_code = await RedemptionCode.create(
-            code=code,
-            type=code_type,
-            payload=payload or {},  # payload可选，用于存储额外配置
-            max_uses=max_uses,
-            creator=admin_obj
+    for _ in range(CODE_CREATE_MAX_ATTEMPTS):
+        try:
+            # 生成随机码
+            code = str(uuid.uuid4()).replace('-', '').upper()[:12]
+
+            # 创建兑换码记录
+            new_code = await RedemptionCode.create(
+                code=code,
+                type=code_type,
+                payload=payload or {},  # payload可选，用于存储额外配置
+                max_uses=max_uses,
+                creator=admin_obj
+            )
+            code_filter.add(new_code.code)
+            await code_filter.publish()
+
+            return new_code, "仙缘信物创生成功"
+
+        except IntegrityError:
+            # 如果生成的码碰撞了（极小概率），重试
+            continue
+        except Exception as e:
+            if is_transient(e):
+                raise
+            return None, f"创建兑换码失败: {e}"
+
+    return None, "创建兑换码失败: 多次生成的兑换码均已存在"
+
+
+def generate_codes(count: int, length: int = 12, alphabet: str = CODE_ALPHABET, prefix: str = "") -> List[str]:
+    """
+    生成 count 个互不重复的随机兑换码（仅在内存中去重）
+    """
+    choices = _sysrand.choices
+    codes: set = set()
+    while len(codes) < count:
+        codes.update(
+            prefix + "".join(choices(alphabet, k=length))
+            for _ in range(count - len(codes))
         )
-        
-        return new_code, "仙缘信物创生成功"
-        
-    except IntegrityError:
-        # 如果生成的码碰撞了（极小概率），重试
-        return await create_admin_redemption_code(code_type, payload, max_uses, admin_id)
-    except Exception as e:
-        return None, f"创建兑换码失败: {e}"
\ No newline at end of file
+    return list(codes)
+
+
+async def _existing_codes(codes: List[str]) -> set:
+    existing: set = set()
+    for i in range(0, len(codes), BULK_CODE_CHUNK_SIZE):
+        chunk = codes[i:i + BULK_CODE_CHUNK_SIZE]
+        existing.update(await RedemptionCode.filter(code__in=chunk).values_list("code", flat=True))
+    return existing
+
+
+async def create_codes_bulk(
+    code_type: str,
+    count: int,
+    payload: Optional[Dict[str, Any]] = None,
+    max_uses: int = 1,
+    length: int = 12,
+    alphabet: str = CODE_ALPHABET,
+    prefix: str = "",
+    admin_id: Optional[int] = None,
+) -> Tuple[Optional[List[str]], str]:
+    """
+    (管理员用) 批量创建兑换码
+
+    先在内存中生成并去重，再剔除与库中已有兑换码冲突的部分并补齐，
+    最后在一个事务内分块 bulk_create。返回生成的兑换码列表。
+    """
+    # 码空间过小时无法生成足够多的不重复兑换码
+    if len(set(alphabet)) ** length < count * 4:
+        return None, "兑换码长度或字符集过小，无法生成足够多的不重复兑换码"
+
+    for _ in range(CODE_CREATE_MAX_ATTEMPTS):
+        pool = set(generate_codes(count, length, alphabet, prefix))
+        pool -= await _existing_codes(list(pool))
+        while len(pool) < count:
+            extra = [c for c in generate_codes(count - len(pool), length, alphabet, prefix) if c not in pool]
+            pool.update(set(extra) - await _existing_codes(extra))
+        codes = list(pool)
+
+        try:
+            async with in_transaction(PRIMARY_CONNECTION):
+                await RedemptionCode.bulk_create(
+                    [
+                        RedemptionCode(
+                            code=code,
+                            type=code_type,
+                            payload=payload or {},
+                            max_uses=max_uses,
+                            creator_id=admin_id,
+                        )
+                        for code in codes
+                    ],
+                    batch_size=BULK_CODE_CHUNK_SIZE,
+                )
+                await code_filter.publish()
+            code_filter.add_many(codes)
+            return codes, f"成功创生 {count} 枚仙缘信物"
+        except IntegrityError:
+            # 与并发创建的兑换码撞车，整批重试
+            continue
+        except Exception as e:
+            if is_transient(e):
+                raise
+            return None, f"批量创建兑换码失败: {e}"
+
+    return None, "批量创建兑换码失败: 多次重试仍存在重复兑换码"
+
+
+protect_module(__name__)
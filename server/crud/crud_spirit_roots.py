@@ -3,6 +3,7 @@ from typing import Optional, List, Tuple
 from tortoise.exceptions import IntegrityError
 from server.models import SpiritRoot as SpiritRootModel
 from server.schemas.schema import SpiritRootCreate, SpiritRootUpdate
+from server.utils.db_retry import is_transient, protect_module
 
 async def get_spirit_root_by_name(name: str) -> Optional[SpiritRootModel]:
     """按名称查找灵根"""
@@ -18,6 +19,8 @@ async def create_spirit_root(spirit_root: SpiritRootCreate) -> Tuple[Optional[Sp
     except IntegrityError:
         return None, "数据冲突，可能存在同名灵根。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def get_spirit_root(spirit_root_id: int) -> Optional[SpiritRootModel]:
@@ -50,6 +53,8 @@ async def update_spirit_root(spirit_root_id: int, spirit_root_data: SpiritRootUp
     except IntegrityError:
         return None, "数据冲突，更新失败。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def delete_spirit_root(spirit_root_id: int) -> bool:
@@ -58,4 +63,7 @@ async def delete_spirit_root(spirit_root_id: int) -> bool:
     if spirit_root:
         await spirit_root.delete()
         return True
-    return False
\ No newline at end of file
+    return False
+
+
+protect_module(__name__)
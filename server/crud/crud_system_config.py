@@ -1,5 +1,6 @@
 from typing import Any
 from ..models import SystemConfig
+from ..utils.db_retry import protect_module
 
 async def get_config(key: str) -> Any:
     """
@@ -17,4 +18,7 @@ async def update_config(key: str, value: Any) -> SystemConfig:
         key=key,
         defaults={"value": value}
     )
-    return config
\ No newline at end of file
+    return config
+
+
+protect_module(__name__)
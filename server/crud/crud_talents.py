@@ -3,6 +3,7 @@ from typing import Optional, List, Tuple
 from tortoise.exceptions import IntegrityError
 from server.models import Talent as TalentModel
 from server.schemas.schema import TalentCreate, TalentUpdate
+from server.utils.db_retry import is_transient, protect_module
 
 async def get_talent_by_name(name: str) -> Optional[TalentModel]:
     """按名称查找天赋"""
@@ -18,6 +19,8 @@ async def create_talent(talent: TalentCreate) -> Tuple[Optional[TalentModel], st
     except IntegrityError:
         return None, "数据冲突，可能存在同名天赋。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def get_talent(talent_id: int) -> Optional[TalentModel]:
@@ -50,6 +53,8 @@ async def update_talent(talent_id: int, talent_data: TalentUpdate) -> Tuple[Opti
     except IntegrityError:
         return None, "数据冲突，更新失败。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def delete_talent(talent_id: int) -> bool:
@@ -58,4 +63,7 @@ async def delete_talent(talent_id: int) -> bool:
     if talent:
         await talent.delete()
         return True
-    return False
\ No newline at end of file
+    return False
+
+
+protect_module(__name__)
@@ -1,10 +1,17 @@
-from typing import Optional, Tuple
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from tortoise.exceptions import IntegrityError
+from tortoise.functions import Count
 from server import auth
 from server.schemas import schema
-from server.models import PlayerAccount, AdminAccount
+from server.models import PlayerAccount, AdminAccount, CharacterBase
 
 from server.core import security
+from server.utils.db_retry import is_transient, protect_module
+
+# 批量统计角色数时每次 IN 查询的修者数
+COUNT_CHUNK_SIZE = 1000
+
 # --- 修者 (Player) 相关 ---
 
 async def get_player_by_username(user_name: str):
@@ -19,6 +26,51 @@ async def get_all_players():
     """获取所有修者列表。"""
     return await PlayerAccount.all()
 
+def filter_players(
+    keyword: Optional[str] = None,
+    is_banned: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+):
+    """按道号关键词、封禁状态与注册时间构造修者查询集。"""
+    qs = PlayerAccount.all()
+    if keyword:
+        qs = qs.filter(user_name__icontains=keyword)
+    if is_banned is not None:
+        qs = qs.filter(is_banned=is_banned)
+    if created_after:
+        qs = qs.filter(created_at__gte=created_after)
+    if created_before:
+        qs = qs.filter(created_at__lt=created_before)
+    return qs
+
+async def get_players_page(
+    skip: int = 0,
+    limit: int = 50,
+    keyword: Optional[str] = None,
+    is_banned: Optional[bool] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+) -> Tuple[List[PlayerAccount], int]:
+    """分页筛选修者列表，返回 (当前页, 总数)。"""
+    qs = filter_players(keyword, is_banned, created_after, created_before)
+    total = await qs.count()
+    players = await qs.order_by("id").offset(skip).limit(limit)
+    return players, total
+
+async def count_characters_by_player(player_ids: List[int]) -> Dict[int, int]:
+    """分组聚合统计多位修者的未删除角色数量（每 COUNT_CHUNK_SIZE 位一次查询）。"""
+    counts: Dict[int, int] = {}
+    for i in range(0, len(player_ids), COUNT_CHUNK_SIZE):
+        rows = await (
+            CharacterBase.filter(player_id__in=player_ids[i:i + COUNT_CHUNK_SIZE], is_deleted=False)
+            .annotate(character_count=Count("id"))
+            .group_by("player_id")
+            .values("player_id", "character_count")
+        )
+        counts.update((row["player_id"], row["character_count"]) for row in rows)
+    return counts
+
 async def update_player(player_id: int, player_data: schema.PlayerAccountUpdate) -> Tuple[Optional[PlayerAccount], str]:
     """更新修者信息。"""
     player = await get_player_by_id(player_id)
@@ -44,6 +96,8 @@ async def update_player(player_id: int, player_data: schema.PlayerAccountUpdate)
     except IntegrityError:
         return None, "数据冲突，更新失败。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def delete_player(player_id: int) -> bool:
@@ -64,6 +118,8 @@ async def change_password(player_id: int, new_password: str) -> Tuple[bool, str]
         await player.save()
         return True, "密码修改成功。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return False, f"修改密码失败: {e}"
 
 async def authenticate_admin(user_name: str, password: str) -> Optional[AdminAccount]:
@@ -95,6 +151,8 @@ async def create_player(player_data: schema.PlayerAccountCreate):
     except IntegrityError:
         return None, "数据冲突，可能道号已被占用。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 # --- 仙官 (Admin) 相关 ---
@@ -139,3 +197,6 @@ async def get_admin_by_username(user_name: str) -> Optional[AdminAccount]:
     根据道号查询仙官
     """
     return await AdminAccount.get_or_none(user_name=user_name)
+
+
+protect_module(__name__)
@@ -3,6 +3,7 @@ from tortoise.exceptions import IntegrityError
 
 from server.models import World, AdminAccount
 from server.schemas import schema
+from server.utils.db_retry import is_transient, protect_module
 
 async def get_world_by_name(name: str) -> Optional[World]:
     """
@@ -51,6 +52,8 @@ async def create_world(world: schema.WorldCreate) -> Tuple[Optional[World], str]
         return new_world, "新世界开辟成功！"
     except Exception as e:
         # 更通用的异常捕获
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def update_world(world_id: int, world_update: schema.WorldUpdate) -> Tuple[Optional[World], str]:
@@ -85,6 +88,8 @@ async def update_world(world_id: int, world_update: schema.WorldUpdate) -> Tuple
         # 捕获其他可能的唯一性约束冲突
         return None, "更新失败，可能存在数据冲突。"
     except Exception as e:
+        if is_transient(e):
+            raise
         return None, f"数据库错误: {e}"
 
 async def delete_world(world_id: int) -> bool:
@@ -96,3 +101,6 @@ async def delete_world(world_id: int) -> bool:
         await world.delete()
         return True
     return False
+
+
+protect_module(__name__)
@@ -0,0 +1,60 @@
+"""
+MySQL 连接后端（Tortoise engine：server.db_backends.mysql）
+
+在 Tortoise 自带的 MySQL 客户端基础上，为从连接池获取连接加上超时：
+连接池耗尽时请求最多等待 acquire_timeout 秒，然后以 DBConnectionError 失败，
+而不是无限排队把整个 worker 拖住。普通查询与事务获取连接都受此限制。
+"""
+
+import asyncio
+from typing import Any, Optional
+
+from tortoise.backends.base.client import PoolConnectionWrapper, TransactionContextPooled
+from tortoise.backends.mysql.client import MySQLClient as _MySQLClient
+from tortoise.backends.mysql.client import TransactionWrapper
+from tortoise.connection import connections
+from tortoise.exceptions import DBConnectionError
+
+
+async def _acquire(client: "MySQLClient") -> Any:
+    timeout = client.acquire_timeout
+    try:
+        return await asyncio.wait_for(client._pool.acquire(), timeout) if timeout else await client._pool.acquire()
+    except asyncio.TimeoutError:
+        raise DBConnectionError(f"获取数据库连接超时（{timeout} 秒），连接池已耗尽")
+
+
+class _TimeoutPoolConnectionWrapper(PoolConnectionWrapper):
+    __slots__ = ()
+
+    async def __aenter__(self) -> Any:
+        await self.ensure_connection()
+        self.connection = await _acquire(self.client)
+        return self.connection
+
+
+class _TimeoutTransactionContext(TransactionContextPooled):
+    __slots__ = ()
+
+    async def __aenter__(self) -> Any:
+        await self.ensure_connection()
+        # 先拿到连接再切换上下文中的连接，超时时不会留下悬空的事务连接
+        self.client._connection = await _acquire(self.client._parent)
+        self.token = connections.set(self.connection_name, self.client)
+        await self.client.begin()
+        return self.client
+
+
+class MySQLClient(_MySQLClient):
+    def __init__(self, *args: Any, acquire_timeout: Optional[float] = None, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.acquire_timeout = float(acquire_timeout) if acquire_timeout else None
+
+    def acquire_connection(self) -> Any:
+        return _TimeoutPoolConnectionWrapper(self, self._pool_init_lock)
+
+    def _in_transaction(self) -> Any:
+        return _TimeoutTransactionContext(TransactionWrapper(self), self._pool_init_lock)
+
+
+client_class = MySQLClient
@@ -0,0 +1,219 @@
+"""
+SQLite 连接后端（Tortoise engine：server.db_backends.sqlite）
+
+Tortoise 自带的 SQLite 客户端只有一个连接，读写都在同一把锁后排队。这里在其基础上：
+- 连接时应用 pragma（WAL、synchronous、cache_size、mmap_size、busy_timeout 等，由连接配置传入）
+- 读连接池：WAL 模式下读写互不阻塞，事务外的 SELECT 分发到 read_connections 个只读连接
+  （每个 aiosqlite 连接有独立线程，查询可并行执行）
+- 单写者队列：事务外的写语句进入队列，由后台任务把排队中的写入合并为一个事务提交，
+  每条语句一个 SAVEPOINT，单条失败只回滚自己；提交成功后才返回结果
+- 显式事务（in_transaction / atomic）仍独占写连接，与写队列互斥
+"""
+
+import asyncio
+import sqlite3
+from typing import Any, List, Optional, Sequence, Tuple
+
+import aiosqlite
+from tortoise.backends.sqlite.client import SqliteClient as _SqliteClient
+from tortoise.backends.sqlite.client import translate_exceptions
+
+# 作用于数据库文件或只影响写入的 pragma，读连接上不重复设置
+_DATABASE_PRAGMAS = ("journal_mode", "journal_size_limit", "synchronous", "foreign_keys")
+
+# (是否 insert, 语句, 参数, 结果 future)；None 表示停止写任务
+_WriteRequest = Tuple[bool, str, Optional[list], asyncio.Future]
+
+
+def _resolve(future: asyncio.Future, result: Any) -> None:
+    if not future.done():
+        future.set_result(result)
+
+
+def _fail(future: asyncio.Future, exc: BaseException) -> None:
+    if not future.done():
+        future.set_exception(exc)
+
+
+def _write_one(conn: sqlite3.Connection, insert: bool, query: str, values: Optional[list]) -> Any:
+    start = conn.total_changes
+    cursor = conn.execute(query, values or ())
+    try:
+        if insert:
+            return cursor.lastrowid
+        rows = cursor.fetchall()
+        return (conn.total_changes - start) or len(rows), rows
+    finally:
+        cursor.close()
+
+
+def _write_batch(conn: sqlite3.Connection, statements: List[Tuple[bool, str, Optional[list]]]) -> List[Tuple[bool, Any]]:
+    """在连接线程中执行一批写语句，返回每条的 (是否成功, 结果或异常)"""
+    outcomes: List[Tuple[bool, Any]] = []
+    if len(statements) == 1:
+        try:
+            outcomes.append((True, _write_one(conn, *statements[0])))
+        except Exception as exc:
+            outcomes.append((False, exc))
+        return outcomes
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for statement in statements:
+            conn.execute("SAVEPOINT batch_write")
+            try:
+                outcomes.append((True, _write_one(conn, *statement)))
+            except Exception as exc:
+                conn.execute("ROLLBACK TO batch_write")
+                outcomes.append((False, exc))
+            conn.execute("RELEASE batch_write")
+        conn.execute("COMMIT")
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    return outcomes
+
+
+class SqliteClient(_SqliteClient):
+    def __init__(
+        self,
+        file_path: str,
+        read_connections: int = 0,
+        write_batch_size: int = 0,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(file_path, **kwargs)
+        in_memory = file_path == ":memory:" or "mode=memory" in file_path
+        # 内存数据库无法在连接间共享，只能用单连接
+        self.read_connections = 0 if in_memory else int(read_connections)
+        self.write_batch_size = int(write_batch_size)
+        self._readers: Optional[asyncio.Queue] = None
+        self._reader_connections: List[aiosqlite.Connection] = []
+        self._readers_lock = asyncio.Lock()
+        self._writes: Optional[asyncio.Queue] = None
+        self._writer: Optional[asyncio.Task] = None
+
+    # ---- 读 ----
+
+    def _is_read(self, query: str) -> bool:
+        return bool(self.read_connections) and query.lstrip()[:6].upper() == "SELECT"
+
+    async def _open_readers(self) -> asyncio.Queue:
+        async with self._readers_lock:
+            if self._readers is None:
+                # 先由写连接创建数据库文件并切换到 WAL
+                await self.create_connection(with_db=True)
+                readers: asyncio.Queue = asyncio.Queue()
+                for _ in range(self.read_connections):
+                    connection = await aiosqlite.connect(self.filename, isolation_level=None)
+                    connection.row_factory = sqlite3.Row
+                    for pragma, val in self.pragmas.items():
+                        if pragma not in _DATABASE_PRAGMAS:
+                            await (await connection.execute(f"PRAGMA {pragma}={val}")).close()
+                    await (await connection.execute("PRAGMA query_only=ON")).close()
+                    self._reader_connections.append(connection)
+                    readers.put_nowait(connection)
+                self._readers = readers
+        return self._readers
+
+    async def _read(self, query: str, values: Optional[list]) -> Sequence[sqlite3.Row]:
+        readers = self._readers or await self._open_readers()
+        connection = await readers.get()
+        try:
+            self.log.debug("%s: %s", query, values)
+            return await connection.execute_fetchall(query, values)
+        finally:
+            readers.put_nowait(connection)
+
+    # ---- 写 ----
+
+    async def _submit(self, insert: bool, query: str, values: Optional[list]) -> Any:
+        loop = asyncio.get_running_loop()
+        if self._writer is None or self._writer.done() or self._writer.get_loop() is not loop:
+            self._writes = asyncio.Queue()
+            self._writer = loop.create_task(self._write_loop(self._writes))
+        future = loop.create_future()
+        self._writes.put_nowait((insert, query, values, future))
+        return await future
+
+    async def _write_loop(self, queue: asyncio.Queue) -> None:
+        while True:
+            request = await queue.get()
+            if request is None:
+                return
+            batch: List[_WriteRequest] = [request]
+            stop = False
+            # 不额外等待：上一批执行期间到达的写入自然合并到下一批
+            while len(batch) < self.write_batch_size and not queue.empty():
+                request = queue.get_nowait()
+                if request is None:
+                    stop = True
+                    break
+                batch.append(request)
+            try:
+                async with self.acquire_connection() as connection:
+                    await self._run_batch(connection, batch)
+            except Exception as exc:
+                for *_, future in batch:
+                    _fail(future, exc)
+            if stop:
+                return
+
+    async def _run_batch(self, connection: aiosqlite.Connection, batch: List[_WriteRequest]) -> None:
+        # 整批在 aiosqlite 的连接线程中一次执行，避免每条语句（及 SAVEPOINT）各自往返线程
+        statements = [(insert, query, values) for insert, query, values, _ in batch]
+        for query in statements:
+            self.log.debug("%s: %s", query[1], query[2])
+        try:
+            outcomes = await connection._execute(_write_batch, connection._conn, statements)
+        except Exception as exc:
+            for *_, future in batch:
+                _fail(future, exc)
+            return
+        for (*_, future), (ok, result) in zip(batch, outcomes):
+            if ok:
+                _resolve(future, result)
+            else:
+                _fail(future, result)
+
+    # ---- 入口 ----
+
+    @translate_exceptions
+    async def execute_insert(self, query: str, values: list) -> int:
+        if self.write_batch_size > 1:
+            return await self._submit(True, query, values)
+        return await super().execute_insert(query, values)
+
+    @translate_exceptions
+    async def execute_query(self, query: str, values: Optional[list] = None) -> Tuple[int, Sequence[dict]]:
+        if self._is_read(query):
+            rows = await self._read(query.replace("\x00", "'||CHAR(0)||'"), values)
+            return len(rows), rows
+        if self.write_batch_size > 1:
+            return await self._submit(False, query.replace("\x00", "'||CHAR(0)||'"), values)
+        return await super().execute_query(query, values)
+
+    @translate_exceptions
+    async def execute_query_dict(self, query: str, values: Optional[list] = None) -> List[dict]:
+        if self._is_read(query):
+            return list(map(dict, await self._read(query.replace("\x00", "'||CHAR(0)||'"), values)))
+        return await super().execute_query_dict(query, values)
+
+    async def close(self) -> None:
+        writer, self._writer = self._writer, None
+        if writer is not None and not writer.done():
+            if writer.get_loop() is asyncio.get_running_loop():
+                # 先写完已排队的语句
+                self._writes.put_nowait(None)
+                await writer
+            else:
+                writer.cancel()
+        for connection in self._reader_connections:
+            await connection.close()
+        self._reader_connections.clear()
+        self._readers = None
+        await super().close()
+
+
+client_class = SqliteClient
@@ -1,12 +1,15 @@
 import sys
 import os
 import asyncio
+import math
+import secrets
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.datastructures import Default
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, Response
 from tortoise import Tortoise
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -15,6 +18,11 @@ from server.api.api_v1.api import api_router
 from server.crud import crud_user
 from server.database import TORTOISE_ORM
 from server.core.seed_all import initialize_database
+from server.core.config import settings
+from server.core import attribute_formulas
+from server.utils import workshop_ranking, ban_scheduler, code_filter, metrics, query_tracker, loop_monitor, db_routing, db_retry, rules_snapshot
+from server.utils.responses import FastJSONResponse
+from server.utils.compression import CompressionMiddleware
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
@@ -29,6 +37,7 @@ async def lifespan(app: FastAPI):
             print(f"--- 尝试连接数据库 ({attempt + 1}/{max_retries})... ---")
             await asyncio.wait_for(Tortoise.init(config=TORTOISE_ORM), timeout=30.0)
             await asyncio.wait_for(Tortoise.generate_schemas(), timeout=30.0)
+            query_tracker.instrument_db()
             print("--- 数据库连接成功。---")
             break
         except asyncio.TimeoutError:
@@ -51,9 +60,32 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         print(f"--- 种子数据初始化失败: {str(e)[:100]} ---")
         print("--- 服务器将以基础模式运行。 ---")
+
+    try:
+        await attribute_formulas.reload()
+    except Exception as e:
+        print(f"--- 属性公式加载失败，使用默认公式: {str(e)[:100]} ---")
+
+    try:
+        await code_filter.rebuild()
+    except Exception as e:
+        print(f"--- 兑换码过滤器加载失败，将直接查库: {str(e)[:100]} ---")
+
+    workshop_ranking.start()
+    ban_scheduler.start()
+    code_filter.start()
+    rules_snapshot.start()
+    attribute_formulas.start()
+    loop_monitor.start()
     
     yield
     
+    await loop_monitor.stop()
+    await workshop_ranking.stop()
+    await ban_scheduler.stop()
+    await code_filter.stop()
+    await rules_snapshot.stop()
+    await attribute_formulas.stop()
     try:
         await Tortoise.close_connections()
         print("--- 服务器关闭，灵气归于混沌。 ---")
@@ -65,17 +97,39 @@ app = FastAPI(
     title="仙途 - 后端灵脉",
     description="为仙途项目提供数据支持的核心API。",
     version="3.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # 用 Default() 包装：未声明 response_model 的路由改用 orjson 输出，
+    # 声明了 response_model 的路由仍走 FastAPI 内置的 Pydantic 直出 JSON 快路径
+    default_response_class=Default(FastJSONResponse),
 )
 
+app.add_middleware(db_retry.DBDeadlineMiddleware)
+if db_routing.replica_enabled():
+    app.add_middleware(db_routing.DBRoutingMiddleware)
+# 指标中间件放在压缩中间件内侧：解压请求体时会替换 scope，外侧拿不到匹配到的路由
+app.add_middleware(query_tracker.QueryTrackingMiddleware)
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(CompressionMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # 分页总数放在响应头中，跨域时需显式暴露
+    expose_headers=["X-Total-Count"],
 )
 
+@app.exception_handler(db_retry.DatabaseUnavailableError)
+async def database_unavailable_handler(request: Request, exc: db_retry.DatabaseUnavailableError):
+    """ 数据库熔断期间快速返回 503，提示客户端稍后重试 """
+    return FastJSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(max(1, math.ceil(exc.retry_after)))},
+    )
+
 @app.get("/")
 def read_root():
     """ 根路径，确认服务是否正常运转 """
@@ -87,6 +141,15 @@ def health_check():
     """ 健康检查端点 """
     return {"status": "healthy", "message": "服务运行正常"}
 
+@app.get("/metrics", include_in_schema=False)
+def metrics_endpoint(request: Request):
+    """ Prometheus 指标 """
+    if settings.METRICS_TOKEN:
+        auth = request.headers.get("authorization", "")
+        if not secrets.compare_digest(auth.encode(), f"Bearer {settings.METRICS_TOKEN}".encode()):
+            return Response(status_code=401, headers={"WWW-Authenticate": "Bearer"})
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # 挂载静态文件 - 管理后台（检查目录存在）
 static_admin_path = os.path.join(os.path.dirname(__file__), "static", "admin")
 
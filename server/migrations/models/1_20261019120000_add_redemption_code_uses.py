@@ -0,0 +1,18 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `redemption_code_uses` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `used_at` DATETIME(6) NOT NULL COMMENT '使用时间' DEFAULT CURRENT_TIMESTAMP(6),
+    `code_id` INT NOT NULL,
+    `player_id` INT NOT NULL,
+    CONSTRAINT `fk_redempti_redempti_8c1f3e2a` FOREIGN KEY (`code_id`) REFERENCES `redemption_codes` (`id`) ON DELETE CASCADE,
+    CONSTRAINT `fk_redempti_player_a_5d7b9c41` FOREIGN KEY (`player_id`) REFERENCES `player_accounts` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4 COMMENT='兑换码使用流水（每消耗一次记录一条，用于审计）';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS `redemption_code_uses`;"""
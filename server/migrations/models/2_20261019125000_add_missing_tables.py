@@ -0,0 +1,45 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `workshop_items` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `type` VARCHAR(32) NOT NULL COMMENT '内容类型',
+    `title` VARCHAR(120) NOT NULL COMMENT '标题',
+    `description` LONGTEXT COMMENT '说明',
+    `tags` JSON COMMENT '标签数组',
+    `payload` JSON NOT NULL COMMENT '导出的内容',
+    `game_version` VARCHAR(32) COMMENT '内容对应的游戏版本',
+    `data_version` VARCHAR(32) COMMENT '内容格式版本（预留）',
+    `downloads` INT NOT NULL COMMENT '下载次数' DEFAULT 0,
+    `likes` INT NOT NULL COMMENT '点赞数（预留）' DEFAULT 0,
+    `is_public` BOOL NOT NULL COMMENT '是否公开' DEFAULT 1,
+    `is_deleted` BOOL NOT NULL COMMENT '是否删除（软删除）' DEFAULT 0,
+    `created_at` DATETIME(6) NOT NULL COMMENT '创建时间' DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL COMMENT '更新时间' DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `author_id` INT NOT NULL COMMENT '作者',
+    CONSTRAINT `fk_workshop_player_a_9bb5dea4` FOREIGN KEY (`author_id`) REFERENCES `player_accounts` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4 COMMENT='玩家之间分享的内容载体：';
+        CREATE TABLE IF NOT EXISTS `email_verification_codes` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `email` VARCHAR(255) NOT NULL COMMENT '邮箱地址',
+    `code` VARCHAR(10) NOT NULL COMMENT '验证码',
+    `purpose` VARCHAR(32) NOT NULL COMMENT '用途：register/reset_password' DEFAULT 'register',
+    `created_at` DATETIME(6) NOT NULL COMMENT '创建时间' DEFAULT CURRENT_TIMESTAMP(6),
+    `expires_at` DATETIME(6) NOT NULL COMMENT '过期时间',
+    `is_used` BOOL NOT NULL COMMENT '是否已使用' DEFAULT 0
+) CHARACTER SET utf8mb4 COMMENT='邮箱验证码';
+        CREATE TABLE IF NOT EXISTS `ip_rate_limit_records` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `ip_address` VARCHAR(64) NOT NULL COMMENT 'IP地址',
+    `action` VARCHAR(32) NOT NULL COMMENT '操作类型' DEFAULT 'register',
+    `created_at` DATETIME(6) NOT NULL COMMENT '记录时间' DEFAULT CURRENT_TIMESTAMP(6)
+) CHARACTER SET utf8mb4 COMMENT='IP限流记录';"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS `ip_rate_limit_records`;
+        DROP TABLE IF EXISTS `email_verification_codes`;
+        DROP TABLE IF EXISTS `workshop_items`;"""
@@ -0,0 +1,55 @@
+from typing import Dict, List, Tuple
+
+from tortoise import BaseDBAsyncClient
+
+# (表名, 索引名, 列)；索引名与 generate_schemas 生成的一致
+INDEXES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("ip_rate_limit_records", "idx_ip_rate_lim_ip_addr_6be7a4", ("ip_address", "action", "created_at")),
+    ("ip_rate_limit_records", "idx_ip_rate_lim_created_5afd49", ("created_at",)),
+    ("email_verification_codes", "idx_email_verif_email_eccc19", ("email", "purpose", "is_used", "expires_at")),
+    ("player_ban_records", "idx_player_ban__player__a4091e", ("player_id", "is_active")),
+    ("workshop_items", "idx_workshop_it_is_dele_6ea9e5", ("is_deleted", "is_public", "type", "created_at")),
+    ("workshop_items", "idx_workshop_it_is_dele_ab2924", ("is_deleted", "is_public", "created_at")),
+    ("character_bases", "idx_character_b_player__93e200", ("player_id", "is_deleted")),
+]
+
+# 没有需要执行的语句时返回的占位语句（空脚本在 MySQL 上会报错）
+NOOP = "SELECT 1;"
+
+
+async def _existing_indexes(db: BaseDBAsyncClient, table: str) -> Dict[str, Tuple[str, ...]]:
+    """读取表上已有的索引：索引名 -> 列"""
+    rows = await db.execute_query_dict(
+        "SELECT `INDEX_NAME`, `COLUMN_NAME` FROM information_schema.statistics "
+        "WHERE `TABLE_SCHEMA` = DATABASE() AND `TABLE_NAME` = %s ORDER BY `INDEX_NAME`, `SEQ_IN_INDEX`",
+        [table],
+    )
+    indexes: Dict[str, List[str]] = {}
+    for row in rows:
+        indexes.setdefault(row["INDEX_NAME"], []).append(row["COLUMN_NAME"])
+    return {name: tuple(columns) for name, columns in indexes.items()}
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    # 数据库可能先由 generate_schemas 建过表与索引，已存在的索引（同名或同列）跳过，避免 Duplicate key name
+    statements = []
+    existing: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+    for table, name, columns in INDEXES:
+        if table not in existing:
+            existing[table] = await _existing_indexes(db, table)
+        if name in existing[table] or columns in existing[table].values():
+            continue
+        column_sql = ", ".join(f"`{column}`" for column in columns)
+        statements.append(f"ALTER TABLE `{table}` ADD INDEX `{name}` ({column_sql});")
+    return "\n".join(statements) or NOOP
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    statements = []
+    existing: Dict[str, Dict[str, Tuple[str, ...]]] = {}
+    for table, name, _ in reversed(INDEXES):
+        if table not in existing:
+            existing[table] = await _existing_indexes(db, table)
+        if name in existing[table]:
+            statements.append(f"ALTER TABLE `{table}` DROP INDEX `{name}`;")
+    return "\n".join(statements) or NOOP
@@ -133,6 +133,8 @@ class CharacterBase(Model):
     
     class Meta:
         table = "character_bases"
+        # 按玩家列出未删除角色
+        indexes = (("player_id", "is_deleted"),)
 
 
 class GameSave(Model):
@@ -172,6 +174,8 @@ class PlayerBanRecord(Model):
 
     class Meta:
         table = "player_ban_records"
+        # 查询/解除玩家的生效封号
+        indexes = (("player_id", "is_active"),)
 
 class RedemptionCode(Model):
     id = fields.IntField(pk=True)
@@ -187,6 +191,16 @@ class RedemptionCode(Model):
     class Meta:
         table = "redemption_codes"
 
+class RedemptionCodeUse(Model):
+    """兑换码使用流水（每消耗一次记录一条，用于审计）"""
+    id = fields.IntField(pk=True)
+    code = fields.ForeignKeyField("models.RedemptionCode", related_name="uses")
+    player = fields.ForeignKeyField("models.PlayerAccount", related_name="redemption_uses")
+    used_at = fields.DatetimeField(auto_now_add=True, description="使用时间")
+
+    class Meta:
+        table = "redemption_code_uses"
+
 class SystemConfig(Model):
    key = fields.CharField(max_length=100, pk=True, description="配置键")
    value = fields.JSONField(description="配置值")
@@ -230,6 +244,11 @@ class WorkshopItem(Model):
 
     class Meta:
         table = "workshop_items"
+        # 工坊列表：公开且未删除，按类型筛选后按时间倒序（未筛类型时用第二个）
+        indexes = (
+            ("is_deleted", "is_public", "type", "created_at"),
+            ("is_deleted", "is_public", "created_at"),
+        )
 
 
 # --- 邮箱验证码 ---
@@ -246,6 +265,8 @@ class EmailVerificationCode(Model):
 
     class Meta:
         table = "email_verification_codes"
+        # 作废旧验证码与校验验证码
+        indexes = (("email", "purpose", "is_used", "expires_at"),)
 
 
 # --- IP限流记录 ---
@@ -259,3 +280,5 @@ class IPRateLimitRecord(Model):
 
     class Meta:
         table = "ip_rate_limit_records"
+        # 统计窗口内请求数；created_at 单列索引用于清理过期记录
+        indexes = (("ip_address", "action", "created_at"), ("created_at",))
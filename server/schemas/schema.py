@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Any, Dict
 import datetime
 
@@ -272,6 +272,31 @@ class PlayerBanCreate(BaseModel):
     reason: str
     ban_end_time: Optional[datetime.datetime] = None
 
+class PlayerBanFilter(BaseModel):
+    """批量封禁/解封时按条件圈定玩家"""
+    user_name_contains: Optional[str] = None
+    registered_after: Optional[datetime.datetime] = None
+    registered_before: Optional[datetime.datetime] = None
+
+class PlayerBulkBanCreate(BaseModel):
+    player_ids: Optional[List[int]] = None
+    filter: Optional[PlayerBanFilter] = None
+    reason: str
+    ban_end_time: Optional[datetime.datetime] = None
+
+class PlayerBulkUnban(BaseModel):
+    player_ids: Optional[List[int]] = None
+    filter: Optional[PlayerBanFilter] = None
+
+class BulkBanItemResult(BaseModel):
+    player_id: int
+    status: str  # banned / unbanned / already_banned / not_banned / not_found
+    message: str
+
+class BulkBanResponse(BaseModel):
+    affected: int
+    results: List[BulkBanItemResult]
+
 class AppealCreate(BaseModel):
     ban_record_id: int
     appeal_reason: str
@@ -287,6 +312,13 @@ class RedemptionCode(BaseModel):
     created_at: datetime.datetime
     model_config = ConfigDict(from_attributes=True)
 
+class RedemptionCodeUse(BaseModel):
+    id: int
+    code_id: int
+    player_id: int
+    used_at: datetime.datetime
+    model_config = ConfigDict(from_attributes=True)
+
 class RedemptionCodeCreate(BaseModel):
     code: str
     type: str
@@ -299,6 +331,15 @@ class RedemptionCodeAdminCreate(BaseModel):
     payload: Dict[str, Any]
     max_uses: int = 1
 
+class RedemptionCodeBatchCreate(BaseModel):
+    type: str
+    payload: Dict[str, Any] = {}
+    max_uses: int = 1
+    count: int = Field(..., ge=1, le=100000)
+    length: int = Field(12, ge=6, le=32)
+    alphabet: Optional[str] = None
+    prefix: str = Field("", max_length=16)
+
 # --- 系统配置 ---
 
 class SystemConfigBase(BaseModel):
@@ -315,6 +356,20 @@ class SystemConfig(SystemConfigBase):
    model_config = ConfigDict(from_attributes=True)
 
 
+# --- 衍生属性公式 ---
+
+class AttributeFormula(BaseModel):
+    """单条衍生属性公式：value = base + 来源属性 * per_point"""
+    source: Optional[str] = None
+    base: Optional[int | float] = None
+    per_point: Optional[int | float] = None
+    round: Optional[int] = Field(None, ge=0, le=6)
+
+class AttributeFormulasResponse(BaseModel):
+    formulas: Dict[str, Dict[str, Any]]
+    overrides: Dict[str, Dict[str, Any]]
+
+
 # --- 系统安全配置（后台管理用） ---
 
 class TurnstileConfigUpdate(BaseModel):
@@ -4,6 +4,11 @@
       let currentTab = 'players'
       let currentEditItem = null
       const API_BASE = '/api/v1'
+      // 玩家列表分页（/users/ 按 skip/limit 分页，总数在 X-Total-Count 响应头中）
+      const PLAYERS_PAGE_SIZE = 50
+      // 封号弹窗中最多列出的玩家数（/users/ 单页上限）
+      const BAN_MODAL_PLAYER_LIMIT = 500
+      let playersPage = 1
 
       async function readResponsePayload(response) {
         const contentType = response.headers.get('content-type') || ''
@@ -180,6 +185,9 @@
           btn.classList.remove('active')
         })
         document.querySelector(`[data-tab="${tabName}"]`).classList.add('active')
+        if (tabName === 'players') {
+          playersPage = 1
+        }
 
         // 显示/隐藏添加按钮
         const addBtn = document.getElementById('addItemBtn')
@@ -235,7 +243,7 @@
 
           switch (tabName) {
             case 'players':
-              endpoint = '/users/'
+              endpoint = `/users/?skip=${(playersPage - 1) * PLAYERS_PAGE_SIZE}&limit=${PLAYERS_PAGE_SIZE}`
               columns = ['ID', '用户名', '创建时间', '状态', '操作']
               formatRow = (item) => {
                 const canEdit = currentUser?.role === 'super_admin'
@@ -578,6 +586,17 @@
 
           const data = await response.json()
           const rows = tabName === 'workshop' ? data.items || [] : data
+          if (tabName === 'players') {
+            const total = Number(response.headers.get('X-Total-Count') || rows.length)
+            // 删除最后一页的最后一位玩家后回退到上一页
+            if (rows.length === 0 && playersPage > 1) {
+              playersPage = Math.max(1, Math.ceil(total / PLAYERS_PAGE_SIZE))
+              return loadTabData(tabName)
+            }
+            displayTable(columns, rows, formatRow)
+            renderPlayersPagination(total)
+            return
+          }
           displayTable(columns, rows, formatRow)
         } catch (error) {
           console.error('数据加载失败:', error)
@@ -624,6 +643,24 @@
            `
       }
 
+      // 玩家列表分页条
+      function renderPlayersPagination(total) {
+        const pages = Math.max(1, Math.ceil(total / PLAYERS_PAGE_SIZE))
+        const pagination = document.createElement('div')
+        pagination.className = 'pagination'
+        pagination.innerHTML = `
+               <button class="btn btn-sm btn-secondary" ${playersPage <= 1 ? 'disabled' : ''} onclick="changePlayersPage(-1)">上一页</button>
+               <span>第 ${playersPage} / ${pages} 页，共 ${total} 位玩家</span>
+               <button class="btn btn-sm btn-secondary" ${playersPage >= pages ? 'disabled' : ''} onclick="changePlayersPage(1)">下一页</button>
+           `
+        tableContainer.appendChild(pagination)
+      }
+
+      function changePlayersPage(delta) {
+        playersPage = Math.max(1, playersPage + delta)
+        loadTabData('players')
+      }
+
       // 显示表格错误
       function showTableError(message) {
         tableContainer.innerHTML = `
@@ -1504,21 +1541,22 @@
         playerSelect.disabled = true
 
         try {
-          const response = await fetch(`${API_BASE}/users/`, {
-            headers: { Authorization: `Bearer ${authToken}` },
-          })
+          // 只取未封禁的玩家，且最多一页
+          const response = await fetch(
+            `${API_BASE}/users/?is_banned=false&limit=${BAN_MODAL_PLAYER_LIMIT}`,
+            { headers: { Authorization: `Bearer ${authToken}` } },
+          )
           if (!response.ok) throw new Error('无法获取玩家列表')
 
-          const players = await response.json()
-          const normalPlayers = players.filter((p) => !p.is_banned)
+          const normalPlayers = await response.json()
+          const total = Number(response.headers.get('X-Total-Count') || normalPlayers.length)
 
-          if (selectedPlayerId) {
-            const isSelectedPlayerInList = normalPlayers.some((p) => p.id === selectedPlayerId)
-            if (!isSelectedPlayerInList) {
-              const selectedPlayer = players.find((p) => p.id === selectedPlayerId)
-              if (selectedPlayer) {
-                normalPlayers.unshift(selectedPlayer)
-              }
+          if (selectedPlayerId && !normalPlayers.some((p) => p.id === selectedPlayerId)) {
+            const selectedResponse = await fetch(`${API_BASE}/users/${selectedPlayerId}`, {
+              headers: { Authorization: `Bearer ${authToken}` },
+            })
+            if (selectedResponse.ok) {
+              normalPlayers.unshift(await selectedResponse.json())
             }
           }
 
@@ -1534,6 +1572,12 @@
             option.textContent = `${player.user_name} (ID: ${player.id})`
             playerSelect.appendChild(option)
           })
+          if (total > BAN_MODAL_PLAYER_LIMIT) {
+            const option = document.createElement('option')
+            option.disabled = true
+            option.textContent = `…… 共 ${total} 位玩家，仅列出前 ${BAN_MODAL_PLAYER_LIMIT} 位，其余请在玩家列表中点击“封号”`
+            playerSelect.appendChild(option)
+          }
 
           if (selectedPlayerId) {
             playerSelect.value = selectedPlayerId
@@ -0,0 +1,105 @@
+"""批量计算与逐个计算的一致性"""
+
+import array
+import random
+
+import pytest
+
+from server.core import attribute_formulas
+from server.core.attribute_formulas import INNATE_ATTRIBUTES
+from server.core.character_calculation import (
+    calculate_core_attributes,
+    calculate_core_attributes_batch,
+)
+
+
+def _rows(count, low=0, high=10, seed=7):
+    rng = random.Random(seed)
+    return [[rng.randint(low, high) for _ in INNATE_ATTRIBUTES] for _ in range(count)]
+
+
+def _columns(rows):
+    return [list(col) for col in zip(*rows)]
+
+
+def _assert_matches_scalar(batch, rows, ages):
+    for i, (row, age) in enumerate(zip(rows, ages)):
+        expected = calculate_core_attributes(*row, current_age=age)
+        for field, column in batch.items():
+            assert column[i] == expected[field], (field, row)
+            assert type(column[i]) is type(expected[field]) or hasattr(column[i], "dtype"), (field, row)
+
+
+def test_batch_matches_scalar_in_domain():
+    rows = _rows(500)
+    batch = calculate_core_attributes_batch(*_columns(rows))
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+
+def test_batch_covers_every_domain_value():
+    values = list(range(attribute_formulas.ATTRIBUTE_MIN, attribute_formulas.ATTRIBUTE_MAX + 1))
+    rows = [[v] * len(INNATE_ATTRIBUTES) for v in values]
+    batch = calculate_core_attributes_batch(*_columns(rows))
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+
+def test_batch_out_of_range_falls_back_to_formula():
+    rows = _rows(200, low=-5, high=20)
+    batch = calculate_core_attributes_batch(*_columns(rows))
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+
+def test_batch_float_values_fall_back_to_formula():
+    rows = [[2.5, 3, 4.0, 0, 10, 7.25], [0, 0, 0, 0, 0, 0.5]]
+    batch = calculate_core_attributes_batch(*_columns(rows))
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+
+def test_batch_accepts_array_module_columns():
+    rows = _rows(100, seed=11)
+    columns = [array.array("i", col) for col in _columns(rows)]
+    batch = calculate_core_attributes_batch(*columns)
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+
+def test_batch_numpy_columns_match_scalar():
+    np = pytest.importorskip("numpy")
+    rows = _rows(300, seed=3)
+    batch = calculate_core_attributes_batch(*[np.array(col) for col in _columns(rows)])
+    _assert_matches_scalar(batch, rows, [16] * len(rows))
+
+    mixed = _rows(100, low=-3, high=15, seed=5)
+    batch = calculate_core_attributes_batch(*[np.array(col) for col in _columns(mixed)])
+    _assert_matches_scalar(batch, mixed, [16] * len(mixed))
+
+    floats = [[1.5, 2, 3, 4, 5, 6], [0, 0, 9.75, 1, 1, 1]]
+    batch = calculate_core_attributes_batch(*[np.array(col, dtype=float) for col in _columns(floats)])
+    _assert_matches_scalar(batch, floats, [16] * len(floats))
+
+
+def test_batch_per_row_ages():
+    rows = _rows(50, seed=9)
+    ages = [random.Random(i).randint(0, 18) for i in range(len(rows))]
+    batch = calculate_core_attributes_batch(*_columns(rows), current_age=ages)
+    _assert_matches_scalar(batch, rows, ages)
+
+
+def test_batch_rejects_mismatched_lengths():
+    columns = _columns(_rows(10))
+    columns[2] = columns[2][:-1]
+    with pytest.raises(ValueError):
+        calculate_core_attributes_batch(*columns)
+    with pytest.raises(ValueError):
+        calculate_core_attributes_batch(*_columns(_rows(10)), current_age=[16] * 9)
+
+
+def test_batch_uses_active_formulas():
+    previous = attribute_formulas.active()
+    try:
+        attribute_formulas.activate({"max_qi_blood": {"base": 100, "per_point": 20}})
+        rows = _rows(50, low=-2, high=12, seed=13)
+        batch = calculate_core_attributes_batch(*_columns(rows))
+        _assert_matches_scalar(batch, rows, [16] * len(rows))
+        assert batch["max_qi_blood"][0] == 100 + rows[0][0] * 20
+    finally:
+        attribute_formulas.activate(previous.definitions)
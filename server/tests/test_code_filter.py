@@ -0,0 +1,96 @@
+"""兑换码布隆过滤器：多个 worker 共用同一个代次键"""
+
+import asyncio
+import importlib.util
+
+from tortoise import Tortoise
+
+from server.crud import crud_redemption
+from server.models import RedemptionCode
+from server.utils import code_filter
+
+
+def _worker(name):
+    """加载一份独立的 code_filter 模块，模拟另一个 worker 进程中的过滤器"""
+    spec = importlib.util.spec_from_file_location(f"code_filter_{name}", code_filter.__file__)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _run(test):
+    async def main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["server.models"]})
+        try:
+            await Tortoise.generate_schemas()
+            await RedemptionCode.create(code="OLD-1", max_uses=1)
+            workers = _worker("a"), _worker("b")
+            for worker in workers:
+                await worker.rebuild()
+            await test(*workers)
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+
+
+def test_code_published_by_another_worker_is_not_rejected():
+    async def test(a, b):
+        assert await a.might_exist("OLD-1") and await b.might_exist("OLD-1")
+        assert not await a.might_exist("NEW-1") and not await b.might_exist("NEW-1")
+
+        # worker A 新建兑换码并发布新代次；B 还没有执行过 sync()
+        await RedemptionCode.create(code="NEW-1", max_uses=1)
+        a.add("NEW-1")
+        await a.publish()
+
+        assert await a.might_exist("NEW-1")
+        assert await b.might_exist("NEW-1")
+        # B 发现代次变化后在重建完成前全部放行
+        assert b.stats()["stale"] == 1
+        assert await b.might_exist("NOPE")
+        await b._rebuild_task
+        assert b.stats()["stale"] == 0
+        assert await b.might_exist("NEW-1")
+        assert not await b.might_exist("NOPE")
+        # 之后的 sync() 不会再次重建
+        assert not await b.sync()
+        # 发布方自己的过滤器同样按新代次重建一次
+        await a.sync()
+        assert not await a.might_exist("NOPE")
+        assert await a.might_exist("NEW-1")
+
+    _run(test)
+
+
+def test_concurrent_misses_share_generation_reads():
+    async def test(a, _):
+        reads = []
+        read_generation = a._read_generation
+
+        async def counting_read():
+            reads.append(1)
+            await asyncio.sleep(0.01)
+            return await read_generation()
+
+        a._read_generation = counting_read
+        results = await asyncio.gather(*(a.might_exist(f"MISSING-{i}") for i in range(50)))
+        assert not any(results)
+        # 第一次读取进行中到达的请求共用第二次读取
+        assert len(reads) <= 2
+        assert a.stats()["rejected"] == 50
+
+    _run(test)
+
+
+def test_redeem_sees_code_from_another_worker(monkeypatch):
+    async def test(a, b):
+        monkeypatch.setattr(crud_redemption, "code_filter", b)
+        await RedemptionCode.create(code="NEW-2", max_uses=1)
+        a.add("NEW-2")
+        await a.publish()
+
+        code, message = await crud_redemption.get_code_by_string("NEW-2")
+        assert code is not None and code.code == "NEW-2", message
+
+    _run(test)
@@ -0,0 +1,49 @@
+"""角色创建模拟：按稀有度加权选取，并按稀有度分组汇总"""
+
+from server.core import creation_simulator
+from server.core.seed_talent_tiers import talent_tier_data
+
+SAMPLES = 20_000
+
+
+def _tier_rates(report):
+    return {name: option["pick_rate"] for name, option in report["options"]["tier"].items()}
+
+
+def test_rarity_weighting_follows_rarity_values():
+    report = creation_simulator.simulate(SAMPLES, workers=1, seed=1)
+    assert report["weighting"] == "rarity"
+
+    total = sum(t["rarity"] for t in talent_tier_data)
+    rates = _tier_rates(report)
+    for tier in talent_tier_data:
+        assert abs(rates[tier["name"]] - tier["rarity"] / total) < 0.015
+        assert report["options"]["tier"][tier["name"]]["rarity"] == tier["rarity"]
+
+
+def test_uniform_weighting_ignores_rarity():
+    report = creation_simulator.simulate(SAMPLES, workers=1, seed=1, weighting="uniform")
+    for rate in _tier_rates(report).values():
+        assert abs(rate - 1 / len(talent_tier_data)) < 0.015
+
+
+def test_report_groups_by_rarity():
+    report = creation_simulator.simulate(SAMPLES, workers=1, seed=2)
+    rarity = report["rarity"]
+    assert set(rarity) == set(creation_simulator.KINDS)
+
+    # 每个天资等级稀有度各不相同：分组与按名称的统计一致
+    for tier in talent_tier_data:
+        group = rarity["tier"][str(tier["rarity"])]
+        option = report["options"]["tier"][tier["name"]]
+        assert group["options"] == [tier["name"]]
+        assert group["pick_rate"] == option["pick_rate"]
+        assert group["avg_points_spent"] == option["avg_points_spent"]
+        assert group["innate_attributes"]["root_bone"]["count"] == round(option["pick_rate"] * SAMPLES)
+        assert group["derived_attributes"]["max_lifespan"]["count"] == round(option["pick_rate"] * SAMPLES)
+
+    # 出身稀有度分组的样本数之和等于选了出身的样本数
+    origin_samples = sum(g["innate_attributes"]["root_bone"]["count"] for g in rarity["origin"].values())
+    assert origin_samples == round(sum(o["pick_rate"] for o in report["options"]["origin"].values()) * SAMPLES)
+    # 灵根没有稀有度，归入同一组
+    assert list(rarity["spirit_root"]) == ["None"]
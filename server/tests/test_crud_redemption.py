@@ -0,0 +1,91 @@
+"""兑换码 crud：瞬时故障要抛给 protect_module，计入熔断器"""
+
+import asyncio
+
+import pytest
+from tortoise import Tortoise
+from tortoise.exceptions import DBConnectionError
+
+from server.core.config import settings
+from server.crud import crud_redemption
+from server.models import RedemptionCode
+from server.utils import code_filter, db_retry
+
+
+@pytest.fixture
+def breaker(monkeypatch):
+    breaker = db_retry.CircuitBreaker(failure_threshold=100, reset_timeout=60)
+    monkeypatch.setattr(db_retry, "breaker", breaker)
+    monkeypatch.setattr(settings, "DB_RETRY_BASE_DELAY", 0.001)
+    monkeypatch.setattr(settings, "DB_RETRY_MAX_DELAY", 0.001)
+
+    async def might_exist(code):
+        return True
+
+    monkeypatch.setattr(code_filter, "might_exist", might_exist)
+    return breaker
+
+
+def _run(test):
+    async def main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["server.models"]})
+        try:
+            await Tortoise.generate_schemas()
+            await test()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+
+
+def _failing(calls, exc):
+    def query(*args, **kwargs):
+        calls.append(1)
+        raise exc
+
+    return query
+
+
+def test_transient_failure_in_lookup_is_retried_and_counted(breaker, monkeypatch):
+    calls = []
+    monkeypatch.setattr(RedemptionCode, "get_or_none", _failing(calls, DBConnectionError("connection lost")))
+
+    async def test():
+        with pytest.raises(DBConnectionError):
+            await crud_redemption.get_code_by_string("ANY")
+
+    _run(test)
+    # 只读查询按 DB_RETRY_MAX_RETRIES 重试，每次失败都计入熔断器
+    assert len(calls) == settings.DB_RETRY_MAX_RETRIES + 1
+    assert breaker.failures == len(calls)
+
+
+def test_transient_failure_in_use_code_reaches_breaker(breaker, monkeypatch):
+    calls = []
+    monkeypatch.setattr(RedemptionCode, "filter", _failing(calls, DBConnectionError("connection lost")))
+    breaker.failure_threshold = 2
+
+    async def test():
+        for _ in range(2):
+            with pytest.raises(DBConnectionError):
+                await crud_redemption.use_code("ANY", 1)
+        # 熔断后不再访问数据库
+        with pytest.raises(db_retry.DatabaseUnavailableError):
+            await crud_redemption.use_code("ANY", 1)
+
+    _run(test)
+    # 写操作不重试
+    assert len(calls) == 2
+    assert breaker.state == db_retry.OPEN
+
+
+def test_other_errors_still_return_message(breaker, monkeypatch):
+    monkeypatch.setattr(RedemptionCode, "get_or_none", _failing([], ValueError("bad value")))
+    breaker.failures = 3
+
+    async def test():
+        code, message = await crud_redemption.get_code_by_string("ANY")
+        assert code is None and "bad value" in message
+
+    _run(test)
+    assert breaker.failures == 0
@@ -0,0 +1,40 @@
+"""热点查询执行计划：每条都应命中索引"""
+
+import asyncio
+
+from tortoise import Tortoise
+
+from server.benchmarks import explain
+
+ROWS = 2000
+
+
+def _db_url(tmp_path):
+    return f"sqlite://{tmp_path / 'explain.sqlite3'}"
+
+
+def test_hot_queries_use_indexes(tmp_path):
+    results = asyncio.run(explain.run(_db_url(tmp_path), ROWS, seed_value=1, create_schema=True))
+
+    assert [name for name, _, _ in results] == [name for name, _, _ in explain.hot_queries()]
+    scans = [f"{name}: {plan}" for name, ok, plan in results if not ok]
+    assert not scans, "\n".join(scans)
+
+
+def test_missing_index_is_reported(tmp_path):
+    async def main():
+        await Tortoise.init(db_url=_db_url(tmp_path), modules={"models": ["server.models"]})
+        try:
+            await Tortoise.generate_schemas()
+            connection = Tortoise.get_connection("default")
+            for index in await connection.execute_query_dict(
+                "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='ip_rate_limit_records'"
+            ):
+                await connection.execute_script(f'DROP INDEX "{index["name"]}"')
+            return await explain.check(ROWS, seed_value=1)
+        finally:
+            await Tortoise.close_connections()
+
+    results = {name: ok for name, ok, _ in asyncio.run(main())}
+    assert not results["rate_limit.count"]
+    assert results["workshop.latest"]
@@ -0,0 +1,53 @@
+"""迁移脚本：索引迁移在索引已存在时跳过"""
+
+import asyncio
+import importlib
+
+indexes = importlib.import_module("server.migrations.models.3_20261019130000_add_hot_query_indexes")
+
+
+class _Statistics:
+    """只实现迁移用到的 execute_query_dict：按表返回 information_schema.statistics 的行"""
+
+    def __init__(self, tables):
+        self.tables = tables
+
+    async def execute_query_dict(self, query, values):
+        assert "information_schema.statistics" in query
+        return [
+            {"INDEX_NAME": name, "COLUMN_NAME": column}
+            for name, columns in self.tables.get(values[0], {}).items()
+            for column in columns
+        ]
+
+
+def _all_indexes():
+    tables = {}
+    for table, name, columns in indexes.INDEXES:
+        tables.setdefault(table, {})[name] = columns
+    return tables
+
+
+def test_upgrade_on_fresh_database_adds_every_index():
+    sql = asyncio.run(indexes.upgrade(_Statistics({})))
+    assert sql.count("ADD INDEX") == len(indexes.INDEXES)
+    assert "ALTER TABLE `workshop_items` ADD INDEX `idx_workshop_it_is_dele_ab2924` " \
+           "(`is_deleted`, `is_public`, `created_at`);" in sql
+    assert asyncio.run(indexes.downgrade(_Statistics({}))) == indexes.NOOP
+
+
+def test_upgrade_after_generate_schemas_skips_existing_indexes():
+    tables = _all_indexes()
+    assert asyncio.run(indexes.upgrade(_Statistics(tables))) == indexes.NOOP
+
+    # 只缺一个；另一个以不同名字存在同列索引
+    del tables["character_bases"]["idx_character_b_player__93e200"]
+    tables["ip_rate_limit_records"]["manual_created_at"] = tables["ip_rate_limit_records"].pop(
+        "idx_ip_rate_lim_created_5afd49"
+    )
+    sql = asyncio.run(indexes.upgrade(_Statistics(tables)))
+    assert sql == "ALTER TABLE `character_bases` ADD INDEX `idx_character_b_player__93e200` (`player_id`, `is_deleted`);"
+
+    sql = asyncio.run(indexes.downgrade(_Statistics(tables)))
+    assert sql.count("DROP INDEX") == len(indexes.INDEXES) - 2
+    assert "manual_created_at" not in sql
@@ -0,0 +1,136 @@
+"""按请求统计查询数与 N+1 检测（内存 SQLite）"""
+
+import asyncio
+import re
+
+import httpx
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+from tortoise import Tortoise
+
+from server.models import PlayerAccount
+from server.utils import query_tracker
+from server.utils.query_tracker import (
+    QueryTrackingMiddleware,
+    assert_max_queries,
+    normalize_sql,
+    track_queries,
+)
+
+PLAYERS = 4
+
+
+def _run(test):
+    """在内存 SQLite 上跑一个异步测试：建表、挂上查询计时、插入若干玩家"""
+
+    async def main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["server.models"]})
+        try:
+            await Tortoise.generate_schemas()
+            query_tracker.instrument_db()
+            for i in range(PLAYERS):
+                await PlayerAccount.create(user_name=f"p{i}", password="x")
+            await test()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+
+
+async def _n_plus_one(request):
+    # 逐个玩家再查一次角色：1 + N 条查询
+    players = await PlayerAccount.all().order_by("id")
+    counts = [await player.characters.all().count() for player in players]
+    return JSONResponse(counts)
+
+
+async def _prefetched(request):
+    players = await PlayerAccount.all().order_by("id").prefetch_related("characters")
+    return JSONResponse([len(player.characters) for player in players])
+
+
+async def _single(request):
+    return JSONResponse(await PlayerAccount.all().count())
+
+
+def _app():
+    app = Starlette(routes=[
+        Route("/n-plus-one", _n_plus_one),
+        Route("/prefetched", _prefetched),
+        Route("/single", _single),
+    ])
+    app.add_middleware(QueryTrackingMiddleware)
+    return app
+
+
+def _client():
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=_app()), base_url="http://test")
+
+
+def _query_count(response):
+    match = re.fullmatch(r'db;dur=[\d.]+;desc="(\d+) queries"', response.headers["server-timing"])
+    assert match, response.headers["server-timing"]
+    return int(match.group(1))
+
+
+def test_normalize_sql_groups_literals_and_in_lists():
+    a = normalize_sql("SELECT * FROM t WHERE id IN (?,?,?) AND name='a''b'")
+    b = normalize_sql("SELECT  *  FROM t\nWHERE id IN (?, ?) AND name='c'")
+    assert a == b == "SELECT * FROM t WHERE id IN (?, ...) AND name=?"
+    assert normalize_sql("SELECT * FROM t WHERE id=42 LIMIT 10") == "SELECT * FROM t WHERE id=? LIMIT ?"
+    assert normalize_sql("SELECT col1 FROM t2") == "SELECT col1 FROM t2"
+
+
+def test_server_timing_counts_queries_per_request():
+    async def test():
+        async with _client() as client:
+            single = await client.get("/single")
+            n_plus_one = await client.get("/n-plus-one")
+        assert _query_count(single) == 1
+        assert _query_count(n_plus_one) == 1 + PLAYERS
+
+    _run(test)
+
+
+def test_concurrent_requests_do_not_share_counts():
+    async def test():
+        async with _client() as client:
+            responses = await asyncio.gather(
+                *(client.get(path) for path in ["/n-plus-one", "/single"] * 3)
+            )
+        assert [_query_count(r) for r in responses] == [1 + PLAYERS, 1] * 3
+
+    _run(test)
+
+
+def test_assert_max_queries_reports_n_plus_one():
+    async def test():
+        async with _client() as client:
+            with pytest.raises(AssertionError) as excinfo:
+                with assert_max_queries(2):
+                    await client.get("/n-plus-one")
+            message = str(excinfo.value)
+            assert f"执行了 {1 + PLAYERS} 条查询，上限为 2" in message
+            # 逐个玩家的查询按归一化 SQL 归为一组
+            assert f"{PLAYERS} x SELECT" in message
+
+            with assert_max_queries(2) as log:
+                await client.get("/prefetched")
+            assert log.count == 2
+
+    _run(test)
+
+
+def test_track_queries_outside_requests():
+    async def test():
+        assert query_tracker.current() is None
+        with track_queries() as log:
+            await PlayerAccount.filter(user_name="p0").first()
+            await PlayerAccount.filter(user_name="p1").first()
+        assert log.count == 2
+        assert log.summary() == [(2, log.summary()[0][1])]
+        assert "player_accounts" in log.summary()[0][1]
+
+    _run(test)
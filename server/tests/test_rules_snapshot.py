@@ -0,0 +1,85 @@
+"""规则快照缓存：规则修改通过 SystemConfig 代次通知所有 worker"""
+
+import asyncio
+
+from tortoise import Tortoise
+
+from server.models import Origin
+from server.utils import rules_snapshot
+from server.utils.system_config import get_config, set_config
+
+
+def _run(monkeypatch, test):
+    async def main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["server.models"]})
+        try:
+            await Tortoise.generate_schemas()
+            await Origin.create(name="世家", rarity=3, talent_cost=2)
+            monkeypatch.setattr(rules_snapshot, "_generation", None)
+            rules_snapshot._clear()
+            await rules_snapshot.sync()
+            await test()
+        finally:
+            rules_snapshot._clear()
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+
+
+async def _origin_costs():
+    data = await rules_snapshot.get_creation_data("origin", None)
+    return [origin["talent_cost"] for origin in data["origins"]]
+
+
+def test_generation_from_another_worker_clears_cache(monkeypatch):
+    async def test():
+        assert await _origin_costs() == [2]
+        # 另一个 worker 修改了规则并写入新代次；本进程的信号不会触发
+        await Origin.filter(name="世家").update(talent_cost=5)
+        await set_config(rules_snapshot.GENERATION_KEY, "other-worker")
+        assert await _origin_costs() == [2]
+
+        assert await rules_snapshot.sync()
+        assert await _origin_costs() == [5]
+        assert not await rules_snapshot.sync()
+
+    _run(monkeypatch, test)
+
+
+def test_local_change_publishes_generation(monkeypatch):
+    async def test():
+        before = await get_config(rules_snapshot.GENERATION_KEY)
+        assert await _origin_costs() == [2]
+
+        origin = await Origin.get(name="世家")
+        origin.talent_cost = 7
+        await origin.save()
+
+        after = await get_config(rules_snapshot.GENERATION_KEY)
+        assert after and after != before
+        assert await _origin_costs() == [7]
+        # 自己写入的代次不会让本进程再清空一次
+        assert not await rules_snapshot.sync()
+        assert rules_snapshot.stats()["merged_entries"] == 1
+
+    _run(monkeypatch, test)
+
+
+def test_sync_during_load_discards_stale_result(monkeypatch):
+    async def test():
+        load_origin = rules_snapshot._LOADERS["origin"]
+
+        async def slow_load():
+            data = await load_origin()
+            # 加载期间其他 worker 修改了规则
+            await Origin.filter(name="世家").update(talent_cost=9)
+            await set_config(rules_snapshot.GENERATION_KEY, "other-worker")
+            assert await rules_snapshot.sync()
+            return data
+
+        monkeypatch.setitem(rules_snapshot._LOADERS, "origin", slow_load)
+        assert await _origin_costs() == [2]
+        monkeypatch.setitem(rules_snapshot._LOADERS, "origin", load_origin)
+        assert await _origin_costs() == [9]
+
+    _run(monkeypatch, test)
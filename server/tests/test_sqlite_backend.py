@@ -0,0 +1,76 @@
+"""SQLite 单写者队列：一批写入中单条失败只影响自己"""
+
+import asyncio
+
+import pytest
+from tortoise import Tortoise
+
+from server.database import _sqlite_config
+from server.db_backends import sqlite as sqlite_backend
+from server.models import PlayerAccount
+
+
+def _run(tmp_path, monkeypatch, test):
+    """在临时文件数据库上启用写队列跑异步测试，返回每批的语句数"""
+    batch_sizes = []
+    write_batch = sqlite_backend._write_batch
+
+    def recording_write_batch(conn, statements):
+        batch_sizes.append(len(statements))
+        return write_batch(conn, statements)
+
+    monkeypatch.setattr(sqlite_backend, "_write_batch", recording_write_batch)
+    connection = _sqlite_config(f"sqlite://{tmp_path / 'db.sqlite3'}")
+    connection["credentials"]["write_batch_size"] = 16
+
+    async def main():
+        await Tortoise.init(config={
+            "connections": {"default": connection},
+            "apps": {"models": {"models": ["server.models"], "default_connection": "default"}},
+        })
+        try:
+            await Tortoise.generate_schemas()
+            batch_sizes.clear()
+            await test()
+        finally:
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+    return batch_sizes
+
+
+def test_failing_statement_only_fails_its_own_future(tmp_path, monkeypatch):
+    async def test():
+        results = await asyncio.gather(
+            PlayerAccount.create(user_name="a", password="x"),
+            # 超出 SQLite 整数范围：sqlite3 抛出的是 OverflowError 而不是 sqlite3.Error
+            PlayerAccount.create(id=2 ** 70, user_name="overflow", password="x"),
+            PlayerAccount.create(user_name="b", password="x"),
+            # 违反唯一约束
+            PlayerAccount.create(user_name="a", password="x"),
+            PlayerAccount.create(user_name="c", password="x"),
+            return_exceptions=True,
+        )
+        assert isinstance(results[1], OverflowError)
+        assert isinstance(results[3], Exception)
+        created = [results[i] for i in (0, 2, 4)]
+        assert all(isinstance(player, PlayerAccount) for player in created)
+        names = await PlayerAccount.all().order_by("id").values_list("user_name", flat=True)
+        assert names == ["a", "b", "c"]
+        assert [player.id for player in created] == list(
+            await PlayerAccount.all().order_by("id").values_list("id", flat=True)
+        )
+
+    batch_sizes = _run(tmp_path, monkeypatch, test)
+    # 几条写入确实合并进了同一批
+    assert max(batch_sizes) > 1
+
+
+def test_single_failing_statement(tmp_path, monkeypatch):
+    async def test():
+        with pytest.raises(OverflowError):
+            await PlayerAccount.create(id=2 ** 70, user_name="overflow", password="x")
+        await PlayerAccount.create(user_name="after", password="x")
+        assert await PlayerAccount.all().values_list("user_name", flat=True) == ["after"]
+
+    _run(tmp_path, monkeypatch, test)
@@ -0,0 +1,127 @@
+"""创意工坊热度排行：排序、分页、移除，以及热门列表的关键词/冷启动路径"""
+
+import asyncio
+from datetime import datetime, timedelta
+
+from tortoise import Tortoise
+
+from server.api.api_v1.endpoints import workshop
+from server.models import PlayerAccount, WorkshopItem
+from server.utils import workshop_ranking
+from server.utils.workshop_ranking import WorkshopRanking, hot_key
+
+NOW = datetime.utcnow()
+
+
+def _ranking():
+    ranking = WorkshopRanking()
+    # (id, type, downloads, likes, 发布于几天前)
+    for item_id, item_type, downloads, likes, days in [
+        (1, "settings", 0, 0, 0),
+        (2, "prompts", 100, 0, 0),
+        (3, "settings", 10, 5, 1),
+        (4, "saves", 1000, 0, 30),
+        (5, "prompts", 0, 0, 0),
+    ]:
+        ranking.upsert(item_id, item_type, downloads, likes, NOW - timedelta(days=days))
+    return ranking
+
+
+def _expected(ranking, ids):
+    return sorted(ids, key=lambda i: (-ranking._items[i][0], i))
+
+
+def test_order_is_hot_key_descending_with_id_tiebreak():
+    ranking = _ranking()
+    ids, total = ranking.page(limit=10)
+    assert total == 5
+    assert ids == _expected(ranking, [1, 2, 3, 4, 5])
+    # 发布时间与计数都相同时按ID升序
+    assert ids.index(1) + 1 == ids.index(5)
+    assert hot_key(100, 0, 0) > hot_key(0, 0, 0)
+    assert list(ranking.iter_ids()) == ids
+
+
+def test_page_slices_by_type_and_week():
+    ranking = _ranking()
+    everything, _ = ranking.page(limit=10)
+    assert ranking.page(offset=1, limit=2) == (everything[1:3], 5)
+    assert ranking.page(offset=10, limit=2) == ([], 5)
+    assert ranking.page("prompts", limit=10) == (_expected(ranking, [2, 5]), 2)
+    assert ranking.page("unknown") == ([], 0)
+
+    week = [i for i in everything if i != 4]
+    assert ranking.page(week_only=True, limit=10) == (week, 4)
+    assert ranking.page(week_only=True, offset=1, limit=2) == (week[1:3], 4)
+    assert list(ranking.iter_ids("saves", week_only=True)) == []
+
+
+def test_discard_and_hidden_upsert_remove_from_every_board():
+    ranking = _ranking()
+    ranking.discard(2)
+    ranking.upsert(3, "settings", 10, 5, NOW, visible=False)
+    ranking.discard(42)
+    assert ranking.page(limit=10) == (_expected(ranking, [1, 4, 5]), 3)
+    assert ranking.page("prompts", limit=10) == ([5], 1)
+    assert ranking.page("settings", limit=10) == ([1], 1)
+    assert 2 not in ranking._items and 3 not in ranking._items
+
+    # 计数变化后重新排序
+    ranking.upsert(1, "settings", 10 ** 6, 0, NOW)
+    assert ranking.page(limit=1) == ([1], 3)
+
+
+def _run(test):
+    async def main():
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["server.models"]})
+        saved = workshop_ranking.ranking._items, workshop_ranking.ranking._boards
+        try:
+            await Tortoise.generate_schemas()
+            author = await PlayerAccount.create(user_name="author", password="x")
+            for i in range(12):
+                await WorkshopItem.create(
+                    type="settings", title=f"{'match' if i % 3 == 0 else 'other'} {i}", payload={},
+                    author=author, downloads=(i * 7) % 11,
+                )
+            workshop_ranking.ranking.clear()
+            workshop_ranking.ranking.ready = False
+            await test()
+        finally:
+            workshop_ranking.ranking._items, workshop_ranking.ranking._boards = saved
+            workshop_ranking.ranking.ready = False
+            await Tortoise.close_connections()
+
+    asyncio.run(main())
+
+
+async def _list(**params):
+    params = {"item_type": None, "q": None, "page": 1, "page_size": 20, "sort": "hot", **params}
+    return await workshop.list_workshop_items(**params)
+
+
+def test_hot_list_waits_for_ranking_and_filters_keyword_in_rank_order(monkeypatch):
+    async def test():
+        # 冷启动：等待重建后从排行取序
+        result = await _list()
+        assert workshop_ranking.ranking.ready
+        hot = [item.id for item in result.items]
+        assert hot == workshop_ranking.ranking.page(limit=20)[0]
+        assert result.total == 12
+
+        # 关键词：按排行顺序过滤，分块核对也保持顺序
+        monkeypatch.setattr(workshop, "KEYWORD_SCAN_CHUNK", 2)
+        matching = [i for i in hot if (await WorkshopItem.get(id=i)).title.startswith("match")]
+        result = await _list(q="match")
+        assert [item.id for item in result.items] == matching
+        assert result.total == len(matching) == 4
+        result = await _list(q="match", page=2, page_size=3)
+        assert [item.id for item in result.items] == matching[3:]
+        assert result.total == 4
+
+        # 其他 worker 删除的条目从排行中移出
+        await WorkshopItem.filter(id=hot[0]).delete()
+        result = await _list()
+        assert hot[0] not in [item.id for item in result.items]
+        assert hot[0] not in workshop_ranking.ranking._items
+
+    _run(test)
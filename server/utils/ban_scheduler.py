@@ -0,0 +1,179 @@
+"""
+临时封号到期调度
+
+启动时从数据库加载所有生效中的临时封号，放入按到期时间排序的最小堆；
+后台任务睡眠到最近一个到期点，醒来后把已到期的记录一次性批量解除，
+并同步修正 PlayerAccount.is_banned。这样账号状态在到期时即刻恢复，
+不再依赖玩家自己调用 /ban/check_ban_status 触发。
+
+新建封号时调用 schedule() 登记；已被手动解封的记录在到期时会被
+`is_active=True` 条件自然过滤掉，无需显式取消。
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, List, Optional, Set, Tuple
+
+from tortoise.expressions import Subquery
+from tortoise.transactions import in_transaction
+
+from server.database import PRIMARY_CONNECTION
+from server.models import PlayerAccount, PlayerBanRecord
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 到期时间相近的记录合并到同一批处理（秒）
+BATCH_WINDOW = 1.0
+# 没有待处理记录时的最长睡眠时间（秒），用于兜底重新加载
+IDLE_RELOAD_INTERVAL = 3600
+
+# (到期时间戳, 封号记录ID, 玩家ID)
+_heap: List[Tuple[float, int, int]] = []
+_wakeup: Optional[asyncio.Event] = None
+_task: Optional[asyncio.Task] = None
+
+# 到期解封后的回调（例如清理按玩家缓存的认证状态），参数为被解封的玩家ID集合
+_expire_listeners: List[Callable[[Set[int]], Awaitable[None]]] = []
+
+
+def _utc_ts(dt: datetime) -> float:
+    """无时区的时间按 UTC 处理（与 datetime.utcnow() 的用法保持一致）"""
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def add_expire_listener(callback: Callable[[Set[int]], Awaitable[None]]) -> None:
+    """注册到期解封回调"""
+    _expire_listeners.append(callback)
+
+
+def pending_count() -> int:
+    return len(_heap)
+
+
+def schedule(record_id: int, player_id: int, ban_end_time: Optional[datetime]) -> None:
+    """登记一条临时封号，永久封号（无结束时间）直接忽略"""
+    if ban_end_time is None:
+        return
+    entry = (_utc_ts(ban_end_time), record_id, player_id)
+    heapq.heappush(_heap, entry)
+    # 新记录比当前最早的更早时唤醒调度循环重新计时
+    if _wakeup is not None and _heap[0] == entry:
+        _wakeup.set()
+
+
+async def load() -> int:
+    """从数据库加载生效中的临时封号"""
+    rows = await PlayerBanRecord.filter(
+        is_active=True, ban_end_time__isnull=False
+    ).values("id", "player_id", "ban_end_time")
+    _heap.clear()
+    _heap.extend((_utc_ts(row["ban_end_time"]), row["id"], row["player_id"]) for row in rows)
+    heapq.heapify(_heap)
+    logger.info("已加载 %d 条待到期的临时封号", len(_heap))
+    return len(_heap)
+
+
+async def expire(record_ids: List[int], player_ids: Set[int]) -> Set[int]:
+    """
+    批量解除到期封号，返回实际被解封的玩家ID集合
+    """
+    released: Set[int] = set()
+    async with in_transaction(PRIMARY_CONNECTION):
+        await PlayerBanRecord.filter(id__in=record_ids, is_active=True).update(is_active=False)
+
+        candidates = [
+            player.id
+            for player in await PlayerAccount.filter(id__in=list(player_ids), is_banned=True)
+            .select_for_update()
+            .only("id")
+        ]
+        if candidates:
+            # "没有其他生效封号"的判断放在同一条 UPDATE 里：仍有生效封号（如永久封号、
+            # 刚刚新建的封号）的玩家保持封禁，不会在检查与更新之间被误解封
+            await PlayerAccount.filter(id__in=candidates, is_banned=True).exclude(
+                id__in=Subquery(
+                    PlayerBanRecord.filter(player_id__in=candidates, is_active=True).values("player_id")
+                )
+            ).update(is_banned=False)
+            released = set(
+                await PlayerAccount.filter(id__in=candidates, is_banned=False).values_list("id", flat=True)
+            )
+
+    for callback in _expire_listeners:
+        try:
+            await callback(released)
+        except Exception as e:
+            logger.warning("封号到期回调执行失败: %s", e)
+    return released
+
+
+def _pop_due(now: float) -> Tuple[List[int], Set[int]]:
+    record_ids: List[int] = []
+    player_ids: Set[int] = set()
+    while _heap and _heap[0][0] <= now + BATCH_WINDOW:
+        _, record_id, player_id = heapq.heappop(_heap)
+        record_ids.append(record_id)
+        player_ids.add(player_id)
+    return record_ids, player_ids
+
+
+async def _run() -> None:
+    global _wakeup
+    _wakeup = asyncio.Event()
+    last_load = None
+
+    while True:
+        try:
+            if last_load is None or time.monotonic() - last_load >= IDLE_RELOAD_INTERVAL:
+                await load()
+                last_load = time.monotonic()
+
+            record_ids, player_ids = _pop_due(time.time())
+            if record_ids:
+                released = await expire(record_ids, player_ids)
+                logger.info("临时封号到期：解除 %d 条记录，解封 %d 名玩家", len(record_ids), len(released))
+                continue
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # 出错后稍等片刻从数据库重新加载，未成功解除的记录会被重新登记
+            logger.warning("临时封号到期处理失败: %s", e)
+            last_load = None
+            await asyncio.sleep(5)
+            continue
+
+        timeout = IDLE_RELOAD_INTERVAL
+        if _heap:
+            timeout = min(timeout, max(0.0, _heap[0][0] - time.time()))
+        _wakeup.clear()
+        try:
+            await asyncio.wait_for(_wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+
+def start() -> None:
+    """启动到期调度任务（在应用生命周期内调用）"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+metrics.gauge("ban_scheduler_pending", "等待到期解封的临时封号数", pending_count)
@@ -0,0 +1,287 @@
+"""
+兑换码布隆过滤器
+
+脚本刷码时绝大多数请求携带的都是不存在的兑换码。启动时把全部兑换码
+装入内存中的布隆过滤器，查询前先过一遍：过滤器判定"不存在"的兑换码
+一定不存在，直接拒绝，不再访问数据库；判定"可能存在"的才真正查库。
+
+- 新建兑换码时调用 add() 登记；删除不做处理（残留只会产生一次多余的查库）
+- 条目数超过容量时在后台按两倍容量重建
+- 多进程部署：兑换码写入数据库后调用 publish() 在 SystemConfig 中写入新的代次。
+  过滤器判定"不存在"时，先读一次当前代次再拒绝：代次与过滤器一致才拒绝，
+  否则放行查库并在后台重建，因此其他 worker 刚新建的兑换码不会被误拒。
+  并发的确认共用同一次读取（只读 SystemConfig 的一行），刷码时对数据库的压力
+  不随请求数增长；各 worker 另外每 SYNC_INTERVAL 秒主动检查一次代次
+- 键统一做 rstrip/upper 归一化，保证在大小写不敏感的 MySQL 排序规则下也不会误拒
+"""
+
+import asyncio
+import hashlib
+import logging
+import math
+import uuid
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from server.models import RedemptionCode
+from server.utils import metrics
+from server.utils.system_config import get_config, set_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CAPACITY = 100_000
+FALSE_POSITIVE_RATE = 0.001
+LOAD_CHUNK_SIZE = 5000
+# SystemConfig 中记录兑换码代次的键，以及各 worker 检查代次的间隔（秒）
+GENERATION_KEY = "redemption_code_generation"
+SYNC_INTERVAL = 1.0
+
+
+def _normalize(code: str) -> bytes:
+    return code.rstrip(" ").upper().encode("utf-8")
+
+
+class BloomFilter:
+    """基于双重哈希的定长布隆过滤器"""
+
+    __slots__ = ("capacity", "size", "hash_count", "bits", "count")
+
+    def __init__(self, capacity: int, error_rate: float = FALSE_POSITIVE_RATE) -> None:
+        capacity = max(1, capacity)
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: bytes) -> Iterable[int]:
+        digest = hashlib.blake2b(key, digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        size = self.size
+        return ((h1 + i * h2) % size for i in range(self.hash_count))
+
+    def add(self, key: bytes) -> None:
+        bits = self.bits
+        for pos in self._positions(key):
+            bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, key: bytes) -> bool:
+        bits = self.bits
+        return all(bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+_filter: Optional[BloomFilter] = None
+# 重建期间新增的兑换码，重建完成后补登记
+_pending: Optional[List[bytes]] = None
+_rebuild_task: Optional[asyncio.Task] = None
+_sync_task: Optional[asyncio.Task] = None
+_rebuild_lock = asyncio.Lock()
+# 当前过滤器对应的兑换码代次；发现数据库中的代次变化后，重建完成前 _stale 为 True
+_generation: Optional[str] = None
+_stale = False
+# sync() 最近一次读到的代次
+_latest_generation: Optional[str] = None
+_synced = False
+# 拒绝前确认代次：已开始的读取次数，以及最近一次成功读取的 (序号, 代次)
+_confirm_lock = asyncio.Lock()
+_confirm_started = 0
+_confirmed: Optional[Tuple[int, Optional[str]]] = None
+
+_stats: Dict[str, int] = {
+    "checks": 0,            # 经过过滤器的查询次数
+    "rejected": 0,          # 被过滤器直接拒绝（节省的数据库查询）
+    "passed": 0,            # 放行去查库
+    "false_positives": 0,   # 放行后数据库中仍不存在
+}
+
+
+def is_ready() -> bool:
+    return _filter is not None
+
+
+async def might_exist(code: str) -> bool:
+    """
+    兑换码是否可能存在；过滤器未就绪或落后于最新代次时一律放行
+    过滤器判定不存在时，确认数据库中的代次与过滤器一致后才返回 False
+    """
+    if _filter is None or _stale:
+        return True
+    _stats["checks"] += 1
+    key = _normalize(code)
+    if key in _filter:
+        _stats["passed"] += 1
+        return True
+    generation = await _confirm_generation()
+    # 等待期间过滤器可能已按新代次重建，需按当前过滤器再判断一次
+    if _filter is not None and not _stale and generation == _generation and key not in _filter:
+        _stats["rejected"] += 1
+        return False
+    # 其他 worker 新建了兑换码：放行查库，并按新代次重建
+    _mark_stale(generation)
+    _stats["passed"] += 1
+    return True
+
+
+def record_false_positive() -> None:
+    if _filter is not None:
+        _stats["false_positives"] += 1
+
+
+def add(code: str) -> None:
+    """登记一个新兑换码"""
+    key = _normalize(code)
+    if _pending is not None:
+        _pending.append(key)
+    if _filter is None:
+        return
+    _filter.add(key)
+    if _filter.count > _filter.capacity:
+        schedule_rebuild()
+
+
+def add_many(codes: Iterable[str]) -> None:
+    for code in codes:
+        add(code)
+
+
+async def _read_generation() -> Optional[str]:
+    return await get_config(GENERATION_KEY)
+
+
+async def _confirm_generation() -> Optional[str]:
+    """
+    读取当前代次，只采用调用之后才开始的读取结果（调用前已提交的代次一定能看到）
+    并发调用排队共享：前一次读取进行中到达的调用共用下一次读取
+    """
+    global _confirm_started, _confirmed
+    arrived = _confirm_started
+    async with _confirm_lock:
+        if _confirmed is not None and _confirmed[0] > arrived:
+            return _confirmed[1]
+        _confirm_started += 1
+        seq = _confirm_started
+        generation = await _read_generation()
+        _confirmed = (seq, generation)
+        return generation
+
+
+def _mark_stale(generation: Optional[str]) -> None:
+    """发现新代次：重建完成前全部放行"""
+    global _stale, _latest_generation, _synced
+    _latest_generation, _synced = generation, True
+    if generation != _generation:
+        _stale = True
+        schedule_rebuild()
+
+
+async def publish() -> None:
+    """
+    通知其他 worker 有新的兑换码（写入新的代次）
+    须在兑换码写入的同一事务内或提交之后调用
+    """
+    await set_config(GENERATION_KEY, uuid.uuid4().hex)
+
+
+async def rebuild() -> int:
+    """从数据库全量重建过滤器，返回装入的兑换码数量"""
+    async with _rebuild_lock:
+        return await _rebuild()
+
+
+async def _rebuild() -> int:
+    global _filter, _pending, _generation, _stale
+    _pending = []
+    try:
+        # 先读代次再装载：装载期间的新代次会在下一次 sync() 时再次触发重建
+        generation = await _read_generation()
+        total = await RedemptionCode.all().count()
+        fresh = BloomFilter(max(DEFAULT_CAPACITY, total * 2))
+        last_id = 0
+        while True:
+            rows = await (
+                RedemptionCode.filter(id__gt=last_id)
+                .order_by("id")
+                .limit(LOAD_CHUNK_SIZE)
+                .values_list("id", "code")
+            )
+            if not rows:
+                break
+            for _, code in rows:
+                fresh.add(_normalize(code))
+            last_id = rows[-1][0]
+        for key in _pending:
+            fresh.add(key)
+        _filter = fresh
+        _generation = generation
+        # 与 sync() 最近看到的代次一致才恢复拒绝：较早开始的重建不能清除新的过期标记
+        _stale = _synced and generation != _latest_generation
+    finally:
+        _pending = None
+    logger.info("兑换码过滤器已重建：%d 条，容量 %d", _filter.count, _filter.capacity)
+    return _filter.count
+
+
+def schedule_rebuild() -> None:
+    global _rebuild_task
+    if _rebuild_task is None or _rebuild_task.done():
+        _rebuild_task = asyncio.create_task(rebuild())
+
+
+async def sync() -> bool:
+    """其他 worker 新建过兑换码（代次变化）时重建过滤器，返回是否重建"""
+    global _stale, _latest_generation, _synced
+    generation = await _read_generation()
+    _latest_generation, _synced = generation, True
+    if _filter is not None and generation == _generation:
+        _stale = False
+        return False
+    # 重建完成（或失败后下一次重试成功）之前全部放行查库
+    _stale = True
+    await rebuild()
+    return True
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL)
+        try:
+            await sync()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("兑换码过滤器同步失败: %s", e)
+
+
+def start() -> None:
+    """启动代次同步任务（在应用生命周期内调用）"""
+    global _sync_task
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+
+def stats() -> Dict[str, int]:
+    result = dict(_stats)
+    result["ready"] = int(_filter is not None)
+    result["stale"] = int(_stale)
+    result["entries"] = _filter.count if _filter else 0
+    result["capacity"] = _filter.capacity if _filter else 0
+    result["size_bytes"] = len(_filter.bits) if _filter else 0
+    return result
+
+
+metrics.gauge(
+    "code_filter_stats", "兑换码布隆过滤器状态",
+    lambda: {(k,): v for k, v in stats().items()}, ("stat",),
+)
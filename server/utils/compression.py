@@ -0,0 +1,341 @@
+"""
+响应压缩
+
+- 按 Accept-Encoding 协商 br / gzip（未安装 brotli 时只用 gzip）
+- 小于 minimum_size 的响应不压缩；已带 Content-Encoding 的响应原样放行
+- 大响应体在线程池中压缩，不阻塞事件循环；流式响应（导出等）逐块压缩并及时 flush
+- 客户端上传时带 Content-Encoding: gzip / br 的请求体在这里解压，解压后大小有上限
+- precompressed_response() 供可缓存的响应（规则总表等）复用压缩结果，同一内容只压缩一次
+"""
+
+import gzip
+import zlib
+from collections import OrderedDict
+from typing import Dict, Mapping, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.requests import Request
+from starlette.responses import PlainTextResponse, Response
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from server.utils import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli 为可选依赖
+    brotli = None
+
+MINIMUM_SIZE = 1024
+# 超过该大小的响应体放到线程池压缩
+THREAD_MINIMUM_SIZE = 128 * 1024
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+# 解压后的请求体上限（防压缩炸弹）
+MAX_REQUEST_BODY = 64 * 1024 * 1024
+# 预压缩缓存的条目数与总字节上限
+PRECOMPRESSED_MAX_ENTRIES = 256
+PRECOMPRESSED_MAX_BYTES = 64 * 1024 * 1024
+
+_DECOMPRESS_ERRORS = (ValueError, OSError, zlib.error) + ((brotli.error,) if brotli is not None else ())
+
+# 已经是压缩格式或需要实时推送的内容不再压缩
+EXCLUDED_CONTENT_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "text/event-stream")
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """根据 Accept-Encoding 选择编码，优先 br，其次 gzip；q=0 表示拒绝"""
+    accepted: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name] = quality
+
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+    wildcard = accepted.get("*", 0.0)
+    best, best_quality = None, 0.0
+    for name in candidates:
+        quality = accepted.get(name, wildcard)
+        if quality > best_quality:
+            best, best_quality = name, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+class _StreamCompressor:
+    """流式压缩：每块都 flush，保证客户端能及时收到已产出的数据"""
+
+    def __init__(self, encoding: str) -> None:
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._br.process(chunk) + self._br.flush()
+        return self._zlib.compress(chunk) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._br.finish()
+        return self._zlib.flush(zlib.Z_FINISH)
+
+
+def _decompress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        decompressor = brotli.Decompressor()
+        try:
+            output = decompressor.process(body, output_buffer_limit=MAX_REQUEST_BODY + 1)
+        except TypeError:  # brotli < 1.2 不支持输出上限
+            output = decompressor.process(body)
+        if len(output) > MAX_REQUEST_BODY or not decompressor.is_finished():
+            raise ValueError("请求体过大或不完整")
+        return output
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    output = decompressor.decompress(body, MAX_REQUEST_BODY + 1)
+    if len(output) > MAX_REQUEST_BODY or decompressor.unconsumed_tail:
+        raise ValueError("请求体过大")
+    return output
+
+
+def _weak_etag(headers: MutableHeaders) -> None:
+    # 压缩后的字节与原文不同，强 ETag 需改为弱 ETag
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["etag"] = "W/" + etag
+
+
+def _add_vary(headers: MutableHeaders) -> None:
+    vary = headers.get("vary")
+    if not vary:
+        headers["vary"] = "Accept-Encoding"
+    elif "accept-encoding" not in vary.lower():
+        headers["vary"] = vary + ", Accept-Encoding"
+
+
+class _CompressingSender:
+    def __init__(self, send: Send, encoding: str, minimum_size: int, thread_minimum_size: int) -> None:
+        self.send = send
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+        self.start_message: Optional[Message] = None
+        self.passthrough = False
+        self.streamer: Optional[_StreamCompressor] = None
+
+    async def __call__(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            headers = Headers(raw=message["headers"])
+            content_type = headers.get("content-type", "")
+            # 206 / Content-Range 的字节范围针对的是原始内容，压缩后范围就对不上了
+            if (
+                "content-encoding" in headers
+                or "content-range" in headers
+                or message["status"] in (204, 206, 304)
+                or content_type.startswith(EXCLUDED_CONTENT_TYPES)
+            ):
+                self.passthrough = True
+                await self.send(message)
+            else:
+                self.start_message = message
+            return
+
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.streamer is not None:
+            data = self.streamer.compress(body) if body else b""
+            if not more_body:
+                data += self.streamer.finish()
+            await self.send({"type": "http.response.body", "body": data, "more_body": more_body})
+            return
+
+        start = self.start_message
+        headers = MutableHeaders(raw=start["headers"])
+
+        if not more_body:
+            # 一次性响应：太小则原样发送
+            if len(body) < self.minimum_size:
+                await self.send(start)
+                await self.send(message)
+                return
+            if len(body) >= self.thread_minimum_size:
+                compressed = await run_in_threadpool(compress, body, self.encoding)
+            else:
+                compressed = compress(body, self.encoding)
+            headers["content-encoding"] = self.encoding
+            headers["content-length"] = str(len(compressed))
+            _add_vary(headers)
+            _weak_etag(headers)
+            await self.send(start)
+            await self.send({"type": "http.response.body", "body": compressed})
+            return
+
+        # 流式响应：逐块压缩
+        self.streamer = _StreamCompressor(self.encoding)
+        headers["content-encoding"] = self.encoding
+        if "content-length" in headers:
+            del headers["content-length"]
+        _add_vary(headers)
+        _weak_etag(headers)
+        await self.send(start)
+        await self.send({"type": "http.response.body", "body": self.streamer.compress(body), "more_body": True})
+
+
+class CompressionMiddleware:
+    """gzip / brotli 压缩中间件（纯 ASGI 实现，不缓冲流式响应）"""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = MINIMUM_SIZE,
+        thread_minimum_size: int = THREAD_MINIMUM_SIZE,
+    ) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.thread_minimum_size = thread_minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        request_encoding = headers.get("content-encoding", "").strip().lower()
+        if request_encoding in ("gzip", "br") and not (request_encoding == "br" and brotli is None):
+            try:
+                scope, receive = await self._decompress_request(scope, receive, request_encoding)
+            except _DECOMPRESS_ERRORS as e:
+                response = PlainTextResponse(f"请求体解压失败: {e}", status_code=400)
+                await response(scope, receive, send)
+                return
+
+        encoding = negotiate(headers.get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        sender = _CompressingSender(send, encoding, self.minimum_size, self.thread_minimum_size)
+        await self.app(scope, receive, sender)
+
+    async def _decompress_request(self, scope: Scope, receive: Receive, encoding: str) -> Tuple[Scope, Receive]:
+        chunks = []
+        size = 0
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                raise ValueError("客户端已断开")
+            chunk = message.get("body", b"")
+            size += len(chunk)
+            if size > MAX_REQUEST_BODY:
+                raise ValueError("请求体过大")
+            chunks.append(chunk)
+            if not message.get("more_body", False):
+                break
+        raw = b"".join(chunks)
+        if len(raw) >= THREAD_MINIMUM_SIZE:
+            body = await run_in_threadpool(_decompress, raw, encoding)
+        else:
+            body = _decompress(raw, encoding)
+
+        new_headers = [
+            (k, v) for k, v in scope["headers"] if k not in (b"content-encoding", b"content-length")
+        ]
+        new_headers.append((b"content-length", str(len(body)).encode("latin-1")))
+        scope = dict(scope, headers=new_headers)
+
+        sent = False
+
+        async def replay() -> Message:
+            nonlocal sent
+            if not sent:
+                sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        return scope, replay
+
+
+# 预压缩缓存：(缓存键, 编码) -> 压缩后的字节
+_precompressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+_precompressed_bytes = 0
+
+
+def _cache_put(key: Tuple[str, str], value: bytes) -> None:
+    global _precompressed_bytes
+    if len(value) > PRECOMPRESSED_MAX_BYTES:
+        return
+    old = _precompressed.pop(key, None)
+    if old is not None:
+        _precompressed_bytes -= len(old)
+    _precompressed[key] = value
+    _precompressed_bytes += len(value)
+    while len(_precompressed) > PRECOMPRESSED_MAX_ENTRIES or _precompressed_bytes > PRECOMPRESSED_MAX_BYTES:
+        _, evicted = _precompressed.popitem(last=False)
+        _precompressed_bytes -= len(evicted)
+
+
+async def precompressed_response(
+    request: Request,
+    cache_key: str,
+    body: bytes,
+    media_type: str = "application/json",
+    headers: Optional[Mapping[str, str]] = None,
+) -> Response:
+    """
+    返回可缓存内容的响应，压缩结果按 (cache_key, 编码) 缓存
+    cache_key 必须随内容变化（例如带上 ETag 或版本号）
+    """
+    response_headers = dict(headers or {})
+    encoding = negotiate(request.headers.get("accept-encoding", ""))
+    if encoding is None or len(body) < MINIMUM_SIZE:
+        return Response(content=body, media_type=media_type, headers=response_headers)
+
+    key = (cache_key, encoding)
+    compressed = _precompressed.get(key)
+    if compressed is None:
+        if len(body) >= THREAD_MINIMUM_SIZE:
+            compressed = await run_in_threadpool(compress, body, encoding)
+        else:
+            compressed = compress(body, encoding)
+        _cache_put(key, compressed)
+    else:
+        _precompressed.move_to_end(key)
+
+    response_headers["Content-Encoding"] = encoding
+    response_headers["Vary"] = "Accept-Encoding"
+    etag = response_headers.get("ETag")
+    if etag and not etag.startswith("W/"):
+        response_headers["ETag"] = "W/" + etag
+    return Response(content=compressed, media_type=media_type, headers=response_headers)
+
+
+def stats() -> Dict[str, int]:
+    return {
+        "precompressed_entries": len(_precompressed),
+        "precompressed_bytes": _precompressed_bytes,
+        "brotli_available": int(brotli is not None),
+    }
+
+
+metrics.gauge(
+    "compression_stats", "预压缩缓存状态",
+    lambda: {(k,): v for k, v in stats().items()}, ("stat",),
+)
@@ -1,54 +1,258 @@
+"""
+数据库瞬时故障重试与熔断
+
+- 只重试瞬时故障：连接失败/断开、连接池获取超时、MySQL 死锁与锁等待超时、SQLite 库被锁；
+  按驱动错误码判断，唯一约束冲突、SQL 错误等直接抛出
+- 只有只读（或整体在一个事务中、可安全重放）的操作才重试；写操作出错直接抛出，避免重复写入
+- 退避采用 decorrelated jitter：sleep = min(上限, random(base, 上次 sleep * 3))，避免重试同步成浪涌
+- 每个请求共享一份重试时长预算（DBDeadlineMiddleware），预算用完即放弃，不会把请求拖住数秒
+- 进程内共享一个熔断器：连续瞬时故障达到阈值后熔断，熔断期间直接抛出 DatabaseUnavailableError（503），
+  到期后放行一个探测调用，成功即恢复
+- 嵌套调用（被保护的函数互相调用、处于事务中）只由最外层负责重试与熔断判断
+
+crud 模块在文件末尾调用 protect_module(__name__)，模块内所有公开协程函数都会被保护，
+其中 get_ / list_ / count_ 等只读前缀的函数会重试。
+"""
+
 import asyncio
+import inspect
 import logging
+import random
+import sqlite3
+import sys
+import time
+from contextvars import ContextVar
 from functools import wraps
-from typing import Callable, Any
-from tortoise.exceptions import OperationalError, DBConnectionError
+from typing import Any, Callable, Dict, Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from tortoise.exceptions import DBConnectionError, OperationalError
+
+from server.core.config import settings
+from server.database import is_in_transaction
+from server.utils import metrics
 
 logger = logging.getLogger(__name__)
 
-def db_retry(max_retries: int = 3, delay: float = 1.0):
+# MySQL 瞬时错误码：1040 连接数过多、1205 锁等待超时、1213 死锁、2003 无法连接、2006 连接已断开、2013 查询中断线
+MYSQL_TRANSIENT_CODES = frozenset({1040, 1205, 1213, 2003, 2006, 2013})
+# SQLite 主错误码：SQLITE_BUSY、SQLITE_LOCKED
+SQLITE_TRANSIENT_CODES = frozenset({5, 6})
+# 视为只读、可以重试的函数名前缀（protect_module 使用）
+READ_ONLY_PREFIXES = ("get_", "list_", "count_", "filter_", "find_", "search_", "check_", "authenticate_")
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+db_retries_total = metrics.counter("db_retries_total", "数据库瞬时故障重试次数", ("function",))
+db_retry_giveups_total = metrics.counter(
+    "db_retry_giveups_total", "瞬时故障放弃重试的次数", ("function", "reason")
+)
+db_breaker_rejections_total = metrics.counter(
+    "db_circuit_breaker_rejections_total", "熔断期间直接拒绝的调用数", ("function",)
+)
+db_breaker_transitions_total = metrics.counter(
+    "db_circuit_breaker_transitions_total", "熔断器状态切换次数", ("state",)
+)
+
+_active: ContextVar[bool] = ContextVar("db_retry_active", default=False)
+_deadline: ContextVar[Optional[float]] = ContextVar("db_retry_deadline", default=None)
+
+
+class DatabaseUnavailableError(DBConnectionError):
+    """熔断器打开，数据库暂时不可用"""
+
+    def __init__(self, retry_after: float) -> None:
+        super().__init__("数据库暂时不可用，请稍后重试")
+        self.retry_after = retry_after
+
+
+def is_transient(exc: BaseException) -> bool:
+    """是否为值得重试的瞬时故障"""
+    if isinstance(exc, DatabaseUnavailableError):
+        return False
+    if isinstance(exc, DBConnectionError):
+        return True
+    if isinstance(exc, OperationalError):
+        # Tortoise 把驱动异常作为第一个参数包装
+        inner = exc.args[0] if exc.args and isinstance(exc.args[0], BaseException) else exc.__context__
+        if isinstance(inner, sqlite3.Error):
+            code = getattr(inner, "sqlite_errorcode", None)
+            return code is not None and code & 0xFF in SQLITE_TRANSIENT_CODES
+        if inner is not None and inner.args and isinstance(inner.args[0], int):
+            return inner.args[0] in MYSQL_TRANSIENT_CODES
+        return isinstance(inner, OSError)
+    # 连接被重置、超时、Windows 下的"信号灯超时"（WinError 121）等
+    return isinstance(exc, OSError)
+
+
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int, reset_timeout: float) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+
+    def _transition(self, state: str) -> None:
+        if state != self.state:
+            logger.warning("数据库熔断器状态: %s -> %s", self.state, state)
+            self.state = state
+            db_breaker_transitions_total.inc(state)
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def allow(self) -> bool:
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+        if self.state == HALF_OPEN:
+            # 半开状态同一时间只放行一个探测调用
+            if self._probing:
+                return False
+            self._probing = True
+        return True
+
+    def record_success(self) -> None:
+        self._probing = False
+        self.failures = 0
+        self._transition(CLOSED)
+
+    def record_failure(self) -> None:
+        self._probing = False
+        self.failures += 1
+        if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+            self._transition(OPEN)
+
+    def release(self) -> None:
+        """调用被取消、结果未知时释放探测名额"""
+        self._probing = False
+
+    def snapshot(self) -> Dict[metrics.LabelValues, float]:
+        return {(state,): float(state == self.state) for state in (CLOSED, OPEN, HALF_OPEN)}
+
+
+breaker = CircuitBreaker(settings.DB_BREAKER_FAILURE_THRESHOLD, settings.DB_BREAKER_RESET_SECONDS)
+
+metrics.gauge("db_circuit_breaker_state", "数据库熔断器当前状态（1 为当前状态）", breaker.snapshot, ("state",))
+metrics.gauge("db_circuit_breaker_failures", "数据库连续瞬时故障次数", lambda: breaker.failures)
+
+
+async def _call(
+    func: Callable, name: str, idempotent: bool, max_retries: int, base_delay: float, args: Any, kwargs: Any
+) -> Any:
+    deadline = _deadline.get() or time.monotonic() + settings.DB_RETRY_BUDGET_SECONDS
+    sleep = base_delay
+    attempt = 0
+    while True:
+        try:
+            result = await func(*args, **kwargs)
+        except Exception as exc:
+            if not is_transient(exc):
+                # 数据库正常应答（如唯一约束冲突），对熔断器而言是成功
+                breaker.record_success()
+                raise
+            breaker.record_failure()
+            if not idempotent:
+                reason = "not_idempotent"
+            elif attempt >= max_retries:
+                reason = "attempts"
+            elif not breaker.allow():
+                reason = "breaker"
+            else:
+                sleep = min(settings.DB_RETRY_MAX_DELAY, random.uniform(base_delay, sleep * 3))
+                reason = "deadline" if time.monotonic() + sleep > deadline else None
+            if reason is not None:
+                db_retry_giveups_total.inc(name, reason)
+                logger.error("数据库操作 %s 失败（已重试 %d 次，%s）: %s", name, attempt, reason, exc)
+                raise
+            attempt += 1
+            db_retries_total.inc(name)
+            logger.warning("数据库操作 %s 瞬时故障，%.0f ms 后第 %d 次重试: %s", name, sleep * 1000, attempt, exc)
+            await asyncio.sleep(sleep)
+        except BaseException:
+            breaker.release()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def _wrap(func: Callable, idempotent: bool, max_retries: Optional[int], delay: Optional[float]) -> Callable:
+    name = f"{func.__module__.rsplit('.', 1)[-1]}.{func.__qualname__}"
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs) -> Any:
+        # 外层已在重试保护中，或处于事务中（事务出错后只能整体重来）
+        if _active.get() or is_in_transaction():
+            return await func(*args, **kwargs)
+        if not breaker.allow():
+            db_breaker_rejections_total.inc(name)
+            raise DatabaseUnavailableError(breaker.retry_after())
+        token = _active.set(True)
+        try:
+            return await _call(
+                func,
+                name,
+                idempotent,
+                settings.DB_RETRY_MAX_RETRIES if max_retries is None else max_retries,
+                settings.DB_RETRY_BASE_DELAY if delay is None else delay,
+                args,
+                kwargs,
+            )
+        finally:
+            _active.reset(token)
+
+    wrapper.__db_retry__ = True
+    return wrapper
+
+
+def db_retry(max_retries: Optional[int] = None, delay: Optional[float] = None, idempotent: bool = True):
     """
     数据库操作重试装饰器
-    
+
     Args:
-        max_retries: 最大重试次数
-        delay: 重试间隔时间（秒）
+        max_retries: 最大重试次数，默认 DB_RETRY_MAX_RETRIES
+        delay: 退避的最小间隔（秒），默认 DB_RETRY_BASE_DELAY
+        idempotent: 整个函数是否可安全重放（只读，或整体在一个事务中）；为 False 时只熔断不重试
     """
     def decorator(func: Callable) -> Callable:
-        @wraps(func)
-        async def wrapper(*args, **kwargs) -> Any:
-            last_exception = None
-            
-            for attempt in range(max_retries + 1):
-                try:
-                    return await func(*args, **kwargs)
-                except (OperationalError, DBConnectionError, OSError) as e:
-                    last_exception = e
-                    error_msg = str(e).lower()
-                    
-                    # 检查是否是连接相关的错误
-                    if any(keyword in error_msg for keyword in [
-                        'connection', 'timeout', '信号灯超时', 'lost connection',
-                        'server has gone away', 'connection lost'
-                    ]):
-                        if attempt < max_retries:
-                            wait_time = delay * (2 ** attempt)  # 指数退避
-                            logger.warning(
-                                f"数据库连接失败 (尝试 {attempt + 1}/{max_retries + 1}): {e}"
-                                f"，{wait_time}秒后重试..."
-                            )
-                            await asyncio.sleep(wait_time)
-                            continue
-                    
-                    # 非连接错误或已达最大重试次数，直接抛出
-                    raise e
-                except Exception as e:
-                    # 其他异常直接抛出，不重试
-                    raise e
-            
-            # 如果所有重试都失败了
-            logger.error(f"数据库操作失败，已重试 {max_retries} 次: {last_exception}")
-            raise last_exception
-        
-        return wrapper
-    return decorator
\ No newline at end of file
+        return _wrap(func, idempotent, max_retries, delay)
+    return decorator
+
+
+def protect_module(module_name: str) -> None:
+    """
+    保护模块内定义的所有公开协程函数（在模块末尾调用 protect_module(__name__)）
+    只读前缀（READ_ONLY_PREFIXES）的函数会重试，其余只经过熔断器
+    """
+    module = sys.modules[module_name]
+    for attr, value in list(vars(module).items()):
+        if (
+            attr.startswith("_")
+            or not inspect.iscoroutinefunction(value)
+            or getattr(value, "__module__", None) != module_name
+            or getattr(value, "__db_retry__", False)
+        ):
+            continue
+        setattr(module, attr, _wrap(value, attr.startswith(READ_ONLY_PREFIXES), None, None))
+
+
+class DBDeadlineMiddleware:
+    """为每个请求设定重试时长预算，请求内所有数据库重试共享（纯 ASGI 实现）"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = _deadline.set(time.monotonic() + settings.DB_RETRY_BUDGET_SECONDS)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _deadline.reset(token)
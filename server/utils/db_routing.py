@@ -0,0 +1,124 @@
+"""
+主从读写路由
+
+配置 DDCT_DB_READ_URL 后启用：
+- 只读接口通过依赖 prefer_replica 声明可以读副本，其余请求一律读写主库
+- 请求中一旦发生写操作，本请求后续的读取固定走主库（读己之写）
+- 写请求结束后 DB_REPLICA_PIN_SECONDS 秒内，同一客户端（按令牌或 IP 区分）的读取仍走主库，
+  避免副本复制延迟导致刚保存的数据"消失"
+- 事务内的读取始终走主库
+"""
+
+import hashlib
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Optional
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+from tortoise.models import Model
+
+from server.core.config import settings
+from server.database import REPLICA_CONNECTION, is_in_transaction
+
+# 记录最近写过的客户端数量上限
+MAX_PINNED_CLIENTS = 10000
+
+
+class _RoutingState:
+    __slots__ = ("replica", "pinned", "wrote")
+
+    def __init__(self, pinned: bool) -> None:
+        self.replica = False
+        self.pinned = pinned
+        self.wrote = False
+
+
+_state: ContextVar[Optional[_RoutingState]] = ContextVar("db_routing_state", default=None)
+# 客户端标识 -> 固定主库的截止时间（monotonic）
+_pinned_clients: "OrderedDict[str, float]" = OrderedDict()
+
+
+def replica_enabled() -> bool:
+    return bool(settings.DDCT_DB_READ_URL)
+
+
+class ReadWriteRouter:
+    """Tortoise 路由器：返回 None 时使用模型默认连接（主库）"""
+
+    def db_for_read(self, model: type[Model]) -> Optional[str]:
+        state = _state.get()
+        if state is None or not state.replica or state.pinned or is_in_transaction():
+            return None
+        return REPLICA_CONNECTION
+
+    def db_for_write(self, model: type[Model]) -> Optional[str]:
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return None
+
+
+async def prefer_replica() -> None:
+    """只读接口的依赖：声明本请求的读取可以走副本"""
+    state = _state.get()
+    if state is not None:
+        state.replica = True
+
+
+def pin_primary() -> None:
+    """本请求后续读取固定走主库（例如读取自己刚通过原生 SQL 写入的数据）"""
+    state = _state.get()
+    if state is not None:
+        state.pinned = True
+
+
+def _client_key(scope: Scope) -> Optional[str]:
+    for name, value in scope.get("headers", ()):
+        if name == b"authorization":
+            return "t:" + hashlib.blake2b(value, digest_size=16).hexdigest()
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else None
+
+
+def _is_pinned(key: Optional[str], now: float) -> bool:
+    if key is None:
+        return False
+    until = _pinned_clients.get(key)
+    if until is None:
+        return False
+    if until <= now:
+        del _pinned_clients[key]
+        return False
+    return True
+
+
+def _pin_client(key: Optional[str], now: float) -> None:
+    if key is None or settings.DB_REPLICA_PIN_SECONDS <= 0:
+        return
+    _pinned_clients[key] = now + settings.DB_REPLICA_PIN_SECONDS
+    _pinned_clients.move_to_end(key)
+    while len(_pinned_clients) > MAX_PINNED_CLIENTS:
+        _pinned_clients.popitem(last=False)
+
+
+class DBRoutingMiddleware:
+    """为每个请求建立路由状态，并记录发生过写操作的客户端（纯 ASGI 实现）"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        key = _client_key(scope)
+        state = _RoutingState(pinned=_is_pinned(key, time.monotonic()))
+        token = _state.set(state)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _state.reset(token)
+            if state.wrote:
+                _pin_client(key, time.monotonic())
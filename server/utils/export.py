@@ -0,0 +1,94 @@
+"""
+流式导出工具
+
+按主键做键集分页（WHERE id > last_id ORDER BY id LIMIT n）逐批读取，
+边读边以 NDJSON / CSV 输出，内存占用只与批大小有关，与表大小无关。
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Any, AsyncIterator, Dict, Iterable, List, Sequence
+
+from tortoise.queryset import QuerySet
+
+EXPORT_FORMATS = {"ndjson", "csv"}
+DEFAULT_CHUNK_SIZE = 1000
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=_json_default)
+
+
+async def iter_rows(
+    qs: QuerySet,
+    fields: Sequence[str],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """按 id 键集分页，逐批产出 values() 字典列表"""
+    last_id = 0
+    while True:
+        rows = await qs.filter(id__gt=last_id).order_by("id").limit(chunk_size).values(*fields)
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1]["id"]
+        if len(rows) < chunk_size:
+            return
+
+
+def _ndjson_chunk(rows: Iterable[Dict[str, Any]]) -> str:
+    return "".join(_dumps(row) + "\n" for row in rows)
+
+
+def _csv_cell(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return _dumps(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+def _csv_chunk(rows: Iterable[Dict[str, Any]], fields: Sequence[str], header: bool) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    if header:
+        writer.writerow(fields)
+    for row in rows:
+        writer.writerow([_csv_cell(row.get(f)) for f in fields])
+    return buf.getvalue()
+
+
+async def stream_export(
+    qs: QuerySet,
+    fields: Sequence[str],
+    fmt: str,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[str]:
+    """将查询集以指定格式流式输出（供 StreamingResponse 使用）"""
+    if fmt == "csv":
+        # 带 BOM，方便 Excel 直接打开中文
+        yield "\ufeff"
+        first = True
+        async for rows in iter_rows(qs, fields, chunk_size):
+            yield _csv_chunk(rows, fields, header=first)
+            first = False
+        if first:
+            yield _csv_chunk([], fields, header=True)
+    else:
+        async for rows in iter_rows(qs, fields, chunk_size):
+            yield _ndjson_chunk(rows)
@@ -0,0 +1,139 @@
+"""
+事件循环延迟监控
+
+同步阻塞调用（smtplib 发信、bcrypt 校验密码、socket 连接测试等）会卡住整个 worker。
+- 后台协程每隔 INTERVAL 秒睡眠一次，实际醒来时间与预期的差值即为调度延迟，
+  计入直方图，并保留最近一段窗口用于导出 p50 / p95 / p99
+- 看门狗线程检查心跳，事件循环卡住超过阈值时抓取事件循环线程当前的调用栈
+  与正在执行的任务写入日志（每次卡顿只记录一次）
+- 调试模式（LOOP_DEBUG_SLOW_CALLBACK_MS）：开启 asyncio 调试，单次回调执行超过
+  N 毫秒即由 asyncio 记录，看门狗也按 N 毫秒抓栈，用于定位请求内的同步调用
+"""
+
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from server.core.config import settings
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 采样间隔（秒）
+INTERVAL = 0.05
+# 计算分位数的窗口（最近 1 分钟）
+WINDOW = int(60 / INTERVAL)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+QUANTILES = (("0.5", 0.5), ("0.95", 0.95), ("0.99", 0.99))
+# 日志中保留的调用栈层数（最内层）
+STACK_LIMIT = 25
+
+loop_lag_seconds = metrics.histogram(
+    "event_loop_lag_seconds", "事件循环调度延迟（秒）", buckets=LAG_BUCKETS
+)
+loop_stalls_total = metrics.counter("event_loop_stalls_total", "事件循环阻塞超过阈值的次数")
+
+_lags: Deque[float] = deque(maxlen=WINDOW)
+_heartbeat = 0.0
+_task: Optional[asyncio.Task] = None
+_thread: Optional[threading.Thread] = None
+_stop_event = threading.Event()
+
+
+def lag_quantiles() -> Dict[metrics.LabelValues, float]:
+    """最近窗口内调度延迟的分位数与最大值"""
+    lags = sorted(_lags)
+    if not lags:
+        return {}
+    result = {(name,): lags[min(len(lags) - 1, int(q * len(lags)))] for name, q in QUANTILES}
+    result[("max",)] = lags[-1]
+    return result
+
+
+metrics.gauge(
+    "event_loop_lag_window_seconds", "最近一分钟事件循环调度延迟分位数（秒）", lag_quantiles, ("quantile",)
+)
+
+
+async def _run() -> None:
+    global _heartbeat
+    loop = asyncio.get_running_loop()
+    while True:
+        started = loop.time()
+        _heartbeat = time.monotonic()
+        await asyncio.sleep(INTERVAL)
+        lag = max(0.0, loop.time() - started - INTERVAL)
+        _lags.append(lag)
+        loop_lag_seconds.observe(lag)
+
+
+def _describe_task(loop: asyncio.AbstractEventLoop) -> str:
+    try:
+        task = asyncio.current_task(loop)
+    except Exception:
+        return "未知"
+    return repr(task) if task is not None else "无（同步回调）"
+
+
+def _watchdog(loop: asyncio.AbstractEventLoop, thread_id: int, threshold: float) -> None:
+    """在独立线程中运行：心跳超时说明事件循环被阻塞，抓取其调用栈"""
+    reported = 0.0
+    while not _stop_event.wait(threshold / 2):
+        beat = _heartbeat
+        stalled = time.monotonic() - beat - INTERVAL
+        if stalled < threshold or beat == reported:
+            continue
+        reported = beat
+        loop_stalls_total.inc()
+        frame = sys._current_frames().get(thread_id)
+        stack = "".join(traceback.format_stack(frame, limit=STACK_LIMIT)) if frame is not None else "（无法获取调用栈）"
+        logger.warning(
+            "事件循环已阻塞 %.0f ms，当前任务: %s\n%s", stalled * 1000, _describe_task(loop), stack
+        )
+
+
+def start() -> None:
+    """在事件循环中调用，启动延迟采样与看门狗线程"""
+    global _task, _thread, _heartbeat
+    if not settings.LOOP_MONITOR_ENABLED or (_task is not None and not _task.done()):
+        return
+    loop = asyncio.get_running_loop()
+    threshold = settings.LOOP_LAG_THRESHOLD_MS / 1000
+
+    debug_ms = settings.LOOP_DEBUG_SLOW_CALLBACK_MS
+    if debug_ms:
+        loop.set_debug(True)
+        loop.slow_callback_duration = debug_ms / 1000
+        threshold = min(threshold, debug_ms / 1000)
+        logger.warning("事件循环调试模式已开启：同步执行超过 %s ms 的回调会被记录", debug_ms)
+
+    _heartbeat = time.monotonic()
+    _task = asyncio.create_task(_run())
+    _stop_event.clear()
+    _thread = threading.Thread(
+        target=_watchdog,
+        args=(loop, threading.get_ident(), threshold),
+        name="loop-watchdog",
+        daemon=True,
+    )
+    _thread.start()
+
+
+async def stop() -> None:
+    global _task, _thread
+    _stop_event.set()
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+    if _thread is not None:
+        _thread.join(timeout=1)
+        _thread = None
@@ -0,0 +1,247 @@
+"""
+Prometheus 风格的指标
+
+- 计数器 / 直方图的桶在创建时预先分配，记录一次观测只做一次二分查找和几次加法；
+  带标签的子指标在第一次出现该标签组合时创建，之后复用
+- 仪表（gauge）在抓取时通过回调读取当前值，平时零开销
+- MetricsMiddleware 记录每个路由（按路由模板，而不是实际路径）的请求数、状态码与耗时
+  （数据库查询相关指标见 query_tracker）
+- render() 输出 Prometheus 文本格式，由 /metrics 端点返回
+"""
+
+import logging
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时的默认分桶（秒）
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = Tuple[str, ...]
+GaugeValue = Union[float, Dict[LabelValues, float]]
+
+
+def _format_labels(names: Sequence[str], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, *labels: str, amount: float = 1) -> None:
+        values = self._values
+        values[labels] = values.get(labels, 0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+
+class _HistogramChild:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size  # 最后一个是 +Inf 桶
+        self.sum = 0.0
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._children: Dict[LabelValues, _HistogramChild] = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        child = self._children.get(labels)
+        if child is None:
+            child = self._children[labels] = _HistogramChild(len(self.buckets) + 1)
+        # 非累计计数，输出时再累加，记录时只动一个桶
+        child.counts[bisect_left(self.buckets, value)] += 1
+        child.sum += value
+
+    def snapshot(self, *labels: str) -> Optional[Tuple[List[int], float]]:
+        child = self._children.get(labels)
+        return (list(child.counts), child.sum) if child else None
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bounds = [_format_value(float(b)) for b in self.buckets] + ["+Inf"]
+        for labels, child in sorted(self._children.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, child.counts):
+                cumulative += count
+                label_text = _format_labels(self.labelnames, labels, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{label_text} {cumulative}")
+            label_text = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{label_text} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{label_text} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """抓取时调用回调读取当前值；回调可返回单个数值，或 {标签值元组: 数值}"""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        callback: Callable[[], GaugeValue],
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.callback = callback
+        self.labelnames = tuple(labelnames)
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.debug("指标 %s 读取失败: %s", self.name, e)
+            return lines
+        if isinstance(value, dict):
+            for labels, v in sorted(value.items()):
+                lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(float(v))}")
+        elif value is not None:
+            lines.append(f"{self.name} {_format_value(float(value))}")
+        return lines
+
+
+_registry: Dict[str, Union[Counter, Histogram, Gauge]] = {}
+
+
+def _register(metric):
+    if metric.name in _registry:
+        raise ValueError(f"指标重复注册: {metric.name}")
+    _registry[metric.name] = metric
+    return metric
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return _register(Counter(name, documentation, labelnames))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = LATENCY_BUCKETS,
+) -> Histogram:
+    return _register(Histogram(name, documentation, labelnames, buckets))
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    callback: Callable[[], GaugeValue],
+    labelnames: Sequence[str] = (),
+) -> Gauge:
+    """注册回调式仪表；同名仪表重复注册时替换回调（便于模块重新加载）"""
+    metric = Gauge(name, documentation, callback, labelnames)
+    _registry[name] = metric
+    return metric
+
+
+def render() -> str:
+    lines: List[str] = []
+    for name in sorted(_registry):
+        lines.extend(_registry[name].collect())
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# HTTP 请求指标
+# ---------------------------------------------------------------------------
+
+http_requests_total = counter(
+    "http_requests_total", "HTTP 请求数", ("method", "route", "status")
+)
+http_request_duration_seconds = histogram(
+    "http_request_duration_seconds", "HTTP 请求耗时（秒）", ("method", "route")
+)
+http_requests_in_progress = 0
+
+gauge("http_requests_in_progress", "正在处理的 HTTP 请求数", lambda: http_requests_in_progress)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+def route_template(scope: Scope) -> str:
+    """按路由模板归类（/characters/{char_id}），避免实际路径导致标签爆炸"""
+    # 新版 FastAPI 不再把子路由展开到应用上，scope["route"].path 只是子路由内的相对路径，
+    # 完整模板在 effective_route_context 中
+    context = (scope.get("fastapi") or {}).get("effective_route_context")
+    path = getattr(context, "path", None) or getattr(scope.get("route"), "path", None)
+    return path if path else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """记录每个路由的请求数、状态码与耗时（纯 ASGI 实现）"""
+
+    def __init__(self, app: ASGIApp, exclude_paths: Sequence[str] = ("/metrics",)) -> None:
+        self.app = app
+        self.exclude_paths = frozenset(exclude_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        global http_requests_in_progress
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_requests_in_progress += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            http_requests_in_progress -= 1
+            elapsed = time.perf_counter() - started
+            method = scope["method"]
+            route = route_template(scope)
+            http_requests_total.inc(method, route, str(status))
+            http_request_duration_seconds.observe(elapsed, method, route)
+
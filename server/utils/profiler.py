@@ -0,0 +1,159 @@
+"""
+按需采样剖析器
+
+管理员请求时启动一个采样线程，在指定时长内按固定间隔读取所有线程的 Python 调用栈
+（sys._current_frames），汇总为 collapsed stack 格式（flamegraph.pl / speedscope 可直接读取）。
+- 调用栈中出现路由处理函数时，以 "route:<路由模板>" 作为根帧，样本按路由归类；
+  其他调用栈以 "thread:<线程名>" 为根帧
+- 空闲线程（事件循环等待 IO、线程池等待任务）的样本默认丢弃
+- 未在剖析时没有任何线程或钩子，零开销；同一时间只允许一个剖析任务
+"""
+
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from types import CodeType
+from typing import Any, Dict, Iterable, Tuple
+
+MAX_SECONDS = 60
+MIN_INTERVAL = 0.001
+DEFAULT_INTERVAL = 0.005
+# 单个调用栈最多保留的层数
+MAX_DEPTH = 128
+
+# 最内层帧是这些函数时视为空闲
+IDLE_FRAMES = {
+    ("selectors.py", "select"),
+    ("threading.py", "wait"),
+    ("queue.py", "get"),
+    # aiosqlite 工作线程在 C 层等待任务队列
+    ("core.py", "_connection_worker_thread"),
+}
+
+_lock = threading.Lock()
+
+
+class ProfilerBusyError(RuntimeError):
+    """已有剖析任务在运行"""
+
+
+def route_handlers(app: Any) -> Dict[CodeType, str]:
+    """收集应用中每个路由处理函数的代码对象 -> 完整路由模板"""
+    handlers: Dict[CodeType, str] = {}
+
+    def collect(routes: Iterable[Any], prefix: str) -> None:
+        for route in routes:
+            endpoint = getattr(route, "endpoint", None)
+            path = getattr(route, "path", None)
+            if endpoint is not None and path is not None:
+                code = getattr(inspect.unwrap(endpoint), "__code__", None)
+                if code is not None:
+                    handlers.setdefault(code, prefix + path)
+            # 新版 FastAPI 保留嵌套路由结构（_IncludedRouter），旧版会展开成完整路径
+            included = getattr(route, "original_router", None)
+            if included is not None:
+                collect(included.routes, prefix + route.include_context.prefix)
+
+    collect(app.router.routes, "")
+    return handlers
+
+
+class _Sampler:
+    def __init__(self, handlers: Dict[CodeType, str], include_idle: bool) -> None:
+        self.handlers = handlers
+        self.include_idle = include_idle
+        self.stacks: Counter = Counter()
+        self.routes: Counter = Counter()
+        self.samples = 0
+        self._labels: Dict[CodeType, str] = {}
+
+    def _label(self, code: CodeType) -> str:
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def sample(self, own_ident: int, thread_names: Dict[int, str]) -> None:
+        self.samples += 1
+        for ident, frame in sys._current_frames().items():
+            if ident == own_ident:
+                continue
+            code = frame.f_code
+            if not self.include_idle and (os.path.basename(code.co_filename), code.co_name) in IDLE_FRAMES:
+                continue
+            labels = []
+            route = None
+            depth = 0
+            while frame is not None and depth < MAX_DEPTH:
+                code = frame.f_code
+                labels.append(self._label(code))
+                if route is None:
+                    route = self.handlers.get(code)
+                frame = frame.f_back
+                depth += 1
+            labels.reverse()
+            if route is not None:
+                root = "route:" + route
+                self.routes[route] += 1
+            else:
+                root = "thread:" + thread_names.get(ident, str(ident))
+            self.stacks[root + ";" + ";".join(labels)] += 1
+
+    def run(self, seconds: float, interval: float) -> None:
+        own_ident = threading.get_ident()
+        deadline = time.monotonic() + seconds
+        names: Dict[int, str] = {}
+        next_names_refresh = 0.0
+        while True:
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            if now >= next_names_refresh:
+                names = {t.ident: t.name for t in threading.enumerate() if t.ident is not None}
+                next_names_refresh = now + 1.0
+            self.sample(own_ident, names)
+            time.sleep(interval)
+
+
+def collapsed(stacks: Counter) -> str:
+    """collapsed stack 文本：每行 "帧1;帧2;...;帧N 样本数" """
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def profile(
+    app: Any,
+    seconds: float,
+    interval: float = DEFAULT_INTERVAL,
+    include_idle: bool = False,
+) -> Tuple[str, Dict[str, Any]]:
+    """
+    阻塞采样 seconds 秒（应在线程池中调用），返回 (collapsed 文本, 摘要)
+    已有剖析任务在运行时抛出 ProfilerBusyError
+    """
+    seconds = min(max(seconds, interval), MAX_SECONDS)
+    interval = max(interval, MIN_INTERVAL)
+    if not _lock.acquire(blocking=False):
+        raise ProfilerBusyError("已有剖析任务在运行")
+    try:
+        sampler = _Sampler(route_handlers(app), include_idle)
+        started = time.monotonic()
+        sampler.run(seconds, interval)
+        elapsed = time.monotonic() - started
+    finally:
+        _lock.release()
+
+    summary = {
+        "seconds": round(elapsed, 3),
+        "ticks": sampler.samples,
+        "samples": sum(sampler.stacks.values()),
+        "routes": dict(sampler.routes.most_common()),
+    }
+    return collapsed(sampler.stacks), summary
+
+
+def is_running() -> bool:
+    return _lock.locked()
@@ -0,0 +1,253 @@
+"""
+数据库查询追踪
+
+- instrument_db() 给 Tortoise 数据库客户端的 execute_* 方法挂上计时，
+  每条查询计入全局指标，并累计到当前请求上
+- QueryTrackingMiddleware 在响应头中加入 Server-Timing（查询数与数据库耗时），
+  并把查询数超过 SLOW_REQUEST_QUERY_COUNT 的请求连同归一化后的 SQL 记入日志，
+  方便在线上发现 N+1 查询
+- 单条查询超过 SLOW_QUERY_MS 时记录归一化 SQL
+- assert_max_queries() 用于测试/调试：断言一段代码（包括通过 TestClient 发出的请求）
+  执行的查询数不超过 N
+"""
+
+import functools
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from server.core.config import settings
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 单条 SQL 耗时分桶（秒）
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+# 每个请求的查询次数分桶
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+# 慢请求日志中列出的语句条数
+LOG_TOP_STATEMENTS = 5
+
+db_queries_total = metrics.counter("db_queries_total", "数据库查询数", ("operation",))
+db_query_duration_seconds = metrics.histogram(
+    "db_query_duration_seconds", "数据库查询耗时（秒）", ("operation",), QUERY_BUCKETS
+)
+db_slow_queries_total = metrics.counter("db_slow_queries_total", "超过慢查询阈值的数据库查询数")
+db_queries_per_request = metrics.histogram(
+    "db_queries_per_request", "单个 HTTP 请求执行的数据库查询数", ("method", "route"), QUERY_COUNT_BUCKETS
+)
+db_time_per_request_seconds = metrics.histogram(
+    "db_time_per_request_seconds", "单个 HTTP 请求的数据库总耗时（秒）", ("method", "route"), QUERY_BUCKETS
+)
+
+
+class QueryLog:
+    """一段范围内执行的查询：次数、总耗时与 (SQL, 耗时) 列表"""
+
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: List[Tuple[str, float]] = []
+
+    def record(self, sql: str, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        self.statements.append((sql, elapsed))
+
+    def summary(self, limit: int = LOG_TOP_STATEMENTS) -> List[Tuple[int, str]]:
+        """按归一化 SQL 分组，返回执行次数最多的若干条 (次数, SQL)"""
+        grouped = Counter(normalize_sql(sql) for sql, _ in self.statements)
+        return [(n, sql) for sql, n in grouped.most_common(limit)]
+
+
+# 当前请求的查询记录，由 QueryTrackingMiddleware 在请求开始时放入
+_request_log: ContextVar[Optional[QueryLog]] = ContextVar("request_query_log", default=None)
+# 防止嵌套调用重复计数（例如 MySQL 的 execute_query_dict 内部调用 execute_query）
+_in_query: ContextVar[bool] = ContextVar("in_query", default=False)
+# assert_max_queries 注册的全局记录（TestClient 在另一个线程里跑应用，ContextVar 传不过去）
+_listeners: List[QueryLog] = []
+_listeners_lock = threading.Lock()
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s)(?:\s*,\s*(?:\?|%s))+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@functools.lru_cache(maxsize=1024)
+def normalize_sql(sql: str) -> str:
+    """去掉字面量与 IN 列表长度差异，便于把同一形状的语句归为一类"""
+    sql = _STRING_LITERAL.sub("?", sql)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = sql.replace("%s", "?")
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+_EXECUTE_METHODS = {
+    "execute_query": "query",
+    "execute_query_dict": "query_dict",
+    "execute_insert": "insert",
+    "execute_many": "many",
+    "execute_script": "script",
+}
+
+
+def _record(operation: str, sql: str, elapsed: float) -> None:
+    db_queries_total.inc(operation)
+    db_query_duration_seconds.observe(elapsed, operation)
+    log = _request_log.get()
+    if log is not None:
+        log.record(sql, elapsed)
+    if _listeners:
+        with _listeners_lock:
+            for listener in _listeners:
+                listener.record(sql, elapsed)
+    if elapsed * 1000 >= settings.SLOW_QUERY_MS:
+        db_slow_queries_total.inc()
+        logger.warning("慢查询 %.1f ms: %s", elapsed * 1000, normalize_sql(sql))
+
+
+def _wrap_execute(func: Callable, operation: str) -> Callable:
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if _in_query.get():
+            return await func(self, *args, **kwargs)
+        token = _in_query.set(True)
+        started = time.perf_counter()
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - started
+            _in_query.reset(token)
+            sql = args[0] if args and isinstance(args[0], str) else kwargs.get("query") or kwargs.get("sql") or ""
+            _record(operation, sql, elapsed)
+
+    wrapper.__query_tracked__ = True
+    return wrapper
+
+
+def _all_subclasses(cls: type) -> List[type]:
+    result = []
+    for sub in cls.__subclasses__():
+        result.append(sub)
+        result.extend(_all_subclasses(sub))
+    return result
+
+
+def instrument_db() -> int:
+    """
+    给 Tortoise 的数据库客户端类挂上查询计时，返回包装的方法数
+    在 Tortoise.init 之后调用（此时后端模块已导入）；重复调用不会重复包装
+    """
+    from tortoise.backends.base.client import BaseDBAsyncClient
+
+    wrapped = 0
+    for cls in [BaseDBAsyncClient] + _all_subclasses(BaseDBAsyncClient):
+        for name, operation in _EXECUTE_METHODS.items():
+            func = cls.__dict__.get(name)
+            if func is None or getattr(func, "__query_tracked__", False):
+                continue
+            setattr(cls, name, _wrap_execute(func, operation))
+            wrapped += 1
+    return wrapped
+
+
+def current() -> Optional[QueryLog]:
+    """当前请求的查询记录（不在请求内时为 None）"""
+    return _request_log.get()
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryLog]:
+    """记录 with 块内（包括其他线程中的请求）执行的全部查询"""
+    log = QueryLog()
+    with _listeners_lock:
+        _listeners.append(log)
+    try:
+        yield log
+    finally:
+        with _listeners_lock:
+            _listeners.remove(log)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryLog]:
+    """
+    断言 with 块内执行的查询数不超过 limit，超出时抛出 AssertionError 并列出语句
+
+        with assert_max_queries(3):
+            client.get("/api/v1/characters/my", headers=auth)
+    """
+    with track_queries() as log:
+        yield log
+    if log.count > limit:
+        lines = "\n".join(f"  {n} x {sql}" for n, sql in log.summary(limit=20))
+        raise AssertionError(f"执行了 {log.count} 条查询，上限为 {limit}:\n{lines}")
+
+
+class QueryTrackingMiddleware:
+    """统计每个请求的查询数与数据库耗时，写入 Server-Timing 响应头（纯 ASGI 实现）"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        log = QueryLog()
+        token = _request_log.set(log)
+
+        async def send_wrapper(message: Message) -> None:
+            # 响应头发出前执行的查询才能计入 Server-Timing；流式响应之后的查询只计入指标
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers.append(
+                    "Server-Timing",
+                    f'db;dur={log.seconds * 1000:.2f};desc="{log.count} queries"',
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_log.reset(token)
+            method = scope["method"]
+            route = metrics.route_template(scope)
+            db_queries_per_request.observe(log.count, method, route)
+            db_time_per_request_seconds.observe(log.seconds, method, route)
+            if log.count > settings.SLOW_REQUEST_QUERY_COUNT:
+                statements = "; ".join(f"{n} x {sql}" for n, sql in log.summary())
+                logger.warning(
+                    "请求 %s %s 执行了 %d 条查询（%.1f ms）: %s",
+                    method, route, log.count, log.seconds * 1000, statements,
+                )
+
+
+def _pool_stats() -> Dict[metrics.LabelValues, float]:
+    from tortoise import connections
+
+    result: Dict[metrics.LabelValues, float] = {}
+    for name in connections.db_config:
+        pool = getattr(connections.get(name), "_pool", None)
+        # aiomysql 连接池；SQLite 没有连接池
+        for attr in ("size", "freesize", "maxsize"):
+            value = getattr(pool, attr, None)
+            if isinstance(value, int):
+                result[(name, attr)] = value
+    return result
+
+
+metrics.gauge("db_pool_connections", "数据库连接池状态", _pool_stats, ("connection", "state"))
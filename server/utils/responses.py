@@ -0,0 +1,48 @@
+"""
+快速 JSON 响应
+
+存档（save_data / world_map）与工坊内容动辄数 MB，走 FastAPI 默认流程时
+要先用 response_model 把整棵 JSON 校验一遍再序列化。这些数据写入时已经校验过，
+热点接口直接把 ORM 数据拼成字典，用 orjson 序列化后返回 Response，
+FastAPI 遇到 Response 实例会原样返回，跳过二次校验与 jsonable_encoder。
+
+应用的 default_response_class 设为 Default(FastJSONResponse)：当前 FastAPI 对声明了
+response_model 的路由已经用 Pydantic（Rust）直接输出 JSON 字节，只有包在 Default()
+里才不会关掉这条快路径；其余返回字典的路由改用 orjson 渲染。
+"""
+
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # 未安装 orjson 时退回标准库
+    orjson = None
+
+# OPT_UTC_Z：UTC 时间输出为 "...Z"，与 Pydantic 序列化 response_model 的格式一致
+_ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z) if orjson else 0
+
+
+def _json_default(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    raise TypeError(f"无法序列化的类型: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """序列化为 UTF-8 JSON 字节"""
+    if orjson is not None:
+        return orjson.dumps(content, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        content, ensure_ascii=False, separators=(",", ":"), default=_json_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """直接序列化传入内容的 JSON 响应（不经过 jsonable_encoder）"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,258 @@
+"""
+兑换码创建数据的规则快照缓存
+
+兑换时按兑换码类型返回的世界/天资/出身/灵根/天赋列表，对同一类型总是同一批数据，
+因此按 (类型, payload 哈希) 记忆化合并后的结果。规则表（World、TalentTier、
+Origin、SpiritRoot、Talent）有写入时通过 Tortoise 信号调用 invalidate()；
+绕过模型信号的批量写入（filter().update() / .delete()、bulk_create）须在写入后自行 await invalidate()。
+
+invalidate() 清空本进程缓存，并在 SystemConfig 中写入新的代次；各 worker 每 SYNC_INTERVAL 秒
+检查一次代次，发生变化即清空缓存，因此其他 worker 上的规则修改最迟约 SYNC_INTERVAL 秒后生效。
+代次写入失败时另有 SNAPSHOT_TTL 兜底。
+
+返回给调用方的是缓存数据的深拷贝，调用方修改嵌套列表不会污染缓存。
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+from tortoise.signals import post_delete, post_save
+
+from server.models import World, TalentTier, Origin, SpiritRoot, Talent
+from server.utils import metrics
+from server.utils.system_config import get_config, set_config
+
+logger = logging.getLogger(__name__)
+
+# SystemConfig 中记录规则代次的键，以及各 worker 检查代次的间隔（秒）
+GENERATION_KEY = "rules_snapshot_generation"
+SYNC_INTERVAL = 1.0
+# 缓存最长有效期（秒），仅在代次写入失败时兜底
+SNAPSHOT_TTL = 300
+# 不同 payload 的记忆化条目上限，超过后整体清空
+MAX_MERGED_ENTRIES = 10000
+
+_version = 0
+_loaded_at = 0.0
+_base_cache: Dict[str, Dict[str, Any]] = {}
+_merged_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+# 本进程缓存对应的规则代次
+_generation: Optional[str] = None
+_sync_task: Optional[asyncio.Task] = None
+
+
+def version() -> int:
+    return _version
+
+
+def stats() -> Dict[str, int]:
+    return {
+        "version": _version,
+        "base_entries": len(_base_cache),
+        "merged_entries": len(_merged_cache),
+    }
+
+
+def _clear() -> None:
+    """丢弃本进程的所有缓存"""
+    global _version
+    _version += 1
+    _base_cache.clear()
+    _merged_cache.clear()
+
+
+async def invalidate() -> None:
+    """
+    规则表发生变化：丢弃本进程缓存，并写入新的代次通知其他 worker
+    在事务内调用时，代次随事务一起提交
+    """
+    global _generation
+    _clear()
+    generation = uuid.uuid4().hex
+    try:
+        await set_config(GENERATION_KEY, generation)
+    except Exception as e:
+        logger.warning("规则快照代次写入失败，其他 worker 将在 TTL 到期后刷新: %s", e)
+        return
+    # 本进程缓存已清空，之后加载的都是新数据
+    _generation = generation
+
+
+async def sync() -> bool:
+    """其他 worker 修改过规则（代次变化）时清空缓存，返回是否清空"""
+    global _generation
+    generation = await get_config(GENERATION_KEY)
+    if generation == _generation:
+        return False
+    _clear()
+    _generation = generation
+    return True
+
+
+async def _run() -> None:
+    while True:
+        await asyncio.sleep(SYNC_INTERVAL)
+        try:
+            await sync()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("规则快照代次同步失败: %s", e)
+
+
+def start() -> None:
+    """启动代次同步任务（在应用生命周期内调用）"""
+    global _sync_task
+    if _sync_task is None or _sync_task.done():
+        _sync_task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _sync_task
+    if _sync_task is not None:
+        _sync_task.cancel()
+        try:
+            await _sync_task
+        except asyncio.CancelledError:
+            pass
+        _sync_task = None
+
+
+async def _load_world() -> Dict[str, Any]:
+    # 获取随机或指定的世界
+    worlds = await World.all().limit(1)
+    if not worlds:
+        return {}
+    world = worlds[0]
+    return {'world_backgrounds': [{
+        'id': world.id,
+        'name': world.name,
+        'description': world.description,
+        'era': world.era
+    }]}
+
+
+async def _load_talent_tier() -> Dict[str, Any]:
+    # 获取高级天资
+    talent_tiers = await TalentTier.filter(rarity__gte=4).limit(3)
+    return {'talent_tiers': [
+        {
+            'id': t.id,
+            'name': t.name,
+            'description': t.description,
+            'total_points': t.total_points,
+            'rarity': t.rarity,
+            'color': t.color
+        } for t in talent_tiers
+    ]}
+
+
+async def _load_origin() -> Dict[str, Any]:
+    # 获取稀有出身
+    origins = await Origin.filter(rarity__gte=3).limit(5)
+    return {'origins': [
+        {
+            'id': o.id,
+            'name': o.name,
+            'description': o.description,
+            'rarity': o.rarity,
+            'talent_cost': o.talent_cost
+        } for o in origins
+    ]}
+
+
+async def _load_spirit_root() -> Dict[str, Any]:
+    # 获取高级灵根
+    spirit_roots = await SpiritRoot.filter(base_multiplier__gte=1.5).limit(3)
+    return {'spirit_roots': [
+        {
+            'id': s.id,
+            'name': s.name,
+            'description': s.description,
+            'base_multiplier': s.base_multiplier,
+            'talent_cost': s.talent_cost
+        } for s in spirit_roots
+    ]}
+
+
+async def _load_talent() -> Dict[str, Any]:
+    # 获取稀有天赋
+    talents = await Talent.filter(rarity__gte=4).limit(10)
+    return {'talents': [
+        {
+            'id': t.id,
+            'name': t.name,
+            'description': t.description,
+            'effects': t.effects,
+            'rarity': t.rarity,
+            'talent_cost': t.talent_cost
+        } for t in talents
+    ]}
+
+
+_LOADERS: Dict[str, Callable[[], Awaitable[Dict[str, Any]]]] = {
+    'world': _load_world,
+    'talent_tier': _load_talent_tier,
+    'origin': _load_origin,
+    'spirit_root': _load_spirit_root,
+    'talent': _load_talent,
+}
+
+
+def _payload_hash(payload: Any) -> str:
+    if not payload or not isinstance(payload, dict):
+        return ""
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+async def get_creation_data(code_type: Optional[str], payload: Any) -> Dict[str, Any]:
+    """
+    获取某类型兑换码对应的创建数据（已合并自定义 payload）
+    返回值是缓存的深拷贝，调用方可以自由修改
+    """
+    global _loaded_at
+    if time.monotonic() - _loaded_at > SNAPSHOT_TTL:
+        _clear()
+        _loaded_at = time.monotonic()
+
+    key = (code_type or "", _payload_hash(payload))
+    merged = _merged_cache.get(key)
+    if merged is None:
+        version_at_start = _version
+        base = _base_cache.get(key[0])
+        if base is None:
+            loader = _LOADERS.get(key[0])
+            base = await loader() if loader else {}
+        merged = dict(base)
+        # 如果有自定义payload，则合并
+        if key[1]:
+            merged.update(payload)
+        # 加载期间规则被修改过则不写入缓存，避免缓存旧数据
+        if version_at_start == _version:
+            if len(_merged_cache) >= MAX_MERGED_ENTRIES:
+                _merged_cache.clear()
+            _base_cache[key[0]] = base
+            _merged_cache[key] = merged
+    return copy.deepcopy(merged)
+
+
+async def _on_rules_changed(*args, **kwargs) -> None:
+    await invalidate()
+
+
+for _model in (World, TalentTier, Origin, SpiritRoot, Talent):
+    post_save(_model)(_on_rules_changed)
+    post_delete(_model)(_on_rules_changed)
+
+
+metrics.gauge(
+    "rules_snapshot_stats", "规则快照缓存状态",
+    lambda: {(k,): v for k, v in stats().items()}, ("stat",),
+)
@@ -0,0 +1,299 @@
+"""
+创意工坊热度排行
+
+热度分采用"对数人气 + 发布时间"的形式（与 Reddit hot 同构）：
+
+    key = log2(1 + downloads + LIKE_WEIGHT * likes) + created_ts / HALF_LIFE
+
+等价于 `人气 * 2 ** (-(now - created) / HALF_LIFE)` 的指数衰减分，
+但衰减因子对所有条目相同，因此排序不随时间变化——只有计数变化时才需要重排。
+这样可以把排行常驻内存，按下载/点赞事件增量维护，列表页直接切片，
+不必对整表 ORDER BY。
+
+后台任务定期按 `updated_at` 水位增量同步数据库中的计数变化，
+并周期性全量重建以兜底（例如其他 worker 上被直接删除的条目）；列表页发现条目
+已不在数据库中时也会立即移除。重建期间发生的增量更新会在替换前重放到新结构上。
+
+排行尚未就绪时由 ensure_ready 等待同一次重建；带关键词的热门列表按排行顺序
+分块遍历条目ID，只向数据库询问哪些命中关键词，凑满一页即停止。
+"""
+
+import asyncio
+import logging
+import math
+import time
+from bisect import bisect_left, insort
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from server.models import WorkshopItem
+from server.utils import metrics
+
+logger = logging.getLogger(__name__)
+
+# 热度半衰期：人气相同的条目，晚发布 HALF_LIFE 秒的热度翻倍
+HALF_LIFE = 3 * 24 * 3600
+# 点赞相对下载的权重
+LIKE_WEIGHT = 3.0
+# "本周热门" 的时间窗口
+WEEK_SECONDS = 7 * 24 * 3600
+
+# 增量同步与全量重建的间隔（秒）
+REFRESH_INTERVAL = 30
+REBUILD_INTERVAL = 3600
+
+ALL_TYPES = "__all__"
+
+
+def _to_ts(dt: Optional[datetime]) -> float:
+    """数据库中的时间按 UTC 处理（与 datetime.utcnow() 的用法保持一致）"""
+    if dt is None:
+        return time.time()
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def hot_key(downloads: int, likes: int, created_ts: float) -> float:
+    """计算排序键（越大越热）"""
+    popularity = max(0, downloads or 0) + LIKE_WEIGHT * max(0, likes or 0)
+    return math.log2(1 + popularity) + created_ts / HALF_LIFE
+
+
+class _Board:
+    """单个排行榜：按 (-key, id) 升序保存，切片即为热度降序"""
+
+    __slots__ = ("entries", "created")
+
+    def __init__(self) -> None:
+        self.entries: List[Tuple[float, int]] = []
+        # 发布时间（升序），用于统计"本周"条目数
+        self.created: List[Tuple[float, int]] = []
+
+    def add(self, key: float, item_id: int, created_ts: float) -> None:
+        insort(self.entries, (-key, item_id))
+        insort(self.created, (created_ts, item_id))
+
+    def remove(self, key: float, item_id: int, created_ts: float) -> None:
+        for seq, entry in ((self.entries, (-key, item_id)), (self.created, (created_ts, item_id))):
+            idx = bisect_left(seq, entry)
+            if idx < len(seq) and seq[idx] == entry:
+                del seq[idx]
+
+    def count_since(self, since_ts: float) -> int:
+        return len(self.created) - bisect_left(self.created, (since_ts, -1))
+
+
+class WorkshopRanking:
+    """全站与分类型热度排行（仅包含公开且未删除的条目）"""
+
+    def __init__(self) -> None:
+        # item_id -> (key, type, created_ts)
+        self._items: Dict[int, Tuple[float, str, float]] = {}
+        self._boards: Dict[str, _Board] = {ALL_TYPES: _Board()}
+        self.ready = False
+        self.watermark: Optional[datetime] = None
+        # 进行中的全量重建各自的变更日志：(方法名, 参数)
+        self._journals: List[List[Tuple[str, tuple]]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _board(self, item_type: Optional[str]) -> Optional[_Board]:
+        return self._boards.get(item_type or ALL_TYPES)
+
+    def upsert(
+        self,
+        item_id: int,
+        item_type: str,
+        downloads: int,
+        likes: int,
+        created_at: Optional[datetime],
+        visible: bool = True,
+    ) -> None:
+        """新增或更新一个条目；visible=False 时等同于移除"""
+        for journal in self._journals:
+            journal.append(("upsert", (item_id, item_type, downloads, likes, created_at, visible)))
+        self._discard(item_id)
+        if not visible:
+            return
+        created_ts = _to_ts(created_at)
+        key = hot_key(downloads, likes, created_ts)
+        self._items[item_id] = (key, item_type, created_ts)
+        self._boards[ALL_TYPES].add(key, item_id, created_ts)
+        self._boards.setdefault(item_type, _Board()).add(key, item_id, created_ts)
+
+    def upsert_item(self, item: WorkshopItem) -> None:
+        self.upsert(
+            item.id,
+            item.type,
+            item.downloads,
+            item.likes,
+            item.created_at,
+            visible=item.is_public and not item.is_deleted,
+        )
+
+    def discard(self, item_id: int) -> None:
+        for journal in self._journals:
+            journal.append(("discard", (item_id,)))
+        self._discard(item_id)
+
+    def _discard(self, item_id: int) -> None:
+        entry = self._items.pop(item_id, None)
+        if entry is None:
+            return
+        key, item_type, created_ts = entry
+        self._boards[ALL_TYPES].remove(key, item_id, created_ts)
+        board = self._boards.get(item_type)
+        if board:
+            board.remove(key, item_id, created_ts)
+
+    def page(
+        self,
+        item_type: Optional[str] = None,
+        offset: int = 0,
+        limit: int = 20,
+        week_only: bool = False,
+    ) -> Tuple[List[int], int]:
+        """
+        获取一页排行结果。
+
+        Returns:
+            (按热度降序的条目ID列表, 总数)
+        """
+        board = self._board(item_type)
+        if board is None:
+            return [], 0
+
+        if not week_only:
+            ids = [item_id for _, item_id in board.entries[offset:offset + limit]]
+            return ids, len(board.entries)
+
+        total = board.count_since(time.time() - WEEK_SECONDS)
+        ids = []
+        for item_id in self.iter_ids(item_type, week_only=True):
+            if offset:
+                offset -= 1
+                continue
+            ids.append(item_id)
+            if len(ids) >= limit:
+                break
+        return ids, total
+
+    def iter_ids(self, item_type: Optional[str] = None, week_only: bool = False) -> Iterator[int]:
+        """按热度降序逐个产出条目ID"""
+        board = self._board(item_type)
+        if board is None:
+            return
+        since_ts = time.time() - WEEK_SECONDS if week_only else None
+        # 先复制一份，遍历期间（其间会 await 数据库）排行可能被修改
+        for _, item_id in list(board.entries):
+            entry = self._items.get(item_id)
+            if entry is None or (since_ts is not None and entry[2] < since_ts):
+                continue
+            yield item_id
+
+    def clear(self) -> None:
+        self._items.clear()
+        self._boards = {ALL_TYPES: _Board()}
+
+
+ranking = WorkshopRanking()
+
+_FIELDS = ("id", "type", "downloads", "likes", "created_at", "updated_at", "is_public", "is_deleted")
+
+
+async def rebuild() -> None:
+    """从数据库全量重建排行（查询期间的增量更新会重放到新结构上，不会丢失）"""
+    journal: List[Tuple[str, tuple]] = []
+    ranking._journals.append(journal)
+    try:
+        rows = await WorkshopItem.filter(is_deleted=False, is_public=True).values(*_FIELDS)
+    finally:
+        ranking._journals.remove(journal)
+    fresh = WorkshopRanking()
+    for row in rows:
+        fresh.upsert(row["id"], row["type"], row["downloads"], row["likes"], row["created_at"])
+    for method, args in journal:
+        getattr(fresh, method)(*args)
+    ranking._items, ranking._boards = fresh._items, fresh._boards
+    ranking.watermark = max((row["updated_at"] for row in rows if row["updated_at"]), default=None)
+    ranking.ready = True
+    logger.info("创意工坊排行已重建，共 %d 条", len(ranking))
+
+
+_rebuilding: Optional[asyncio.Future] = None
+
+
+async def ensure_ready() -> None:
+    """排行尚未就绪时等待重建（并发请求共用同一次重建）"""
+    global _rebuilding
+    if ranking.ready:
+        return
+    if _rebuilding is None or _rebuilding.done():
+        _rebuilding = asyncio.ensure_future(rebuild())
+    await asyncio.shield(_rebuilding)
+
+
+async def refresh() -> int:
+    """按 updated_at 水位增量同步，返回同步的条目数"""
+    if not ranking.ready:
+        await rebuild()
+        return len(ranking)
+
+    qs = WorkshopItem.all()
+    if ranking.watermark is not None:
+        qs = qs.filter(updated_at__gte=ranking.watermark)
+    rows = await qs.values(*_FIELDS)
+    for row in rows:
+        ranking.upsert(
+            row["id"],
+            row["type"],
+            row["downloads"],
+            row["likes"],
+            row["created_at"],
+            visible=row["is_public"] and not row["is_deleted"],
+        )
+        if row["updated_at"] and (ranking.watermark is None or row["updated_at"] > ranking.watermark):
+            ranking.watermark = row["updated_at"]
+    return len(rows)
+
+
+_task: Optional[asyncio.Task] = None
+
+
+async def _run() -> None:
+    last_rebuild = 0.0
+    while True:
+        try:
+            if time.monotonic() - last_rebuild >= REBUILD_INTERVAL:
+                await rebuild()
+                last_rebuild = time.monotonic()
+            else:
+                await refresh()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("创意工坊排行同步失败: %s", e)
+        await asyncio.sleep(REFRESH_INTERVAL)
+
+
+def start() -> None:
+    """启动后台排行维护任务（在应用生命周期内调用）"""
+    global _task
+    if _task is None or _task.done():
+        _task = asyncio.create_task(_run())
+
+
+async def stop() -> None:
+    global _task
+    if _task is not None:
+        _task.cancel()
+        try:
+            await _task
+        except asyncio.CancelledError:
+            pass
+        _task = None
+
+
+metrics.gauge("workshop_ranking_items", "工坊排行内存索引中的作品数", lambda: len(ranking))